@@ -25,15 +25,42 @@
 
 #!/usr/bin/env python 
 import sys
+import time
+import argparse
+import multiprocessing
+
+# Startup timer
+_start = time.time()
+
 from PyQt5.QtWidgets import QApplication
 from src.QKeithleyMain import QKeithleyMain
 
-# Main event loop handler instance
-_app = QApplication(sys.argv)
+# Acquisition processes are spawned and import this module. Only the main 
+# process starts the application
+if __name__ == "__main__":
+
+	multiprocessing.freeze_support()
+
+	# Command line options (remaining arguments are passed to Qt)
+	parser = argparse.ArgumentParser(prog="QKeithleyControl")
+	parser.add_argument("--server", type=int, nargs="?", const=50500, default=None, metavar="PORT", 
+		help="start local remote control and data streaming server (default port 50500)")
+	args, _argv = parser.parse_known_args()
+
+	# Main event loop handler instance
+	_app = QApplication(sys.argv[:1] + _argv)
+
+	# Instantiate the application
+	window = QKeithleyMain(_app)
+	window.show()
+
+	# Remote control server
+	if args.server is not None:
+		window.start_server(args.server)
 
-# Instantiate the application
-window = QKeithleyMain(_app)
-window.show()
+	# Report time to interactive config screen
+	_app.processEvents()
+	window.report_startup( time.time() - _start )
 
-# Enter event loop
-_app.exec_()
\ No newline at end of file
+	# Enter event loop
+	_app.exec_()
@@ -26,13 +26,13 @@
 
 #!/usr/bin/env python 
 import os
+import time
+import importlib
 import threading 
 
-# Import Keithley control widgets
+# Import Keithley configuration widget. Measurement applications (and 
+# matplotlib) are imported on first selection in main_menu_callback
 from src.app.QKeithleyConfig import QKeithleyConfig
-from src.app.QKeithleyBias import QKeithleyBias
-from src.app.QKeithleySweep import QKeithleySweep 
-from src.app.QKeithleySolar import QKeithleySolar
 
 # Import QT backends
 from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow, QAction, QStackedWidget, QMessageBox, QMenu
@@ -64,46 +64,89 @@ class QKeithleyMain(QMainWindow):
 		# Create QVisaWidget for configuration mode
 		self.ui_config = QKeithleyConfig()
 		
-		# Create QVisaWidget for each measurement mode
-		self.ui_bias   = QKeithleyBias(self.ui_config)
-		self.ui_sweep  = QKeithleySweep(self.ui_config)
-		self.ui_solar  = QKeithleySolar(self.ui_config)
-
-		# Add ui-mode widgets to stack
+		# Measurement mode widgets (menu text: module, class). These 
+		# are constructed and added to stack on first selection
+		self.ui_apps = {
+			"IV-Bias Control"		: ("src.app.QKeithleyBias", "QKeithleyBias"),
+			"IV-Sweep Control"		: ("src.app.QKeithleySweep", "QKeithleySweep"),
+			"PV-Characterization"	: ("src.app.QKeithleySolar", "QKeithleySolar")
+		}
+		self.ui_pages = {}
+
+		# Remote control server (see start_server)
+		self.remote = None
+
+		# Add config widget to stack
 		self.ui_stack.addWidget(self.ui_config)
-		self.ui_stack.addWidget(self.ui_bias)
-		self.ui_stack.addWidget(self.ui_sweep)
-		self.ui_stack.addWidget(self.ui_solar)
 
 		# Set window central widget to stacked widget
 		self.setCentralWidget(self.ui_stack)
 
+	# Get measurement mode widget. Widget is constructed on first call
+	def get_page(self, _name):
+
+		if _name not in self.ui_pages.keys():
+
+			_start = time.time()
+
+			# Import module and construct widget
+			_module, _class = self.ui_apps[_name]
+			self.ui_pages[_name] = getattr( importlib.import_module(_module), _class )(self.ui_config)
+			self.ui_stack.addWidget(self.ui_pages[_name])
+			self.ui_config.register_page(self.ui_pages[_name])
+
+			# Report construction time
+			self.statusBar().showMessage("%s loaded in %.2fs"%( _name, time.time() - _start ), 5000)
+
+		return self.ui_pages[_name]
+
+	# Measurement mode widgets 
+	@property
+	def ui_bias(self):
+		return self.get_page("IV-Bias Control")
+
+	@property
+	def ui_sweep(self):
+		return self.get_page("IV-Sweep Control")
+
+	@property
+	def ui_solar(self):
+		return self.get_page("PV-Characterization")
+
+	# Start local remote control and data streaming server
+	def start_server(self, _port):
+
+		from src.QKeithleyRemote import QKeithleyRemote
+		self.remote = QKeithleyRemote(self, _port)
+		self.statusBar().showMessage("Remote control on port %d"%self.remote.server.address[1], 5000)
+
+	# Report startup time (s) to interactive config screen
+	def report_startup(self, _time):
+
+		self.startup = _time
+		self.statusBar().showMessage("QKeithleyControl started in %.2fs"%_time, 5000)
+		
 	# Callback to handle main menu actions
 	def main_menu_callback(self, q):
 
 		if q.text() == "Hardware Config" and self.ui_stack.currentIndex() != 0: 
 			self.ui_stack.setCurrentIndex(0)
 
-		if q.text() == "IV-Bias Control" and self.ui_stack.currentIndex() != 1: 		
-			
-			self.ui_bias.refresh()
-			self.ui_stack.setCurrentIndex(1)
+		# Measurement modes
+		if q.text() in self.ui_apps.keys():
 
-		if q.text() == "IV-Sweep Control" and self.ui_stack.currentIndex() != 2:
-			
-			self.ui_sweep.refresh()
-			self.ui_stack.setCurrentIndex(2)
+			_page = self.get_page( q.text() )
 
-		if q.text() == "PV-Characterization" and self.ui_stack.currentIndex() != 3:
+			if self.ui_stack.currentWidget() is not _page:
 
-			self.ui_solar.refresh()
-			self.ui_stack.setCurrentIndex(3)
+				_page.refresh()
+				self.ui_stack.setCurrentWidget(_page)
 
 		if q.text() == "Exit":
 
 			# Check to see if there are any threads running 
-			# other than main thread
-			if len( threading.enumerate() ) > 1:
+			# other than main thread (and remote control server)
+			if len( [ _ for _ in threading.enumerate() if not _.name.startswith("QKeithleyServer") ] ) > 1:
 
 				# Dialogue to check quit
 				msg = QMessageBox()
@@ -117,6 +160,9 @@ class QKeithleyMain(QMainWindow):
 			# Otherwise enter the close dialog
 			else:	
 
+				if self.remote is not None:
+					self.remote.close()
+
 				self.ui_config.close_devices()
 				self.app.exit()	
 
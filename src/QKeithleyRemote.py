@@ -0,0 +1,136 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyRemote
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python 
+import threading
+
+# Import QT backends
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Import server
+from src.utils.QKeithleyServer import QKeithleyServer
+
+# Remote control of QKeithleyMain. Runs a QKeithleyServer and executes its 
+# commands in the Qt thread. Measurement actions are the state machine 
+# buttons returned by get_remote_actions() of each application, so remote 
+# actions behave exactly like clicks (including checks and warnings). 
+#
+#	{"cmd" : "list"}									: actions and running state
+#	{"cmd" : "start", "app" : "sweep", "action" : "sweep"}	: start action
+#	{"cmd" : "stop", "app" : "bias", "action" : "Keithley GPIB0::24"}	
+#	{"cmd" : "subscribe"}								: stream data frames
+#	{"cmd" : "unsubscribe"}
+#
+class QKeithleyRemote(QObject):
+
+	# Signal to pass requests to Qt thread
+	_request = pyqtSignal(object)
+
+	def __init__(self, _main, _port=50500):
+
+		QObject.__init__(self)
+
+		# Application names
+		self._main = _main
+		self._apps = {
+			"bias"  : "IV-Bias Control",
+			"sweep" : "IV-Sweep Control",
+			"solar" : "PV-Characterization"
+		}
+
+		# Requests are queued to the Qt thread
+		self._request.connect(self.exec_request)
+		self.server = QKeithleyServer(self.handle, self.get_sources, _port=_port)
+
+	# Data objects of constructed applications
+	def get_sources(self):
+		return { _app : self._main.ui_pages[_page]._get_data_object() 
+			for _app, _page in self._apps.items() if _page in self._main.ui_pages.keys() }
+
+	# Command handler (server thread). Waits for reply from Qt thread
+	def handle(self, _command):
+
+		_request = {"command" : _command, "reply" : None, "done" : threading.Event()}
+		self._request.emit(_request)
+
+		if not _request["done"].wait(10.0):
+			return {"ok" : False, "error" : "application did not respond"}
+
+		return _request["reply"]
+
+	# Execute request (Qt thread)
+	def exec_request(self, _request):
+
+		try:
+			_request["reply"] = self.exec_command(_request["command"])
+
+		except Exception as e:
+			_request["reply"] = {"ok" : False, "error" : "%s: %s"%(type(e).__name__, str(e))}
+
+		_request["done"].set()
+
+	# Get application page. Page is constructed and refreshed on first use
+	def get_app(self, _app):
+
+		if _app not in self._apps.keys():
+			raise ValueError("unknown application (%s)"%_app)
+
+		_page = self._main.get_page( self._apps[_app] )
+		_page.refresh()
+		return _page
+
+	def exec_command(self, _command):
+
+		_cmd = _command.get("cmd")
+
+		# List actions and running state of constructed applications (pages 
+		# are not constructed for listing)
+		if _cmd == "list":
+
+			return {"ok" : True, "actions" : { _app : { _name : _running 
+				for _name, ( _button, _running ) in self._main.ui_pages[_page].get_remote_actions().items() } 
+					for _app, _page in self._apps.items() if _page in self._main.ui_pages.keys() } }
+
+		# Start or stop action (click state machine button)
+		if _cmd in ["start", "stop"]:
+
+			_actions = self.get_app( _command.get("app") ).get_remote_actions()
+			if _command.get("action") not in _actions.keys():
+				raise ValueError("unknown action (%s)"%_command.get("action"))
+
+			_button, _running = _actions[ _command.get("action") ]
+			if _running == ( _cmd == "start" ):
+				return {"ok" : True, "running" : _running}
+
+			if not _button.isEnabled():
+				raise ValueError("action is not available (%s)"%_command.get("action"))
+
+			_button.click()
+			return {"ok" : True, "running" : _cmd == "start"}
+
+		raise ValueError("unknown command (%s)"%_cmd)
+
+	def close(self):
+		self.server.close()
@@ -26,15 +26,28 @@
 
 #!/usr/bin/env python 
 import os
+import time
+import threading
 
 # Import QVisaApplication
 from PyQtVisa import QVisaApplication
 
+# Import PyQtVisa widgets
+from PyQtVisa.widgets import QVisaUnitSelector
+from PyQtVisa.widgets import QVisaDynamicPlot 
+
+# Import device selector (pages are constructed on first selection)
+from src.widgets.QKeithleyDeviceSelect import QKeithleyDeviceSelect
+
 # Import QKeithleyWidget
 from src.widgets.QKeithleyBiasWidget import QKeithleyBiasWidget
 
+# Import acquisition scheduler
+from src.utils.QKeithleyScheduler import QKeithleyScheduler
+
 # Import QT backends
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QStackedWidget, QLabel
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QStackedWidget, QLabel, QComboBox, QPushButton, QListWidget, QListWidgetItem, QMessageBox
+from PyQt5.QtCore import Qt, QStateMachine, QState
 from PyQt5.QtGui import QIcon
 
 
@@ -49,6 +62,10 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 		# Generate Main Layout
 		self.gen_main_layout()
 
+	# Device selector starts empty. Devices are registered in refresh()
+	def _gen_device_select(self):
+		return QKeithleyDeviceSelect(self)
+
 	# Method to refresh the widget
 	def refresh(self):
 	
@@ -72,12 +89,32 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 					self.ctrls.addWidget(self.bias_widgets[_name].get_ctrl_widget())
 					self.plots.addWidget(self.bias_widgets[_name].get_plot_widget())
 
+					# Add output to group channel list
+					_item = QListWidgetItem(_name)
+					_item.setFlags(_item.flags() | Qt.ItemIsUserCheckable)
+					_item.setCheckState(Qt.Checked)
+					self.group_devices.addItem(_item)
+
 					# Force update bias pages
 					self.update_bias_pages()
+
+			# Enable group run
+			self.group_button.setEnabled(True)
 		
 	# Update all widgets	
 	def update_bias_pages(self):
 
+		# Group run pages
+		if self.run_select.currentText() == "Group Run":
+
+			self.outputs.setCurrentWidget(self.group_button)
+			self.ctrls.setCurrentWidget(self.group_ctrl)
+			self.plots.setCurrentWidget(self.group_plot)
+			self.device_select.setEnabled(False)
+			return
+
+		self.device_select.setEnabled(True)
+
 		# Get current name
 		_name = self.device_select.currentText()
 
@@ -105,6 +142,295 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 
 				self.meta_widget.del_meta_key(_key)
 
+	#####################################
+	#  GROUP RUN
+	#
+
+	# Generate group run controls
+	def gen_group_ctrl(self):
+
+		self.group_ctrl = QWidget()
+		self.group_ctrl_layout = QVBoxLayout()
+
+		# Create QStateMachine for output state
+		self.group_state = QStateMachine()
+		self.group_button = QPushButton()
+		self.group_button.setStyleSheet(
+			"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )
+		self.group_button.setEnabled(False)
+
+		# Create output states
+		self.group_off = QState()
+		self.group_on  = QState()
+
+		# Attach states to output button and define state transitions
+		self.group_off.assignProperty(self.group_button, 'text', 'Group Output On')
+		self.group_off.addTransition(self.group_button.clicked, self.group_on)
+		self.group_off.entered.connect(self.exec_group_stop)
+
+		self.group_on.assignProperty(self.group_button, 'text', 'Group Output Off')
+		self.group_on.addTransition(self.group_button.clicked, self.group_off)
+		self.group_on.entered.connect(self.exec_group_run)
+
+		# Add states, set initial state, and start machine
+		self.group_state.addState(self.group_off)
+		self.group_state.addState(self.group_on)
+		self.group_state.setInitialState(self.group_off)
+		self.group_state.start()
+
+		# Channel list. All checked outputs are read on each tick
+		self.group_devices_label = QLabel("Select Channels")
+		self.group_devices = QListWidget()
+		self.group_devices.setFixedHeight(100)
+
+		# Measurement interval
+		self.group_delay_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Measurement Interval (s)",
+			"limit"		: 60.0, 
+			"signed"	: False,
+			"default"	: [0.1]
+		}
+		self.group_delay = QVisaUnitSelector.QVisaUnitSelector(self.group_delay_config)
+
+		# Plot frame rate. Canvas is redrawn at this rate
+		# independent of the number of channels
+		self.group_rate_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: "Plot Frame Rate (Hz)",
+			"limit"		: 30.0,
+			"signed"	: False,
+			"default"	: [5.0]
+		}
+		self.group_rate = QVisaUnitSelector.QVisaUnitSelector(self.group_rate_config)
+
+		# Note on channel settings
+		self.group_note = QLabel("Bias level and compliance are taken\nfrom each output's controls")
+
+		# Add widgets to layout
+		self.group_ctrl_layout.addWidget(self.group_devices_label)
+		self.group_ctrl_layout.addWidget(self.group_devices)
+		self.group_ctrl_layout.addWidget(self.group_delay)
+		self.group_ctrl_layout.addWidget(self.group_rate)
+		self.group_ctrl_layout.addWidget(self.group_note)
+		self.group_ctrl_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout
+		self.group_ctrl.setLayout(self.group_ctrl_layout)
+
+	# Generate group run plot
+	def gen_group_plot(self):
+
+		self.group_plot = QVisaDynamicPlot.QVisaDynamicPlot(self)
+		self.group_plot.add_subplot("111")
+		self.group_plot.set_axes_labels("111", "Time (s)", "Current (A)")
+		self.group_plot.refresh_canvas(supress_warning=True)
+
+		# Sync plot clear data button with application data
+		self.group_plot.sync_application_data(True)
+		self.group_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
+
+	# Get list of checked channels
+	def get_group_names(self):
+
+		_names = []
+		for _n in range( self.group_devices.count() ):
+
+			_item = self.group_devices.item(_n)
+			if _item.checkState() == Qt.Checked and self.get_device_by_name( _item.text() ) is not None:
+				_names.append( _item.text() )
+
+		return _names
+
+	# Group run thread. All channels are read on each tick by one scheduler. 
+	# Samples share a single timestamp column and are stored in one data key
+	def exec_group_thread(self):
+
+		# Get QVisaDataObject
+		data = self._get_data_object()
+		key  = data.add_hash_key("bias-group")
+
+		# Add key to meta widget
+		self.meta_widget.add_meta_key(key)
+
+		# One voltage and current column per channel
+		_subkeys = ["t"]
+		for _n in range( len(self.group_names) ):
+			_subkeys.extend( ["V%d"%_n, "I%d"%_n] )
+
+		data.set_subkeys(key, _subkeys)
+		data.set_metadata(key, "__type__", "bias-group")
+		data.set_metadata(key, "__channels__", ",".join( [ _name.replace(" ", "-") for _name in self.group_names ] ))
+
+		# One plot handle per channel on the group key
+		for _name in self.group_names:
+			self.group_plot.add_axes_handle("111", key)
+
+		# Scheduler with one worker per channel
+		_devices = [ self.get_device_by_name(_name) for _name in self.group_names ]
+		_sched = QKeithleyScheduler( len(_devices), self.group_rate.value() )
+
+		# Outputs are turned off and the scheduler shut down even if a 
+		# channel fails
+		try:
+
+			# Turn outputs ON
+			for _device in _devices:
+				_device.output_on()
+
+			# Shared time base
+			_sched.start()
+
+			# Thread loop
+			while self.group_thread_running is True:
+
+				# Read all channels concurrently
+				_buffers = _sched.measure(_devices)
+				_now = _sched.now()
+
+				# Append measured values to data arrays
+				data.append_subkey_data(key, "t", _now)
+
+				for _n, _buffer in enumerate(_buffers):
+
+					data.append_subkey_data(key, "V%d"%_n, float(_buffer[0]) )
+					data.append_subkey_data(key, "I%d"%_n, float(_buffer[1]) )
+
+					self.group_plot.append_handle_data("111", key, _now, float(_buffer[self.group_cols[_n]]), _handle_index=_n)
+
+				# Update canvas at fixed frame rate
+				if _sched.draw_due():
+					self.group_plot.update_canvas()
+
+				# Measurement delay	
+				if self.group_delay.value() != 0: 
+					time.sleep(self.group_delay.value())
+
+			# Record aggregate sample rate (samples/s) over all channels
+			data.set_metadata(key, "__rate__", float( _sched.ticks() * len(_devices) ) / max( _sched.now(), 1e-9 ))
+
+		# Cleanup after thread termination. Post a button click to reset the 
+		# UI if the thread ended on an error
+		finally:
+
+			for _device in _devices:
+				_device.output_off()
+
+			_sched.shutdown()
+			self.group_plot.update_canvas()
+
+			if self.group_thread_running:
+				self.group_button.click()
+
+	# Group run ON
+	def exec_group_run(self):
+
+		# Cache channel names for measurement thread
+		self.group_names = self.get_group_names()
+
+		# Channels which are already running individually
+		_busy = [ _name for _name in self.group_names if self.bias_widgets[_name].thread_running ]
+
+		if self.group_names == [] or _busy != []:
+
+			# Message box to warn the user
+			msg = QMessageBox()
+			msg.setIcon(QMessageBox.Warning)
+			msg.setText("Select channels which are not running individually" if _busy == [] else "Turn off outputs before group run: %s"%", ".join(_busy))
+			msg.setWindowTitle("QKeithleyBias")
+			msg.setWindowIcon(self._icon)
+			msg.setStandardButtons(QMessageBox.Ok)
+			msg.exec_()
+
+			# Revert state
+			self.group_button.click()
+			return
+
+		# Apply bias level and compliance from each output's controls
+		for _name in self.group_names:
+			self.bias_widgets[_name].update_bias()
+			self.bias_widgets[_name].update_cmpl()
+
+		# Plot current of voltage sources and voltage of current sources
+		_modes = [ self.bias_widgets[_name].src_select.currentText() for _name in self.group_names ]
+		self.group_cols = [ 1 if _mode == "Voltage" else 0 for _mode in _modes ]
+		self.group_plot.set_axes_labels("111", "Time (s)", { 
+			"Voltage" 	: "Current (A)", 
+			"Current" 	: "Voltage (V)" 
+		}.get( _modes[0] if len( set(_modes) ) == 1 else None, "Current (A) / Voltage (V)" ))
+
+		# Channel controls are locked while the group drives the outputs
+		self.set_group_channels_enabled(False)
+
+		# Update UI for ON state
+		self.group_button.setStyleSheet(
+			"background-color: #cce6ff; border-style: solid; border-width: 1px; border-color: #1a75ff; padding: 7px;")
+
+		# Disable widgets
+		self.save_widget.setEnabled(False)
+		self.run_select.setEnabled(False)
+		self.group_devices.setEnabled(False)
+		self.group_plot.mpl_refresh_setEnabled(False)
+
+		# Run the measurement thread function
+		self.group_thread = threading.Thread(target=self.exec_group_thread, args=())
+		self.group_thread.daemon = True			# Daemonize thread
+		self.group_thread_running = True		# Set execution flag				
+		self.group_thread.start()				# Start the execution
+
+	# Group run OFF
+	def exec_group_stop(self):
+
+		if hasattr(self, "group_thread"):
+
+			# Put output button in off state
+			self.group_button.setStyleSheet(
+				"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )	
+
+			# Enable widgets 
+			self.save_widget.setEnabled(True)
+			self.run_select.setEnabled(True)
+			self.group_devices.setEnabled(True)
+			self.group_plot.mpl_refresh_setEnabled(True)
+
+			# Set thread running to False. This will break the 
+			# execution loop on next iteration.  
+			self.group_thread_running = False	
+			self.group_thread.join()  # Waits for thread to complete
+			del self.group_thread
+
+			self.set_group_channels_enabled(True)
+
+	# Enable or disable output button and controls of group channels
+	def set_group_channels_enabled(self, _enabled):
+
+		for _name in self.group_names:
+			self.bias_widgets[_name].get_output_widget().setEnabled(_enabled)
+			self.bias_widgets[_name].get_ctrl_widget().setEnabled(_enabled)
+
+	# Measurement actions for remote control { name : ( button, running ) }. 
+	# Outputs are named by device. Channels in a running group are not listed
+	def get_remote_actions(self):
+
+		_group = getattr(self, "group_thread_running", False)
+		_actions = { "group" : ( self.group_button, _group ) }
+
+		for _name, _widget in self.bias_widgets.items():
+			if _name != "__none__" and not ( _group and _name in self.group_names ):
+				_actions[_name] = ( _widget.output_widget[0], _widget.thread_running )
+
+		return _actions
+
+	# Devices held by running outputs and group run
+	def get_busy_devices(self):
+
+		_busy = [ _name for _name, _widget in self.bias_widgets.items() if _name != "__none__" and _widget.thread_running ]
+
+		if getattr(self, "group_thread_running", False):
+			_busy += self.group_names
+
+		return _busy
+
 	# Main Layout
 	def gen_main_layout(self):	
 
@@ -126,9 +452,22 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 		# Create dummy widgets for visaul symmetry
 		self.bias_widgets["__none__"] = QKeithleyBiasWidget(self, "__none__") 
 
+		# Group run controls and plot
+		self.gen_group_ctrl()
+		self.gen_group_plot()
+
 		# Bias output buttons
 		self.outputs  = QStackedWidget()
 		self.outputs.addWidget(self.bias_widgets["__none__"].get_output_widget())
+		self.outputs.addWidget(self.group_button)
+
+		# Run mode selector. Group run drives several outputs from 
+		# one acquisition scheduler on a shared time base
+		self.run_select_label = QLabel("Run Mode")
+		self.run_select = QComboBox()
+		self.run_select.setFixedWidth(200)
+		self.run_select.addItems(["Single Output", "Group Run"])
+		self.run_select.currentTextChanged.connect(self.update_bias_pages)
 
 		# Insturement selector
 		self.device_select_label  = QLabel("Select Output")
@@ -139,6 +478,7 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 		# Controls for source
 		self.ctrls = QStackedWidget()
 		self.ctrls.addWidget(self.bias_widgets["__none__"].get_ctrl_widget())
+		self.ctrls.addWidget(self.group_ctrl)
 
 		# Meta widget for trace description
 		self.meta_widget_label = QLabel("<b>Trace Description</b>")
@@ -150,6 +490,7 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 
 		# Pack widgets
 		self.meas_layout.addWidget(self.outputs)
+		self.meas_layout.addWidget(self._gen_hbox_widget([self.run_select, self.run_select_label])) 
 		self.meas_layout.addWidget(self._gen_hbox_widget([self.device_select, self.device_select_label])) 
 		self.meas_layout.addWidget(self.ctrls)
 		self.meas_layout.addStretch(1)
@@ -165,6 +506,7 @@ class QKeithleyBias(QVisaApplication.QVisaApplication):
 		self.plot_layout = QVBoxLayout()
 		self.plots = QStackedWidget()
 		self.plots.addWidget(self.bias_widgets["__none__"].get_plot_widget())
+		self.plots.addWidget(self.group_plot)
 		self.plot_layout.addWidget(self.plots)
 
 		# Add layouts to main layout and set layout
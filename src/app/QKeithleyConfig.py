@@ -55,6 +55,9 @@ class QKeithleyConfig(QVisaConfigure.QVisaConfigure):
 		# Inherits QVisaConfigure -> QWidget
 		super(QKeithleyConfig, self).__init__()	
 
+		# Measurement pages using configured devices (see register_page)
+		self._pages = []
+
 		# Create Icon for QMessageBox
 		self.gen_main_layout()
 
@@ -96,6 +99,24 @@ class QKeithleyConfig(QVisaConfigure.QVisaConfigure):
 			self.device_pages.addWidget( QKeithleyConfigWidget( self, Device.get_property("name") ) )
 
 
+	# Register measurement page. Pages report devices held by running 
+	# measurements via get_busy_devices()
+	def register_page(self, _page):
+		self._pages.append(_page)
+
+	# Names of devices held by running measurements on any page
+	def get_busy_devices(self):
+		return [ _name for _page in self._pages for _name in _page.get_busy_devices() ]
+
+	# Get configuration widget of device by name
+	def get_config_widget(self, _name):
+
+		for _page in list( self.device_pages.findChildren(QKeithleyConfigWidget) ):
+			if _page.name == _name:
+				return _page
+
+		return None
+
 	# This will update the QStackedWidget to show the correct QKeithleyWidget
 	def update_device_pages(self):
 		
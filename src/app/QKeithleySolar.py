@@ -30,6 +30,7 @@ import sys
 import time
 import html
 import threading 
+import collections
 
 # Import numpy
 import numpy as np
@@ -41,8 +42,21 @@ from PyQtVisa import QVisaApplication
 from PyQtVisa.widgets import QVisaUnitSelector
 from PyQtVisa.widgets import QVisaDynamicPlot 
 
+# Import device selector (pages are constructed on first selection)
+from src.widgets.QKeithleyDeviceSelect import QKeithleyDeviceSelect
+
+# Import scheduler for multi-device acquisition
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.utils.QKeithleyScheduler import QKeithleyScheduler
+
+# Import data stream for long running measurements
+from src.utils.QKeithleyDataStream import QKeithleyDataStream
+
+# Import error band for averaged sweeps
+from src.utils.QKeithleyErrorBand import QKeithleyErrorBand
+
 # Import QT backends
-from PyQt5.QtWidgets import QApplication, QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox, QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox, QLabel, QFileDialog, QSizePolicy, QLineEdit
+from PyQt5.QtWidgets import QApplication, QWidget, QStackedWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox, QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox, QLabel, QFileDialog, QSizePolicy, QLineEdit, QListWidget, QListWidgetItem
 from PyQt5.QtCore import Qt, QStateMachine, QState, QObject
 from PyQt5.QtGui import QIcon
 
@@ -72,6 +86,10 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 		if self.keithley() is not None:
 			self.keithley().set_voltage(_value)	
 
+	# Device selector starts empty. Devices are registered in refresh()
+	def _gen_device_select(self):
+		return QKeithleyDeviceSelect(self)
+
 	# Method to refresh the widget
 	def refresh(self):
 	
@@ -81,10 +99,23 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			# Reset the widget and add insturments
 			self.device_select.refresh( self )
 
+			# Add insturments to multi-cell device list
+			_listed = [self.mpp_multi_devices.item(_n).text() for _n in range(self.mpp_multi_devices.count())]
+			for _name in self.get_device_names():
+
+				if _name not in _listed:
+					_item = QListWidgetItem(_name)
+					_item.setFlags(_item.flags() | Qt.ItemIsUserCheckable)
+					_item.setCheckState(Qt.Checked)
+					self.mpp_multi_devices.addItem(_item)
+
 			# Enable measurement buttons
 			self.iv_meas_button.setEnabled(True)
 			self.voc_meas_button.setEnabled(True)
 			self.mpp_meas_button.setEnabled(True)
+			self.mpp_multi_meas_button.setEnabled(True)
+			self.protocol_meas_button.setEnabled(True)
+			self.ocvd_meas_button.setEnabled(True)
 
 		else:
 			
@@ -92,6 +123,30 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.iv_meas_button.setEnabled(False)
 			self.voc_meas_button.setEnabled(False)
 			self.mpp_meas_button.setEnabled(False)
+			self.mpp_multi_meas_button.setEnabled(False)
+			self.protocol_meas_button.setEnabled(False)
+			self.ocvd_meas_button.setEnabled(False)
+
+	# Measurement actions for remote control { name : ( button, running ) }
+	def get_remote_actions(self):
+		return {
+			"iv" 		: ( self.iv_meas_button, getattr(self, "iv_thread_running", False) ),
+			"voc" 		: ( self.voc_meas_button, getattr(self, "voc_thread_running", False) ),
+			"mpp" 		: ( self.mpp_meas_button, getattr(self, "mpp_thread_running", False) ),
+			"mpp-multi" : ( self.mpp_multi_meas_button, getattr(self, "mpp_multi_thread_running", False) ),
+			"protocol" 	: ( self.protocol_meas_button, getattr(self, "protocol_thread_running", False) ),
+			"ocvd" 		: ( self.ocvd_meas_button, getattr(self, "ocvd_thread_running", False) )
+		}
+
+	# Devices held by running measurements (selected device and MPP channels)
+	def get_busy_devices(self):
+
+		_busy = [ self.device_select.currentText() ] if any( _running for _button, _running in self.get_remote_actions().values() ) else []
+
+		if getattr(self, "mpp_multi_thread_running", False):
+			_busy += self.mpp_multi_names
+
+		return _busy
 
 
 	#####################################
@@ -102,6 +157,9 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 	# 		a) gen_sweep_ctrl()
 	#		b) gen_voc_ctrl()
 	# 		c) gen_mpp_crtl()
+	# 		d) gen_mpp_multi_crtl()
+	# 		e) gen_protocol_crtl()
+	# 		f) gen_ocvd_ctrl()
 	#	2) gen_solar_plot()
 	#		
 
@@ -133,19 +191,25 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 		self.gen_iv_ctrl()				# self.iv_ctrl
 		self.gen_voc_ctrl() 			# self.voc_ctrl
 		self.gen_mpp_ctrl()				# self.mpp_ctrl
+		self.gen_mpp_multi_ctrl()		# self.mpp_multi_ctrl
+		self.gen_protocol_ctrl()		# self.protocol_ctrl
+		self.gen_ocvd_ctrl()			# self.ocvd_ctrl
 
 		# Add measurement widgets to QStackedWidget
 		self.meas_pages = QStackedWidget()
 		self.meas_pages.addWidget(self.iv_ctrl)
 		self.meas_pages.addWidget(self.voc_ctrl)
 		self.meas_pages.addWidget(self.mpp_ctrl)
+		self.meas_pages.addWidget(self.mpp_multi_ctrl)
+		self.meas_pages.addWidget(self.protocol_ctrl)
+		self.meas_pages.addWidget(self.ocvd_ctrl)
 		self.meas_pages.setCurrentIndex(0);
 	
 		# Measurement select QComboBox
 		self.meas_select_label = QLabel("Measurement Mode")
 		self.meas_select = QComboBox()
 		self.meas_select.setFixedWidth(200)
-		self.meas_select.addItems(["IV", "Voc", "MPP"])
+		self.meas_select.addItems(["IV", "Voc", "MPP", "MPP (multi)", "Protocol", "OCVD"])
 		self.meas_select.currentTextChanged.connect(self.update_meas_pages)
 
 		# Meta widget for trace description
@@ -259,12 +323,27 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 		}
 		self.iv_npts = QVisaUnitSelector.QVisaUnitSelector(self.iv_npts_config)		
 
+		# Per-point averaging (burst of buffered readings)
+		self.iv_burst_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Readings per Point",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.iv_burst = QVisaUnitSelector.QVisaUnitSelector(self.iv_burst_config)
+
+		# Plot standard deviation of averaged points
+		self.iv_band = QCheckBox("Plot Error Bars (1σ)")
+
 		# Add sweep widgets to layout
 		self.iv_ctrl_layout.addWidget(self.iv_meas_button)
 		self.iv_ctrl_layout.addWidget(self.iv_start)
 		self.iv_ctrl_layout.addWidget(self.iv_stop)
 		self.iv_ctrl_layout.addWidget(self.iv_cmpl)
 		self.iv_ctrl_layout.addWidget(self.iv_npts)
+		self.iv_ctrl_layout.addWidget(self.iv_burst)
+		self.iv_ctrl_layout.addWidget(self.iv_band)
 		self.iv_ctrl_layout.setContentsMargins(0,0,0,0)
 	
 		# Set widget layout
@@ -482,6 +561,367 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 		self.mpp_ctrl.setLayout(self.mpp_ctrl_layout)
 
 
+	# Method to generate multi-cell MPP controls
+	def gen_mpp_multi_ctrl(self):
+
+		#################################
+		# multi-cell mpp tracking controls
+		#
+		self.mpp_multi_ctrl = QWidget()
+		self.mpp_multi_ctrl_layout = QVBoxLayout()
+
+		# Create QStateMachine for output state
+		self.mpp_multi_state = QStateMachine()
+		self.mpp_multi_meas_button = QPushButton()
+		self.mpp_multi_meas_button.setStyleSheet(
+			"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )
+
+		# Create output states
+		self.mpp_multi_meas_off = QState()
+		self.mpp_multi_meas_on  = QState()
+
+		# Attach states to output button and define state transitions
+		self.mpp_multi_meas_off.assignProperty(self.mpp_multi_meas_button, 'text', 'Multi-MPP Monitor Off')
+		self.mpp_multi_meas_off.addTransition(self.mpp_multi_meas_button.clicked, self.mpp_multi_meas_on)
+		self.mpp_multi_meas_off.entered.connect(self.exec_mpp_multi_stop)
+
+		self.mpp_multi_meas_on.assignProperty(self.mpp_multi_meas_button, 'text', 'Multi-MPP Monitor On')
+		self.mpp_multi_meas_on.addTransition(self.mpp_multi_meas_button.clicked, self.mpp_multi_meas_off)
+		self.mpp_multi_meas_on.entered.connect(self.exec_mpp_multi_run)
+
+		# Add states, set initial state, and start machine
+		self.mpp_multi_state.addState(self.mpp_multi_meas_off)
+		self.mpp_multi_state.addState(self.mpp_multi_meas_on)
+		self.mpp_multi_state.setInitialState(self.mpp_multi_meas_off)
+		self.mpp_multi_state.start()
+
+		# Device list. All checked devices are tracked concurrently
+		self.mpp_multi_devices_label = QLabel("Select Devices")
+		self.mpp_multi_devices = QListWidget()
+		self.mpp_multi_devices.setFixedHeight(100)
+
+		# Tracking mode initialization
+		self.mpp_multi_bias_config={
+			"unit" 		: "V",
+			"min"		: "m",
+			"max"		: "",
+			"label"		: "MPP Initialization (V)",
+			"limit"		: 2.0,
+			"signed"	: True,
+			"default"	: [0.30,""]
+		}
+		self.mpp_multi_bias = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_bias_config)
+
+		# Compliance Spinbox
+		self.mpp_multi_cmpl_config={
+			"unit" 		: "A",
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Compliance (A)",
+			"limit"		: 1.0,
+			"signed"	: False,
+			"default"	: [100, "m"]
+		}
+		self.mpp_multi_cmpl = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_cmpl_config)
+
+		# Tracking mode sense amplitude
+		self.mpp_multi_ampl_config={
+			"unit" 		: "V",
+			"min"		: "u",
+			"max"		: "m",
+			"label"		: "Sense amplitude (mV)",
+			"limit"		: 100,
+			"signed"	: False,
+			"default"	: [20.0,"m"]
+		}
+		self.mpp_multi_ampl = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_ampl_config)
+
+		# Gain
+		self.mpp_multi_gain_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: html.unescape("Proportional Gain (&permil;)"),
+			"limit"		: 1000,
+			"signed"	: False,
+			"default"	: [30.0]
+		}
+		self.mpp_multi_gain = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_gain_config)
+
+		# Delay
+		self.mpp_multi_delay_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: "Measurement Interval (s)",
+			"limit"		: 60.0,
+			"signed"	: False,
+			"default"	: [0.1]
+		}
+		self.mpp_multi_delay = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_delay_config)
+
+		# Plot frame rate. Canvas is redrawn at this rate
+		# independent of the number of tracked devices
+		self.mpp_multi_rate_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: "Plot Frame Rate (Hz)",
+			"limit"		: 30.0,
+			"signed"	: False,
+			"default"	: [5.0]
+		}
+		self.mpp_multi_rate = QVisaUnitSelector.QVisaUnitSelector(self.mpp_multi_rate_config)
+
+		# Add mpp widgets to layout
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_meas_button)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_devices_label)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_devices)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_bias)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_cmpl)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_ampl)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_gain)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_delay)
+		self.mpp_multi_ctrl_layout.addWidget(self.mpp_multi_rate)
+		self.mpp_multi_ctrl_layout.setContentsMargins(0,0,0,0)
+
+		# Set widget layout
+		self.mpp_multi_ctrl.setLayout(self.mpp_multi_ctrl_layout)
+
+
+	# Method to generate stability protocol controls. The protocol interleaves 
+	# the IV, Voc and MPP measurements using the parameters on their pages.
+	def gen_protocol_ctrl(self):
+
+		#################################
+		# stability protocol controls
+		#
+		self.protocol_ctrl = QWidget()
+		self.protocol_ctrl_layout = QVBoxLayout()
+
+		# Create QStateMachine for output state
+		self.protocol_state = QStateMachine()
+		self.protocol_meas_button = QPushButton()
+		self.protocol_meas_button.setStyleSheet(
+			"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )
+
+		# Create output states
+		self.protocol_meas_off = QState()
+		self.protocol_meas_on  = QState()
+
+		# Attach states to output button and define state transitions
+		self.protocol_meas_off.assignProperty(self.protocol_meas_button, 'text', 'Protocol Off')
+		self.protocol_meas_off.addTransition(self.protocol_meas_button.clicked, self.protocol_meas_on)
+		self.protocol_meas_off.entered.connect(self.exec_protocol_stop)
+
+		self.protocol_meas_on.assignProperty(self.protocol_meas_button, 'text', 'Protocol On')
+		self.protocol_meas_on.addTransition(self.protocol_meas_button.clicked, self.protocol_meas_off)
+		self.protocol_meas_on.entered.connect(self.exec_protocol_run)
+
+		# Add states, set initial state, and start machine
+		self.protocol_state.addState(self.protocol_meas_off)
+		self.protocol_state.addState(self.protocol_meas_on)
+		self.protocol_state.setInitialState(self.protocol_meas_off)
+		self.protocol_state.start()
+
+		# IV-sweep period
+		self.protocol_iv_period_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: "IV-sweep Period (min)",
+			"limit"		: 1440.0,
+			"signed"	: False,
+			"default"	: [30.0]
+		}
+		self.protocol_iv_period = QVisaUnitSelector.QVisaUnitSelector(self.protocol_iv_period_config)
+
+		# Voc check period
+		self.protocol_voc_period_config={
+			"unit" 		: "__DOUBLE__",
+			"label"		: "Voc Check Period (min)",
+			"limit"		: 1440.0,
+			"signed"	: False,
+			"default"	: [10.0]
+		}
+		self.protocol_voc_period = QVisaUnitSelector.QVisaUnitSelector(self.protocol_voc_period_config)
+
+		# Number of points to retain on plot
+		self.protocol_window_config={
+			"unit" 		: "__INT__",
+			"label"		: "Plot Window (points)",
+			"limit"		: 100000.0,
+			"signed"	: False,
+			"default"	: [2000]
+		}
+		self.protocol_window = QVisaUnitSelector.QVisaUnitSelector(self.protocol_window_config)
+
+		# Output file. Protocol data is streamed to disk
+		self.protocol_file = None
+		self.protocol_file_button = QPushButton("Select Output File")
+		self.protocol_file_button.clicked.connect(self.update_protocol_file)
+		self.protocol_file_label = QLabel("<i>No output file selected</i>")
+		self.protocol_file_label.setWordWrap(True)
+
+		# Note on parameters
+		self.protocol_note = QLabel("<i>Sweep, Voc and MPP parameters are taken from the IV, Voc and MPP pages</i>")
+		self.protocol_note.setWordWrap(True)
+
+		# Add protocol widgets to layout
+		self.protocol_ctrl_layout.addWidget(self.protocol_meas_button)
+		self.protocol_ctrl_layout.addWidget(self.protocol_iv_period)
+		self.protocol_ctrl_layout.addWidget(self.protocol_voc_period)
+		self.protocol_ctrl_layout.addWidget(self.protocol_window)
+		self.protocol_ctrl_layout.addWidget(self.protocol_file_button)
+		self.protocol_ctrl_layout.addWidget(self.protocol_file_label)
+		self.protocol_ctrl_layout.addWidget(self.protocol_note)
+		self.protocol_ctrl_layout.setContentsMargins(0,0,0,0)
+
+		# Set widget layout
+		self.protocol_ctrl.setLayout(self.protocol_ctrl_layout)
+
+
+	# Method to generate open-circuit voltage decay controls. The cell is held 
+	# at open circuit under illumination and the decay is captured into the 
+	# instrument trace buffer when the light is switched off.
+	def gen_ocvd_ctrl(self):
+
+		# OCVD control layout
+		self.ocvd_ctrl = QWidget()
+		self.ocvd_ctrl_layout = QVBoxLayout()
+
+		# OCVD measurement Button. This will be a state machine which 
+		# alternates between 'measure' and 'abort' states
+		self.ocvd_meas_state  = QStateMachine()
+		self.ocvd_meas_button = QPushButton()
+		self.ocvd_meas_button.setStyleSheet(
+			"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )
+
+		# Create measurement states
+		self.ocvd_meas_run  = QState()
+		self.ocvd_meas_stop = QState()
+
+		# Assign state properties and transitions
+		self.ocvd_meas_run.assignProperty(self.ocvd_meas_button, 'text', 'Abort OCVD')
+		self.ocvd_meas_run.addTransition(self.ocvd_meas_button.clicked, self.ocvd_meas_stop)
+		self.ocvd_meas_run.entered.connect(self.exec_ocvd_run)
+
+		self.ocvd_meas_stop.assignProperty(self.ocvd_meas_button, 'text', 'Measure OCVD')
+		self.ocvd_meas_stop.addTransition(self.ocvd_meas_button.clicked, self.ocvd_meas_run)
+		self.ocvd_meas_stop.entered.connect(self.exec_ocvd_stop)
+
+		# Add states, set initial state, and state machine
+		self.ocvd_meas_state.addState(self.ocvd_meas_run)
+		self.ocvd_meas_state.addState(self.ocvd_meas_stop)
+		self.ocvd_meas_state.setInitialState(self.ocvd_meas_stop)
+		self.ocvd_meas_state.start()
+
+		# Light trigger. Software switches the light through the digital 
+		# output lines, External waits on the trigger link input
+		self.ocvd_trigger_label = QLabel("Light Trigger")
+		self.ocvd_trigger = QComboBox()
+		self.ocvd_trigger.setFixedWidth(200)
+		self.ocvd_trigger.addItems(["Software", "External"])
+
+		# Trigger link input line
+		self.ocvd_line_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Trigger Link Line",
+			"limit"		: 4.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.ocvd_line = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_line_config)
+
+		# Readings in decay capture
+		self.ocvd_count_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Readings",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [1000.0]
+		}
+		self.ocvd_count = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_count_config)
+
+		# Integer selectors apply the limit after the default (spinbox maximum is 99 when the default is set)
+		self.ocvd_count.unit_value.setValue(1000)
+
+		# Capture integration time
+		self.ocvd_nplc_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Capture NPLC",
+			"limit"		: 10.0, 
+			"signed"	: False,
+			"default"	: [0.01]
+		}
+		self.ocvd_nplc = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_nplc_config)
+
+		# Illuminated soak before switching off the light
+		self.ocvd_soak_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Light Soak (s)",
+			"limit"		: 600.0, 
+			"signed"	: False,
+			"default"	: [5.0]
+		}
+		self.ocvd_soak = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_soak_config)
+
+		# Voltage compliance at open circuit
+		self.ocvd_cmpl_config={
+			"unit" 		: "V", 
+			"min"		: "m",
+			"max"		: "",
+			"label"		: "Compliance (V)",
+			"limit"		: 20.0, 
+			"signed"	: False,
+			"default"	: [2.0, ""]
+		} 
+		self.ocvd_cmpl = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_cmpl_config)
+
+		# Diode ideality factor
+		self.ocvd_ideality_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Ideality Factor",
+			"limit"		: 10.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.ocvd_ideality = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_ideality_config)
+
+		# Cell temperature
+		self.ocvd_temp_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Temperature (K)",
+			"limit"		: 500.0, 
+			"signed"	: False,
+			"default"	: [300.0]
+		}
+		self.ocvd_temp = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_temp_config)
+
+		# Readings in sliding slope window
+		self.ocvd_window_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Slope Window",
+			"limit"		: 99.0, 
+			"signed"	: False,
+			"default"	: [9.0]
+		}
+		self.ocvd_window = QVisaUnitSelector.QVisaUnitSelector(self.ocvd_window_config)
+
+		# Lifetime result
+		self.ocvd_result = QLabel("<i>No decay captured</i>")
+		self.ocvd_result.setWordWrap(True)
+
+		# Add OCVD widgets to layout
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_meas_button)
+		self.ocvd_ctrl_layout.addWidget(self._gen_hbox_widget([self.ocvd_trigger, self.ocvd_trigger_label]))
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_line)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_count)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_nplc)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_soak)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_cmpl)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_ideality)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_temp)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_window)
+		self.ocvd_ctrl_layout.addWidget(self.ocvd_result)
+		self.ocvd_ctrl_layout.setContentsMargins(0,0,0,0)
+
+		# Set widget layout
+		self.ocvd_ctrl.setLayout(self.ocvd_ctrl_layout)
+
+
 	# Method to generate solar cell plots. This will be implemented 
 	# as three QVisaDynamicPlots packed into a QStackedWidget
 	def gen_solar_plot(self):
@@ -511,20 +951,48 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 		self.mpp_plot.set_axes_adjust(_left=0.15, _right=0.85, _top=0.9, _bottom=0.1)
 		self.mpp_plot.refresh_canvas(supress_warning=True)		
 
+		self.mpp_multi_plot =  QVisaDynamicPlot.QVisaDynamicPlot(self)
+		self.mpp_multi_plot.add_subplot(111, twinx=True)
+		self.mpp_multi_plot.set_axes_labels("111", "Time (s)", "Vmpp (V)")
+		self.mpp_multi_plot.set_axes_labels("111t", "Time (s)", "Pmpp (mW)")
+		self.mpp_multi_plot.set_axes_adjust(_left=0.15, _right=0.85, _top=0.9, _bottom=0.1)
+		self.mpp_multi_plot.refresh_canvas(supress_warning=True)		
+
+		self.protocol_plot =  QVisaDynamicPlot.QVisaDynamicPlot(self)
+		self.protocol_plot.add_subplot(111, twinx=True)
+		self.protocol_plot.set_axes_labels("111", "Time (s)", "Vmpp (V)")
+		self.protocol_plot.set_axes_labels("111t", "Time (s)", "Pmpp (mW)")
+		self.protocol_plot.set_axes_adjust(_left=0.15, _right=0.85, _top=0.9, _bottom=0.1)
+		self.protocol_plot.refresh_canvas(supress_warning=True)		
+
+		self.ocvd_plot =  QVisaDynamicPlot.QVisaDynamicPlot(self)
+		self.ocvd_plot.add_subplot(111, twinx=True)
+		self.ocvd_plot.set_axes_labels("111", "Time (s)", "Voc (V)")
+		self.ocvd_plot.set_axes_labels("111t", "Time (s)", "Lifetime (s)")
+		self.ocvd_plot.set_axes_adjust(_left=0.15, _right=0.85, _top=0.9, _bottom=0.1)
+		self.ocvd_plot.refresh_canvas(supress_warning=True)
+
 		# Sync plot clear data buttons with application data
 		self.iv_plot.sync_application_data(True)
 		self.voc_plot.sync_application_data(True)
 		self.mpp_plot.sync_application_data(True)
+		self.mpp_multi_plot.sync_application_data(True)
+		self.ocvd_plot.sync_application_data(True)
 
 		# Sync meta widget when clearing data from plots
 		self.iv_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
 		self.voc_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
 		self.mpp_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
+		self.mpp_multi_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
+		self.ocvd_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
 
 		# Add QVisaDynamicPlots to QStackedWidget
 		self.plot_stack.addWidget(self.iv_plot)
 		self.plot_stack.addWidget(self.voc_plot)
 		self.plot_stack.addWidget(self.mpp_plot)
+		self.plot_stack.addWidget(self.mpp_multi_plot)
+		self.plot_stack.addWidget(self.protocol_plot)
+		self.plot_stack.addWidget(self.ocvd_plot)
 
 		# Return the stacked widget
 		self.plot_stack.setCurrentIndex(0);
@@ -562,6 +1030,18 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.meas_pages.setCurrentIndex(2)
 			self.plot_stack.setCurrentIndex(2)
 
+		if self.meas_select.currentText() == "MPP (multi)":
+			self.meas_pages.setCurrentIndex(3)
+			self.plot_stack.setCurrentIndex(3)
+
+		if self.meas_select.currentText() == "Protocol":
+			self.meas_pages.setCurrentIndex(4)
+			self.plot_stack.setCurrentIndex(4)
+
+		if self.meas_select.currentText() == "OCVD":
+			self.meas_pages.setCurrentIndex(5)
+			self.plot_stack.setCurrentIndex(5)
+
 	# Callback method to delete data when traces are cleared
 	def sync_mpl_clear(self):
 		
@@ -577,71 +1057,50 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 	#  IV-SWEEP MEASUREMENT MODE
 	#	
 
-	# Sweep measurement EXECUTION
-	def exec_iv_thread(self):
-		
-		# Set sweep parameters as simple linspace
-		_params = np.linspace( 
-			float( self.iv_start.value() ), 
-			float( self.iv_stop.value() ), 
-			int( self.iv_npts.value() ) 
-		)
-
-
-		# Get QVisaDataObject
-		data = self._get_data_object()
-		key  = data.add_hash_key("pv-bias")
-
-		# Add data fields to key
-		data.set_subkeys(key, ["t", "V", "I", "P"])
-		data.set_metadata(key, "__type__", "pv-bias")
+	# Engine callback: add data key to meta widget and twin axes handles
+	def gen_solar_handles(self, _plot, key):
 
 		# Add key to meta widget
 		self.meta_widget.add_meta_key(key)
 
 		# Generate colors
-		_c0 = self.iv_plot.gen_next_color()
-		_c1 = self.iv_plot.gen_next_color()
+		_c0 = _plot.gen_next_color()
+		_c1 = _plot.gen_next_color()
 
-		# Clear plot and zero arrays
-		self.iv_plot.add_axes_handle('111' , key, _color=_c0)
-		self.iv_plot.add_axes_handle('111t', key, _color=_c1)
-		
-		# Thread start time
-		start  = float(time.time())
-		
-		# Output on
-		self.keithley().voltage_src()
-		self.keithley().current_cmp(self.iv_cmpl.value())
-		self.keithley().output_on()
-
-		# Loop through sweep parameters
-		for _bias in _params: 
+		# Add handles to plot
+		_plot.add_axes_handle('111' , key, _color=_c0)
+		_plot.add_axes_handle('111t', key, _color=_c1)
 
-			# If thread is running
-			if self.iv_thread_running:
+	# Engine callback: append sweep point to plot
+	def update_iv_plot(self, key, _row):
 
-				# Set bias
-				self.keithley().set_voltage(_bias)
+		self.iv_plot.append_handle_data( "111" , key, _row["V"], _row["I"])
+		self.iv_plot.append_handle_data( "111t", key, _row["V"], _row["P"])
+		self.iv_plot.update_canvas()	
 
-				# Get data from buffer
-				_buffer = self.keithley().meas().split(",")
+	# Sweep measurement EXECUTION
+	def exec_iv_thread(self):
 
-				# Extract data from buffer
-				_now = float(time.time() - start)
+		_data = self._get_data_object()
+		key = QKeithleyEngine( _data ).iv(
+			self.keithley(), 
+			QKeithleyEngine.sweep_plan( self.iv_start.value(), self.iv_stop.value(), self.iv_npts.value() ), 
+			self.iv_cmpl.value(), 
+			lambda: self.iv_thread_running, 
+			lambda key: self.gen_solar_handles(self.iv_plot, key), 
+			self.update_iv_plot, 
+			int( self.iv_burst.value() )
+		)
 
-				# Append measured values to data arrays
-				data.append_subkey_data(key, "t", _now )
-				data.append_subkey_data(key, "V", float(_buffer[0]) )
-				data.append_subkey_data(key, "I", -1.0 * float(_buffer[1]) )
-				data.append_subkey_data(key, "P", -1.0 * float(_buffer[1]) * float(_buffer[0]) )
+		# Error band for averaged points
+		if self.iv_band.isChecked() and "Istd" in _data.data[key].keys():
 
-				self.iv_plot.append_handle_data( "111" , key, float(_buffer[0]), -1.0 * float(_buffer[1]))
-				self.iv_plot.append_handle_data( "111t", key, float(_buffer[0]), -1.0 * float(_buffer[0]) * float(_buffer[1]))
-				self.iv_plot.update_canvas()	
+			QKeithleyErrorBand.set_band(self.iv_plot, "111", key, 
+				_data.get_subkey_data(key, "V"), 
+				_data.get_subkey_data(key, "I"), 
+				_data.get_subkey_data(key, "Istd"))
 
-		self.keithley().set_voltage(0.0)
-		self.keithley().output_off()	
+			self.iv_plot.update_canvas()
 
 		# Reset sweep control and update measurement state to stop. 
 		# Post a button click event to the QStateMachine to trigger 
@@ -665,12 +1124,15 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.iv_plot.mpl_refresh_setEnabled(False)
 			self.voc_plot.mpl_refresh_setEnabled(False)	
 			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
 				
 			# Run the measurement thread function
 			self.iv_thread = threading.Thread(target=self.exec_iv_thread, args=())
 			self.iv_thread.daemon = True				# Daemonize thread
+			self.iv_thread_running = True				# Set execution flag
 			self.iv_thread.start()         				# Start the execution
-			self.iv_thread_running = True
 
 	# Sweep measurement OFF
 	def exec_iv_stop(self):
@@ -688,6 +1150,9 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.iv_plot.mpl_refresh_setEnabled(True)
 			self.voc_plot.mpl_refresh_setEnabled(True)	
 			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
 
 			# Set thread running to False. This will break the sweep measurements
 			# execution loop on next iteration.  
@@ -698,98 +1163,27 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 	#####################################
 	#  VOC-MONITOR MEASUREMENT MODE
 	#	
-	def exec_voc_thread(self):
-		
-		# Get QVisaDataObject
-		data = self._get_data_object()
-		key  = data.add_hash_key("pv-voc")
-
-		# Add data fields to key
-		data.set_subkeys(key, ["t", "Voc", "Ioc"])
-		data.set_metadata(key, "__type__", "pv-voc")
-
-		# Add key to meta widget
-		self.meta_widget.add_meta_key(key)
-
-		# Generate colors
-		_c0 = self.voc_plot.gen_next_color()
-		_c1 = self.voc_plot.gen_next_color()
-
-		# Clear plot and zero arrays
-		self.voc_plot.add_axes_handle('111' , key, _color=_c0)
-		self.voc_plot.add_axes_handle('111t', key, _color=_c1)
-
-		# Thread start time
-		start  = float(time.time())
-
-		# Set bias to initial value in voltas and turn output ON
-		self.keithley().set_voltage( self.voc_bias.value() )
-		self.keithley().current_cmp( self.voc_cmpl.value() )
-		self.keithley().output_on()
-
-		# Thread loop
-		while self.voc_thread_running is True:
-
-			# Iteration timer
-			_iter_start = float(time.time())
-
-			# Covvergence loop
-			while True:
-				
-				# Get data from buffer
-				_buffer = self.keithley().meas().split(",")
-				
-				# Check if current is below convergence value
-				# note that convergence is specified in mA 
-				if (abs(float( _buffer[1]))) <= float(self.voc_conv.value()):					
-					break
-				
-				# If convergence takes too long paint a value (10s)
-				elif  float( time.time() - _iter_start ) >= 3.0:
-					break
+	# Engine callback: append Voc point to plot
+	def update_voc_plot(self, key, _row):
 
-				# Otherwise, adjust the voltage proportionally
-				else:
+		self.voc_plot.append_handle_data("111" , key, _row["t"], _row["Voc"])
+		self.voc_plot.append_handle_data("111t", key, _row["t"], _row["Ioc"])
+		self.voc_plot.update_canvas()	
 
-					# Create 1mV sense amplitude
-					_v, _i = np.add(float(_buffer[0]), np.linspace(-0.0005, 0.0005, 3)), []
-					
-					# Measure current over sense amplitude array
-					for _ in _v:
-						self.keithley().set_voltage(_)
-						_b = self.keithley().meas().split(",")
-						_i.append( -1.0 * float( _b[1] ) )
-
-					# Reset the voltage
-					self.keithley().set_voltage( float(_buffer[0] ) )
-
-					# Adjust bias in direction of lower current
-					# If current is positive (photo-current) increase voltage
-					if np.mean(_i) >= 0.0:
-						self.update_bias( float(_buffer[0]) * float( 1.0 + self.voc_gain.value()/1000. ) ) 
-
-					else:
-						self.update_bias( float(_buffer[0]) * float( 1.0 - self.voc_gain.value()/1000. ) )	
-
-			# Extract data from buffer
-			_now = float(time.time() - start)
-
-			data.append_subkey_data(key, "t"  , _now)
-			data.append_subkey_data(key, "Voc",  1.0 * float(_buffer[0]) )
-			data.append_subkey_data(key, "Ioc", -1.0 * float(_buffer[1]) ) # Sanity check
-
-			# Append handle data and update canvas
-			self.voc_plot.append_handle_data("111" , key, _now,  1.0 * float(_buffer[0]) )
-			self.voc_plot.append_handle_data("111t", key, _now, -1.0 * float(_buffer[1]) )
-			self.voc_plot.update_canvas()	
-
-			# Measurement delay	
-			if self.voc_delay.value() != 0: 
-				time.sleep(self.voc_delay.value())
+	def exec_voc_thread(self):
 
-		# Cleanup after thread termination
-		self.keithley().set_voltage(0.0)
-		self.keithley().output_off()	
+		# Gain, convergence and delay are read on each iteration
+		QKeithleyEngine( self._get_data_object() ).voc(
+			self.keithley(), 
+			self.voc_bias.value(), 
+			self.voc_cmpl.value(), 
+			self.voc_conv.value, 
+			self.voc_gain.value, 
+			self.voc_delay.value, 
+			lambda: self.voc_thread_running, 
+			lambda key: self.gen_solar_handles(self.voc_plot, key), 
+			self.update_voc_plot
+		)
 		
 	# Tracking measurement ON
 	def exec_voc_run(self):
@@ -809,12 +1203,15 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.iv_plot.mpl_refresh_setEnabled(False)
 			self.voc_plot.mpl_refresh_setEnabled(False)	
 			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
 
 			# Run the measurement thread function
 			self.voc_thread = threading.Thread(target=self.exec_voc_thread, args=())
 			self.voc_thread.daemon = True		# Daemonize thread
-			self.voc_thread.start()				# Start the execution
 			self.voc_thread_running = True		# Set execution flag	
+			self.voc_thread.start()				# Start the execution
 			
 
 	# Tracking measurement OFF
@@ -835,6 +1232,9 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 			self.iv_plot.mpl_refresh_setEnabled(True)
 			self.voc_plot.mpl_refresh_setEnabled(True)	
 			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
 	
 			# Set thread running to False. This will break the sweep measurements
 			# execution loop on next iteration.  
@@ -846,146 +1246,678 @@ class QKeithleySolar(QVisaApplication.QVisaApplication):
 	#  MPP-MONITOR MEASUREMENT MODE
 	#	
 
+	# Engine callback: append MPP point to plot
+	def update_mpp_plot(self, key, _row):
+
+		self.mpp_plot.append_handle_data("111" , key, _row["t"], _row["Vmpp"])
+		self.mpp_plot.append_handle_data("111t", key, _row["t"], _row["Pmpp"] * 1000.)
+		self.mpp_plot.update_canvas()	
+
 	def exec_mpp_thread(self):
+
+		# Amplitude, gain and delay are read on each iteration
+		QKeithleyEngine( self._get_data_object() ).mpp(
+			self.keithley(), 
+			self.mpp_bias.value(), 
+			self.mpp_cmpl.value(), 
+			self.mpp_ampl.value, 
+			self.mpp_gain.value, 
+			self.mpp_delay.value, 
+			lambda: self.mpp_thread_running, 
+			lambda key: self.gen_solar_handles(self.mpp_plot, key), 
+			self.update_mpp_plot
+		)
+
+	# Tracking measurement ON
+	def exec_mpp_run(self):
 		
+		if self.keithley() is not None:
+
+			# Update UI for ON state
+			self.mpp_meas_button.setStyleSheet(
+				"background-color: #cce6ff; border-style: solid; border-width: 1px; border-color: #1a75ff; padding: 7px;")
+			
+			# Disable widgets
+			self.save_widget.setEnabled(False)
+			self.meas_select.setEnabled(False)
+			self.device_select.setEnabled(False)
+			self.mpp_bias.setEnabled(False)
+			self.mpp_cmpl.setEnabled(False)
+			self.iv_plot.mpl_refresh_setEnabled(False)
+			self.voc_plot.mpl_refresh_setEnabled(False)	
+			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
+			
+			# Run the measurement thread function
+			self.mpp_thread = threading.Thread(target=self.exec_mpp_thread, args=())
+			self.mpp_thread.daemon = True		# Daemonize thread
+			self.mpp_thread_running = True		# Set execution flag				
+			self.mpp_thread.start()				# Start the execution
+
+	# Tracking measurement OFF
+	def exec_mpp_stop(self):
+				
+		if self.keithley() is not None:
+
+			# Put measurement button in measure state
+			self.mpp_meas_button.setStyleSheet(
+				"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )	
+			
+			# Enable widgets 
+			self.save_widget.setEnabled(True)
+			self.meas_select.setEnabled(True)
+			self.device_select.setEnabled(True)
+			self.mpp_bias.setEnabled(True)
+			self.mpp_cmpl.setEnabled(True)
+			self.iv_plot.mpl_refresh_setEnabled(True)
+			self.voc_plot.mpl_refresh_setEnabled(True)	
+			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
+
+			# Set thread running to False. This will break the sweep measurements
+			# execution loop on next iteration.  
+			self.mpp_thread_running = False	
+			self.mpp_thread.join()  # Waits for thread to complete
+
+
+	#####################################
+	#  MULTI-CELL MPP-MONITOR MEASUREMENT MODE
+	#	
+
+	def exec_mpp_multi_thread(self):
+
 		# Get QVisaDataObject
 		data = self._get_data_object()
-		key  = data.add_hash_key("pv-mpp")
 
-		# Add data fields to key
-		data.set_subkeys(key, ["t", "Vmpp", "Impp", "Pmpp"])
-		data.set_metadata(key, "__type__", "pv-mpp")
+		# Generate one data key per cell. The color generator is 
+		# advanced per cell so Vmpp and Pmpp traces can be matched.
+		_keys = []
+		for _name in self.mpp_multi_names:
 
-		# Add key to meta widget
-		self.meta_widget.add_meta_key(key)
+			key = data.add_hash_key("pv-mpp-%s"%_name)
 
-		# Generate colors
-		_c0 = self.mpp_plot.gen_next_color()
-		_c1 = self.mpp_plot.gen_next_color()
+			# Add data fields to key
+			data.set_subkeys(key, ["t", "Vmpp", "Impp", "Pmpp"])
+			data.set_metadata(key, "__type__", "pv-mpp")
+			data.set_metadata(key, "__device__", _name.replace(" ", "-"))
 
-		# Clear plot and zero arrays
-		self.mpp_plot.add_axes_handle('111' , key, _color=_c0)
-		self.mpp_plot.add_axes_handle('111t', key, _color=_c1)
-		
-		# Thread start time
-		start  = float(time.time())
+			# Add key to meta widget
+			self.meta_widget.add_meta_key(key)
 
-		# Set bias to initial value in voltas and turn output ON
-		self.keithley().set_voltage( self.mpp_bias.value() )
-		self.keithley().current_cmp( self.mpp_cmpl.value() )
-		self.keithley().output_on()
+			# Add plot handles for cell
+			_c = self.mpp_multi_plot.gen_next_color()
+			self.mpp_multi_plot.add_axes_handle('111' , key, _color=_c)
+			self.mpp_multi_plot.add_axes_handle('111t', key, _color=_c)
+			_keys.append(key)
 
-		# Thread loop
-		while self.mpp_thread_running is True:
+		# Scheduler with one worker per cell. Shares a single time base
+		_devices = [ self.get_device_by_name(_name) for _name in self.mpp_multi_names ]
+		_sched = QKeithleyScheduler( len(_devices), self.mpp_multi_rate.value() )
 
-			# Iteration timer
-			_iter_start = float(time.time())
+		# Outputs are turned off and the scheduler shut down even if a 
+		# measurement fails
+		try:
 
-			# Covvergence loop
-			_d = [] 
-			while True:
-				
-				# Get data from buffer
-				_buffer = self.keithley().meas().split(",")
+			# Set bias to initial value in volts and turn outputs ON
+			for _device in _devices:
+				_device.set_voltage( self.mpp_multi_bias.value() )
+				_device.current_cmp( self.mpp_multi_cmpl.value() )
+				_device.output_on()
+
+			# Tracking bias for each cell
+			_bias = np.full( len(_devices), float( self.mpp_multi_bias.value() ) )
+
+			# Thread start time
+			_sched.start()
+
+			# Thread loop
+			while self.mpp_multi_thread_running is True:
+
+				# Sense amplitude array (centered on tracking bias)
+				_amplitude = self.mpp_multi_ampl.value()
+				_offset = np.linspace(-1.0 * _amplitude, _amplitude, 5)
+				_v = np.add.outer(_bias, _offset)
+				_i = np.zeros( _v.shape )
+
+				# Measure current over sense amplitude array. All cells are 
+				# perturbed in lockstep so each tick costs one integration time
+				for _n in range( len(_offset) ):
+
+					_buffers = _sched.measure(_devices, _v[:, _n])
+					_i[:, _n] = [ -1.0 * float( _b[1] ) for _b in _buffers ]
+
+					# Cache readings at the tracking bias
+					if _n == len(_offset) // 2:
+						_center = [ ( float(_b[0]), float(_b[1]) ) for _b in _buffers ]
+
+				# Calculate derivative (vectorized over cells)
+				_d = np.gradient( np.multiply(_i, _v), axis=1 )
+				_d = np.divide(_d, _amplitude)
+
+				# Differential gain controller
+				_gain = float( self.mpp_multi_gain.value() / 1000. )
+				_bias = np.where( np.mean(_d, axis=1) <= 0.0, _bias * (1.0 - _gain), _bias * (1.0 + _gain) )
+
+				# Shared timestamp for all cells
+				_now = _sched.now()
+
+				for key, ( _vmpp, _impp ) in zip(_keys, _center):
+
+					data.append_subkey_data(key, "t"	, _now)
+					data.append_subkey_data(key, "Vmpp",  1.0 * _vmpp )
+					data.append_subkey_data(key, "Impp", -1.0 * _impp ) 
+					data.append_subkey_data(key, "Pmpp", -1.0 * _impp * _vmpp )
+
+					# Append handle data
+					self.mpp_multi_plot.append_handle_data("111" , key, _now, _vmpp)
+					self.mpp_multi_plot.append_handle_data("111t", key, _now, _vmpp * -1.0 * _impp * 1000.)
+
+				# Update canvas at fixed frame rate
+				if _sched.draw_due():
+					self.mpp_multi_plot.update_canvas()	
+
+				# Measurement delay	
+				if self.mpp_multi_delay.value() != 0: 
+					time.sleep(self.mpp_multi_delay.value())
+
+			# Record aggregate sample rate (samples/s) over all cells
+			_rate = float( _sched.ticks() * len(_devices) ) / max( _sched.now(), 1e-9 )
+			for key in _keys:
+				data.set_metadata(key, "__rate__", _rate)
+
+		# Cleanup after thread termination. Post a button click to reset the 
+		# UI if the thread ended on an error
+		finally:
+
+			for _device in _devices:
+				_device.set_voltage(0.0)
+				_device.output_off()
+
+			_sched.shutdown()
+			self.mpp_multi_plot.update_canvas()
+
+			if self.mpp_multi_thread_running:
+				self.mpp_multi_meas_button.click()
+
+	# Get list of checked devices in multi-cell device list
+	def get_mpp_multi_names(self):
+
+		_names = []
+		for _n in range( self.mpp_multi_devices.count() ):
+
+			_item = self.mpp_multi_devices.item(_n)
+			if _item.checkState() == Qt.Checked and self.get_device_by_name( _item.text() ) is not None:
+				_names.append( _item.text() )
+
+		return _names
+
+	# Tracking measurement ON
+	def exec_mpp_multi_run(self):
+
+		# Cache device names for measurement thread
+		self.mpp_multi_names = self.get_mpp_multi_names()
+		
+		if self.mpp_multi_names != []:
+
+			# Update UI for ON state
+			self.mpp_multi_meas_button.setStyleSheet(
+				"background-color: #cce6ff; border-style: solid; border-width: 1px; border-color: #1a75ff; padding: 7px;")
+			
+			# Disable widgets
+			self.save_widget.setEnabled(False)
+			self.meas_select.setEnabled(False)
+			self.device_select.setEnabled(False)
+			self.mpp_multi_devices.setEnabled(False)
+			self.mpp_multi_bias.setEnabled(False)
+			self.mpp_multi_cmpl.setEnabled(False)
+			self.iv_plot.mpl_refresh_setEnabled(False)
+			self.voc_plot.mpl_refresh_setEnabled(False)	
+			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
+			
+			# Run the measurement thread function
+			self.mpp_multi_thread = threading.Thread(target=self.exec_mpp_multi_thread, args=())
+			self.mpp_multi_thread.daemon = True		# Daemonize thread
+			self.mpp_multi_thread_running = True	# Set execution flag				
+			self.mpp_multi_thread.start()			# Start the execution
+
+	# Tracking measurement OFF
+	def exec_mpp_multi_stop(self):
 				
-				# If convergence takes too long paint a value (10s)
-				if  float( time.time() - _iter_start ) >= 3.0:
-					break
+		if hasattr(self, "mpp_multi_thread"):
+
+			# Put measurement button in measure state
+			self.mpp_multi_meas_button.setStyleSheet(
+				"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )	
+			
+			# Enable widgets 
+			self.save_widget.setEnabled(True)
+			self.meas_select.setEnabled(True)
+			self.device_select.setEnabled(True)
+			self.mpp_multi_devices.setEnabled(True)
+			self.mpp_multi_bias.setEnabled(True)
+			self.mpp_multi_cmpl.setEnabled(True)
+			self.iv_plot.mpl_refresh_setEnabled(True)
+			self.voc_plot.mpl_refresh_setEnabled(True)	
+			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
+
+			# Set thread running to False. This will break the tracking 
+			# execution loop on next iteration.  
+			self.mpp_multi_thread_running = False	
+			self.mpp_multi_thread.join()  # Waits for thread to complete
+			del self.mpp_multi_thread
 
-				# Otherwise, adjust the voltage proportionally
-				else:
 
-					# Create 1mV sense amplitude
-					_amplitude = self.mpp_ampl.value()
-					_v, _i = np.add(float(_buffer[0]), np.linspace(-1.0 * _amplitude, _amplitude, 5)), []
+	#####################################
+	#  STABILITY PROTOCOL MEASUREMENT MODE
+	#	
 
-					# Measure current over sense amplitude array
-					for _ in _v:
-						self.keithley().set_voltage(_)
-						_b = self.keithley().meas().split(",")
-						_i.append( -1.0 * float( _b[1] ) )
+	# Select protocol output file
+	def update_protocol_file(self):
 
-					# Reset the voltage
-					self.keithley().set_voltage( float(_buffer[0] ) )
+		_filename, _ = QFileDialog.getSaveFileName(self, "Protocol Output File", "", "Data files (*.dat);;All files (*)")
 
-					# Calculate derivative
-					_p = np.multiply(_i, _v)
-					_d = np.gradient(np.multiply(_i, _v))
-					_d = np.divide(_d, _amplitude)
+		if _filename != "":
+			self.protocol_file = _filename
+			self.protocol_file_label.setText("<i>%s</i>"%html.escape(_filename))
 
-					# Differntial gain controller
-					if np.mean(_d) <= 0.0:
-						self.update_bias( float(_buffer[0]) * float( 1.0 - self.mpp_gain.value()/1000. ) )  
+	# Protocol IV-sweep. Streams sweep to disk and returns (Vmpp, Voc) estimates
+	def exec_protocol_iv(self, stream, start):
 
-					else:
-						self.update_bias( float(_buffer[0]) * float( 1.0 + self.mpp_gain.value()/1000. ) )
+		# Sweep parameters from IV page
+		_params = np.linspace( 
+			float( self.iv_start.value() ), 
+			float( self.iv_stop.value() ), 
+			int( self.iv_npts.value() ) 
+		)
+
+		# Sweep compliance
+		self.keithley().current_cmp(self.iv_cmpl.value())
+		stream.open_block("pv-bias", ["t", "V", "I", "P"])
+
+		_v, _i = [], []
+		for _bias in _params: 
+
+			if self.protocol_thread_running is False:
+				break
+
+			# Set bias and measure
+			self.keithley().set_voltage(_bias)
+			_buffer = self.keithley().meas().split(",")
 
 			# Extract data from buffer
 			_now = float(time.time() - start)
+			_v.append(  1.0 * float(_buffer[0]) )
+			_i.append( -1.0 * float(_buffer[1]) )
+
+			stream.write_row([_now, _v[-1], _i[-1], _v[-1] * _i[-1]])
+
+		stream.close_block()
+
+		# Restore tracking compliance
+		self.keithley().current_cmp(self.mpp_cmpl.value())
+
+		# Return None if sweep was aborted before completion
+		if len(_v) == 0:
+			return None, None
+
+		# Maximum power point and open circuit estimates
+		_p = np.multiply(_v, _i)
+		return _v[ int( np.argmax(_p) ) ], _v[ int( np.argmin( np.abs(_i) ) ) ]
+
+	# Protocol Voc check. Streams convergence trace to disk and returns Voc
+	def exec_protocol_voc(self, stream, start, _voc):
+
+		stream.open_block("pv-voc", ["t", "Voc", "Ioc"])
+
+		# Start from previous Voc estimate
+		self.keithley().set_voltage(_voc)
+		_iter_start = float(time.time())
+
+		# Convergence loop (same controller as Voc monitor)
+		while self.protocol_thread_running is True:
 
-			data.append_subkey_data(key, "t"	, _now)
-			data.append_subkey_data(key, "Vmpp",  1.0 * float(_buffer[0]) )
-			data.append_subkey_data(key, "Impp", -1.0 * float(_buffer[1]) ) 
-			data.append_subkey_data(key, "Pmpp", -1.0 * float(_buffer[1]) * float(_buffer[0]) )
+			# Get data from buffer
+			_buffer = self.keithley().meas().split(",")
+			stream.write_row([float(time.time() - start), float(_buffer[0]), -1.0 * float(_buffer[1])])
+			_voc = float(_buffer[0])
 
-			# Append handle data and update canvas
-			self.mpp_plot.append_handle_data("111" , key, _now, float(_buffer[0]))
-			self.mpp_plot.append_handle_data("111t", key, _now, float(_buffer[0]) * -1.0 * float(_buffer[1]) * 1000.)
-			self.mpp_plot.update_canvas()	
+			# Check convergence or timeout
+			if ( abs( float(_buffer[1]) ) <= float( self.voc_conv.value() ) ) or ( float( time.time() - _iter_start ) >= 3.0 ):
+				break
 
-			# Measurement delay	
-			if self.mpp_delay.value() != 0: 
-				time.sleep(self.mpp_delay.value())
+			# Adjust bias in direction of lower current
+			if -1.0 * float(_buffer[1]) >= 0.0:
+				self.keithley().set_voltage( float(_buffer[0]) * float( 1.0 + self.voc_gain.value()/1000. ) ) 
+
+			else:
+				self.keithley().set_voltage( float(_buffer[0]) * float( 1.0 - self.voc_gain.value()/1000. ) )	
+
+		# Previous estimate is returned if aborted before the first reading
+		stream.close_block()
+		return _voc
+
+	# Protocol MPP iteration. Single perturb and observe step at tracking bias. 
+	# Returns updated tracking bias and the buffer measured at tracking bias.
+	def exec_protocol_mpp(self, _vmpp):
+
+		# Measure at tracking bias
+		self.keithley().set_voltage(_vmpp)
+		_buffer = self.keithley().meas().split(",")
+
+		# Create sense amplitude array
+		_amplitude = self.mpp_ampl.value()
+		_v, _i = np.add(float(_buffer[0]), np.linspace(-1.0 * _amplitude, _amplitude, 5)), []
+
+		# Measure current over sense amplitude array
+		for _ in _v:
+			self.keithley().set_voltage(_)
+			_b = self.keithley().meas().split(",")
+			_i.append( -1.0 * float( _b[1] ) )
+
+		# Calculate derivative
+		_d = np.gradient(np.multiply(_i, _v))
+		_d = np.divide(_d, _amplitude)
+
+		# Differential gain controller
+		if np.mean(_d) <= 0.0:
+			_vmpp = float(_buffer[0]) * float( 1.0 - self.mpp_gain.value()/1000. )
+
+		else:
+			_vmpp = float(_buffer[0]) * float( 1.0 + self.mpp_gain.value()/1000. )
+
+		self.keithley().set_voltage(_vmpp)
+		return _vmpp, _buffer
+
+	# Protocol execution thread. MPP tracking is interrupted by IV-sweeps and 
+	# Voc checks on their periods. Tracking resumes at the last MPP estimate 
+	# so time spent off MPP is limited to the sub-measurements themselves.
+	def exec_protocol_thread(self):
+
+		# Open data stream
+		_name  = self.keithley().get_property("name")
+		stream = QKeithleyDataStream(self.protocol_file, "pv-protocol %s"%_name.replace(" ", "-"))
+
+		# Plot handles. Plot data is held in fixed length buffers
+		_window = int( self.protocol_window.value() )
+		_t, _vp, _pp = collections.deque(maxlen=_window), collections.deque(maxlen=_window), collections.deque(maxlen=_window)
+
+		key = self._get_data_object().gen_hash("pv-protocol")
+		_c0 = self.protocol_plot.gen_next_color()
+		_c1 = self.protocol_plot.gen_next_color()
+		self.protocol_plot.add_axes_handle('111' , key, _color=_c0)
+		self.protocol_plot.add_axes_handle('111t', key, _color=_c1)
+
+		# Protocol periods (s) 
+		_iv_period  = float( self.protocol_iv_period.value()  ) * 60.0
+		_voc_period = float( self.protocol_voc_period.value() ) * 60.0
+
+		# Start with an IV-sweep to initialize MPP and Voc
+		_next_iv, _next_voc = 0.0, _voc_period
+		_vmpp, _voc = float( self.mpp_bias.value() ), float( self.voc_bias.value() )
+		_n_iv, _n_voc, _off = 0, 0, 0.0
+		_tracking = False
+		
+		# Set bias to initial value and turn output ON
+		self.keithley().voltage_src()
+		self.keithley().current_cmp( self.mpp_cmpl.value() )
+		self.keithley().set_voltage( _vmpp )
+		self.keithley().output_on()
+
+		# Thread start time
+		start = float(time.time())
+
+		# Output is turned off and the stream closed even if a sub-measurement fails
+		try:
+
+			# Protocol loop
+			while self.protocol_thread_running is True:
+
+				_now = float(time.time() - start)
+
+				# IV-sweep sub-measurement
+				if _iv_period > 0.0 and _now >= _next_iv:
+
+					_off_start, _tracking = float(time.time()), False
+					_v, _oc = self.exec_protocol_iv(stream, start)
+
+					if _v is not None:
+						_vmpp, _voc = _v, _oc
+
+					self.keithley().set_voltage(_vmpp)
+					_off += float(time.time()) - _off_start
+
+					_next_iv, _n_iv = max(_next_iv + _iv_period, _now), _n_iv + 1
+					continue
+
+				# Voc check sub-measurement
+				if _voc_period > 0.0 and _now >= _next_voc:
+
+					_off_start, _tracking = float(time.time()), False
+					_voc = self.exec_protocol_voc(stream, start, _voc)
+
+					self.keithley().set_voltage(_vmpp)
+					_off += float(time.time()) - _off_start
+
+					_next_voc, _n_voc = max(_next_voc + _voc_period, _now), _n_voc + 1
+					continue
+
+				# Resume MPP tracking in a new data block
+				if _tracking is False:
+					stream.open_block("pv-mpp", ["t", "Vmpp", "Impp", "Pmpp"])
+					_tracking = True
+
+				# MPP tracking iteration
+				_vmpp, _buffer = self.exec_protocol_mpp(_vmpp)
+				_now = float(time.time() - start)
+
+				stream.write_row([_now, float(_buffer[0]), -1.0 * float(_buffer[1]), -1.0 * float(_buffer[1]) * float(_buffer[0])])
+
+				# Update plot on fixed length buffers
+				_t.append(_now)
+				_vp.append( float(_buffer[0]) )
+				_pp.append( float(_buffer[0]) * -1.0 * float(_buffer[1]) * 1000. )
+				self.protocol_plot.set_handle_data("111" , key, list(_t), list(_vp))
+				self.protocol_plot.set_handle_data("111t", key, list(_t), list(_pp))
+				self.protocol_plot.update_canvas()	
+
+				# Measurement delay	
+				if self.mpp_delay.value() != 0: 
+					time.sleep(self.mpp_delay.value())
+
+			# Write protocol summary block
+			stream.write_block("pv-protocol", ["t", "t_off", "n_iv", "n_voc"], [[float(time.time() - start)], [_off], [_n_iv], [_n_voc]])
 
 		# Cleanup after thread termination
-		self.keithley().set_voltage(0.0)
-		self.keithley().output_off()	
+		finally:
 
-	# Tracking measurement ON
-	def exec_mpp_run(self):
+			stream.close()
+			self.keithley().set_voltage(0.0)
+			self.keithley().output_off()
+
+	# Protocol measurement ON
+	def exec_protocol_run(self):
 		
 		if self.keithley() is not None:
 
+			# Check that an output file has been selected
+			if self.protocol_file is None:
+
+				# Message box to warn the user
+				msg = QMessageBox()
+				msg.setIcon(QMessageBox.Warning)
+				msg.setText("Select an output file before starting protocol")
+				msg.setWindowTitle("QKeithleySolar")
+				msg.setWindowIcon(self._icon)
+				msg.setStandardButtons(QMessageBox.Ok)
+				msg.exec_()
+
+				# Revert state
+				self.protocol_meas_button.click()
+				return
+
 			# Update UI for ON state
-			self.mpp_meas_button.setStyleSheet(
+			self.protocol_meas_button.setStyleSheet(
 				"background-color: #cce6ff; border-style: solid; border-width: 1px; border-color: #1a75ff; padding: 7px;")
 			
 			# Disable widgets
 			self.save_widget.setEnabled(False)
 			self.meas_select.setEnabled(False)
 			self.device_select.setEnabled(False)
-			self.mpp_bias.setEnabled(False)
-			self.mpp_cmpl.setEnabled(False)
+			self.protocol_file_button.setEnabled(False)
 			self.iv_plot.mpl_refresh_setEnabled(False)
 			self.voc_plot.mpl_refresh_setEnabled(False)	
 			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
 			
 			# Run the measurement thread function
-			self.mpp_thread = threading.Thread(target=self.exec_mpp_thread, args=())
-			self.mpp_thread.daemon = True		# Daemonize thread
-			self.mpp_thread.start()				# Start the execution
-			self.mpp_thread_running = True		# Set execution flag				
+			self.protocol_thread = threading.Thread(target=self.exec_protocol_thread, args=())
+			self.protocol_thread.daemon = True		# Daemonize thread
+			self.protocol_thread_running = True		# Set execution flag				
+			self.protocol_thread.start()			# Start the execution
 
-	# Tracking measurement OFF
-	def exec_mpp_stop(self):
+	# Protocol measurement OFF
+	def exec_protocol_stop(self):
 				
-		if self.keithley() is not None:
+		if hasattr(self, "protocol_thread"):
 
 			# Put measurement button in measure state
-			self.mpp_meas_button.setStyleSheet(
+			self.protocol_meas_button.setStyleSheet(
 				"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )	
 			
 			# Enable widgets 
 			self.save_widget.setEnabled(True)
 			self.meas_select.setEnabled(True)
 			self.device_select.setEnabled(True)
-			self.mpp_bias.setEnabled(True)
-			self.mpp_cmpl.setEnabled(True)
+			self.protocol_file_button.setEnabled(True)
 			self.iv_plot.mpl_refresh_setEnabled(True)
 			self.voc_plot.mpl_refresh_setEnabled(True)	
 			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
 
-			# Set thread running to False. This will break the sweep measurements
+			# Set thread running to False. This will break the protocol
 			# execution loop on next iteration.  
-			self.mpp_thread_running = False	
-			self.mpp_thread.join()  # Waits for thread to complete
+			self.protocol_thread_running = False	
+			self.protocol_thread.join()  # Waits for thread to complete
+			del self.protocol_thread
+
+
+	#####################################
+	#  OPEN-CIRCUIT VOLTAGE DECAY MODE
+	#	
+
+	# OCVD measurement EXECUTION
+	def exec_ocvd_thread(self):
+
+		# Measurement integration time is restored after capture
+		_page = self._config.get_config_widget( self.device_select.currentText() )
+		_restore = 1.0 if _page is None else _page.nplc
+
+		_engine = QKeithleyEngine( self._get_data_object() )
+		key = _engine.ocvd(
+			self.keithley(), 
+			int( self.ocvd_count.value() ), 
+			self.ocvd_nplc.value(), 
+			self.ocvd_trigger.currentText(), 
+			int( self.ocvd_line.value() ), 
+			self.ocvd_cmpl.value(), 
+			self.ocvd_soak.value(), 
+			_restore, 
+			lambda: self.ocvd_thread_running, 
+			lambda key: self.gen_solar_handles(self.ocvd_plot, key)
+		)
+
+		# Aborted captures are kept but not analysed
+		if not self.ocvd_thread_running:
+			return
+
+		# Lifetime analysis (summary label is updated on stop)
+		try:
+			self.ocvd_summary = _engine.ocvd_lifetime(key, 
+				self.ocvd_ideality.value(), self.ocvd_temp.value(), int( self.ocvd_window.value() ))
+
+			_data = self._get_data_object()
+			self.ocvd_plot.set_handle_data("111" , key, _data.get_subkey_data(key, "tdecay"), _data.get_subkey_data(key, "V"))
+			self.ocvd_plot.set_handle_data("111t", key, _data.get_subkey_data(key, "tdecay"), _data.get_subkey_data(key, "tau"))
+			self.ocvd_plot.update_canvas()
+
+		except ValueError as e:
+			self.ocvd_summary = str(e)
+
+		# Reset measurement state to stop if thread is still running (not aborted)
+		if self.ocvd_thread_running:
+			self.ocvd_meas_button.click()
+
+	# OCVD measurement ON
+	def exec_ocvd_run(self):
+	
+		if self.keithley() is not None:
+
+			# Put measurement button in abort state
+			self.ocvd_meas_button.setStyleSheet(
+				"background-color: #ffcccc; border-style: solid; border-width: 1px; border-color: #800000; padding: 7px;")
+
+			# Disable controls
+			self.save_widget.setEnabled(False)
+			self.device_select.setEnabled(False)
+			self.meas_select.setEnabled(False)
+			self.iv_plot.mpl_refresh_setEnabled(False)
+			self.voc_plot.mpl_refresh_setEnabled(False)	
+			self.mpp_plot.mpl_refresh_setEnabled(False)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(False)
+			self.protocol_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_plot.mpl_refresh_setEnabled(False)
+			self.ocvd_result.setText("<i>Capturing decay</i>")
+			self.ocvd_summary = None
+
+			# Run the measurement thread function
+			self.ocvd_thread = threading.Thread(target=self.exec_ocvd_thread, args=())
+			self.ocvd_thread.daemon = True				# Daemonize thread
+			self.ocvd_thread_running = True				# Set execution flag
+			self.ocvd_thread.start()         			# Start the execution
+
+	# OCVD measurement OFF
+	def exec_ocvd_stop(self):
+		
+		if self.keithley() is not None:
+
+			# Put measurement button in measure state
+			self.ocvd_meas_button.setStyleSheet(
+				"background-color: #dddddd; border-style: solid; border-width: 1px; border-color: #aaaaaa; padding: 7px;" )
+			
+			# Enable controls
+			self.save_widget.setEnabled(True)
+			self.device_select.setEnabled(True)
+			self.meas_select.setEnabled(True)
+			self.iv_plot.mpl_refresh_setEnabled(True)
+			self.voc_plot.mpl_refresh_setEnabled(True)	
+			self.mpp_plot.mpl_refresh_setEnabled(True)
+			self.mpp_multi_plot.mpl_refresh_setEnabled(True)
+			self.protocol_plot.mpl_refresh_setEnabled(True)
+			self.ocvd_plot.mpl_refresh_setEnabled(True)
+
+			# Set thread running to False. This will abort the capture
+			self.ocvd_thread_running = False
+			self.ocvd_thread.join()  # Waits for thread to complete
+
+			# Lifetime summary
+			_summary = self.ocvd_summary
+			if isinstance(_summary, dict) and _summary["tau"] is not None:
+				self.ocvd_result.setText("Voc = %.4f V, lifetime = %.4g s"%(_summary["voc"], _summary["tau"]))
+			elif isinstance(_summary, dict):
+				self.ocvd_result.setText("<i>No decay in capture</i>")
+			else:
+				self.ocvd_result.setText("<i>%s</i>"%html.escape(_summary or "Capture aborted"))
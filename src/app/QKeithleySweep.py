@@ -27,6 +27,7 @@
 #!/usr/bin/env python 
 import os
 import sys
+import json
 import time
 import threading
 
@@ -40,6 +41,18 @@ from PyQtVisa import QVisaApplication
 from PyQtVisa.widgets import QVisaUnitSelector
 from PyQtVisa.widgets import QVisaDynamicPlot 
 
+# Import error band for averaged sweeps
+from src.utils.QKeithleyErrorBand import QKeithleyErrorBand
+
+# Import device selector (pages are constructed on first selection)
+from src.widgets.QKeithleyDeviceSelect import QKeithleyDeviceSelect
+
+# Import measurement engine
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyAdaptive import QKeithleyAdaptive
+from src.engine.QKeithleyCompliance import QKeithleyCompliance
+from src.engine.QKeithleyProfile import QKeithleyProfile
+
 # Import QT backends
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox, QSpinBox, QDoubleSpinBox, QPushButton, QCheckBox, QLabel, QLineEdit, QStackedWidget, QSizePolicy
 from PyQt5.QtCore import Qt, QStateMachine, QState, QObject
@@ -67,6 +80,10 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 	def keithley(self, __widget__):
 		return self.get_device_by_name( __widget__.currentText() )
 
+	# Device selector starts empty. Devices are registered in refresh()
+	def _gen_device_select(self):
+		return QKeithleyDeviceSelect(self)
+
 	# Method to refresh the widget
 	def refresh(self):
 	
@@ -86,59 +103,26 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 			# Disable output button
 			self.meas_button.setEnabled(False)	
 
-	# Method to set sweep parameters
-	def set_sweep_params(self, start, stop, npts):
-
-		# No hysteresis	
-		if self.sweep_hist.currentText() == "None": 	
-			sp = np.linspace(float(start), float(stop), int(npts) )
-			self._set_app_metadata("__sweep__", sp)
-
-		# Prepare reverse sweep
-		if self.sweep_hist.currentText() == "Reverse-sweep":
-
-			# Sweep centered hysteresis
-			sp = np.linspace(float(start), float(stop), int(npts) )
-			sp = np.concatenate( (sp, sp[-2::-1]) )
-			self._set_app_metadata("__sweep__", sp)
-
-		# Prepare a zero centered hysteresis
-		if self.sweep_hist.currentText() == "Zero-centered":
-
-			# Create a linspace
-			sp = np.linspace(float(start), float(stop), int(npts) )
-			
-			# Extract positive slice
-			pos = np.where(sp > 0, sp, np.nan) 	
-			pos = pos[~np.isnan(pos)]
-
-			# Extract negative slice
-			neg = np.where(sp < 0, sp, np.nan) 
-			neg = neg[~np.isnan(neg)]
+	# Measurement actions for remote control { name : ( button, running ) }
+	def get_remote_actions(self):
+		return { "sweep" : ( self.meas_button, getattr(self, "thread_running", False) ) }
 
-			# Create the zero centered hysteresis re-insert zeros
-			# Forward sweep, zero crossing
-			if (start < 0.) and (stop > 0.) and (start < stop):
-				sp = np.concatenate( ([0.0], pos, pos[-2::-1], [0.0], neg[::-1], neg[1::], [0.0]) )
+	# Devices held by running sweep (sweep and step devices)
+	def get_busy_devices(self):
+		return [ self.sweep_inst.currentText(), self.step_inst.currentText() ] if getattr(self, "thread_running", False) else []
 
-		 	# Reverse sweep, zero crossing
-			elif  (start > 0.) and (stop < 0.) and (start > stop):	
-				sp = np.concatenate( ([0.0], neg, neg[-2::-1], [0.0], pos[::-1], pos[1::], [0.0]) )
-				print(sp)				
-
-			# If not zero crossing, default to "Reverse-sweep" case
-			else: 	
-				sp = np.concatenate( (sp, sp[-2::-1]) )	
-
-			# Set meta field
-			self._set_app_metadata( "__sweep__", sp)
+	# Method to set sweep parameters
+	def set_sweep_params(self, start, stop, npts):
 
+		# Sweep plan including hysteresis
+		sp = QKeithleyEngine.sweep_plan(start, stop, npts, self.sweep_hist.currentText())
+		self._set_app_metadata("__sweep__", sp)
 
 	# Method to set step parameters
 	def set_step_params(self, start, stop, npts):
 
 		# No hysteresis	
-		sp = np.linspace(float(start), float(stop), int(npts) )
+		sp = QKeithleyEngine.step_plan(start, stop, npts)
 		self._set_app_metadata("__step__", sp)
 
 
@@ -303,6 +287,93 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 		self.sweep_hist.setFixedWidth(200)
 		self.sweep_hist.addItems(["None", "Reverse-sweep", "Zero-centered"])	
 
+		# Sweep mode. Pulsed mode applies each level as a short pulse from the 
+		# base level with pulse timing by the insturment trigger model
+		self.sweep_pulse_label = QLabel("Sweep Mode")
+		self.sweep_pulse = QComboBox()
+		self.sweep_pulse.setFixedWidth(200)
+		self.sweep_pulse.addItems(["DC", "Pulsed"])
+		self.sweep_pulse.currentTextChanged.connect(self.update_pulse_ctrl)
+
+		# Generate pulse controls
+		self.gen_pulse_ctrl()		# self.pulse_ctrl
+
+		# Integration mode. Adaptive mode selects the lowest NPLC per point 
+		# which meets the relative noise target
+		self.sweep_nplc_label = QLabel("Integration Mode")
+		self.sweep_nplc = QComboBox()
+		self.sweep_nplc.setFixedWidth(200)
+		self.sweep_nplc.addItems(["Fixed", "Adaptive"])
+		self.sweep_nplc.currentTextChanged.connect(self.update_nplc_ctrl)
+
+		# Relative noise target
+		self.sweep_noise_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Noise Target (%)",
+			"limit"		: 100.0, 
+			"signed"	: False,
+			"default"	: [0.1]
+		}
+		self.sweep_noise = QVisaUnitSelector.QVisaUnitSelector(self.sweep_noise_config)
+		self.sweep_noise.unit_value.setEnabled(False)
+
+		# Per-point averaging. Each point is the mean of a burst of buffered 
+		# readings (one bus transaction). Statistics are stored with the data
+		self.sweep_burst_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Readings per Point",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.sweep_burst = QVisaUnitSelector.QVisaUnitSelector(self.sweep_burst_config)
+
+		# Plot standard deviation of averaged points
+		self.sweep_band = QCheckBox("Plot Error Bars (1σ)")
+
+		# Repeated sweeps. Sweeps are folded into running mean and standard 
+		# deviation, which are plotted as a line with 1σ band
+		self.sweep_repeat_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Repeat Sweeps",
+			"limit"		: 10000.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.sweep_repeat = QVisaUnitSelector.QVisaUnitSelector(self.sweep_repeat_config)
+
+		# Raw sweeps to keep in repeat mode
+		self.sweep_keep_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Keep Every Nth Sweep (0 = none)",
+			"limit"		: 10000.0, 
+			"signed"	: False,
+			"default"	: [0.0]
+		}
+		self.sweep_keep = QVisaUnitSelector.QVisaUnitSelector(self.sweep_keep_config)
+
+		# Compliance policy. Stop cuts the sweep after a number of consecutive 
+		# points in compliance. Skip continues with the next step (V-step)
+		self.sweep_cmpl_label = QLabel("Compliance Policy")
+		self.sweep_cmpl = QComboBox()
+		self.sweep_cmpl.setFixedWidth(200)
+		self.sweep_cmpl.addItems(["Continue", "Stop", "Skip"])
+		self.sweep_cmpl.currentTextChanged.connect(self.update_cmpl_ctrl)
+
+		# Consecutive points in compliance
+		self.sweep_cmpl_points_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Points in Compliance",
+			"limit"		: 1000.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.sweep_cmpl_points = QVisaUnitSelector.QVisaUnitSelector(self.sweep_cmpl_points_config)
+		self.sweep_cmpl_points.unit_value.setEnabled(False)
+
+		# Compliance report of last measurement
+		self.sweep_cmpl_report = QLabel("")
+
 		#####################################
 		#  ADD CONTROLS
 		#
@@ -313,11 +384,85 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 		self.sweep_ctrl_layout.addWidget(self._gen_hbox_widget([self.sweep_src, self.sweep_src_label]))
 		self.sweep_ctrl_layout.addWidget(self._gen_hbox_widget([self.sweep_hist, self.sweep_hist_label]))
 		self.sweep_ctrl_layout.addWidget(self.sweep_pages)
+		self.sweep_ctrl_layout.addWidget(self._gen_hbox_widget([self.sweep_pulse, self.sweep_pulse_label]))
+		self.sweep_ctrl_layout.addWidget(self.pulse_ctrl)
+		self.sweep_ctrl_layout.addWidget(self._gen_hbox_widget([self.sweep_nplc, self.sweep_nplc_label]))
+		self.sweep_ctrl_layout.addWidget(self.sweep_noise)
+		self.sweep_ctrl_layout.addWidget(self.sweep_burst)
+		self.sweep_ctrl_layout.addWidget(self.sweep_band)
+		self.sweep_ctrl_layout.addWidget(self.sweep_repeat)
+		self.sweep_ctrl_layout.addWidget(self.sweep_keep)
+		self.sweep_ctrl_layout.addWidget(self._gen_hbox_widget([self.sweep_cmpl, self.sweep_cmpl_label]))
+		self.sweep_ctrl_layout.addWidget(self.sweep_cmpl_points)
+		self.sweep_ctrl_layout.addWidget(self.sweep_cmpl_report)
 		
 		# Positioning
 		self.sweep_ctrl.setLayout(self.sweep_ctrl_layout)
 		return self.sweep_ctrl
 
+	# Pulse control layout
+	def gen_pulse_ctrl(self):
+
+		self.pulse_ctrl = QWidget()
+		self.pulse_ctrl_layout = QVBoxLayout()
+
+		# Base levels for voltage and current sweep
+		self.pulse_v_base = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "V", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Base Level (V)",
+			"limit"		: 20.0, 
+			"signed"	: True,
+			"default"	: [0.0, ""]
+		})
+		self.pulse_i_base = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "A", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Base Level (A)",
+			"limit"		: 1.0, 
+			"signed"	: True,
+			"default"	: [0.0, "m"]
+		})
+
+		self.pulse_pages = QStackedWidget()
+		self.pulse_pages.addWidget(self.pulse_v_base)
+		self.pulse_pages.addWidget(self.pulse_i_base)
+		self.pulse_pages.setCurrentIndex(0)
+
+		# Pulse on-time (source delay before the pulse reading)
+		self.pulse_on = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "s", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "On Time",
+			"limit"		: 1.0, 
+			"signed"	: False,
+			"default"	: [1.0, "m"]
+		})
+
+		# Pulse off-time (at base level)
+		self.pulse_off = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "s", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Off Time",
+			"limit"		: 10.0, 
+			"signed"	: False,
+			"default"	: [50.0, "m"]
+		})
+
+		# Add widgets
+		self.pulse_ctrl_layout.addWidget(self.pulse_pages)
+		self.pulse_ctrl_layout.addWidget(self.pulse_on)
+		self.pulse_ctrl_layout.addWidget(self.pulse_off)
+		self.pulse_ctrl_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout (hidden until pulsed mode is selected)
+		self.pulse_ctrl.setLayout(self.pulse_ctrl_layout)
+		self.pulse_ctrl.setVisible(False)
+
 	# Step control layout	
 	def gen_step_ctrl(self):
 	
@@ -647,13 +792,36 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 		# Switch to voltage sweep page
 		if self.sweep_src.currentText() == "Voltage":
 			self.sweep_pages.setCurrentIndex(0)
+			self.pulse_pages.setCurrentIndex(0)
 			self.update_meas_params()
 
 		# Switch to current sweep page
 		if self.sweep_src.currentText() == "Current":		
 			self.sweep_pages.setCurrentIndex(1)
+			self.pulse_pages.setCurrentIndex(1)
 			self.update_meas_params()
 
+	# Show pulse controls in pulsed sweep mode
+	def update_pulse_ctrl(self):
+		self.pulse_ctrl.setVisible( self.sweep_pulse.currentText() == "Pulsed" )
+
+	# Noise target is used in adaptive integration mode
+	def update_nplc_ctrl(self):
+		self.sweep_noise.unit_value.setEnabled( self.sweep_nplc.currentText() == "Adaptive" )
+
+	# Points in compliance are used by stop and skip policies
+	def update_cmpl_ctrl(self):
+		self.sweep_cmpl_points.unit_value.setEnabled( self.sweep_cmpl.currentText() != "Continue" )
+
+	# Fixed source and measure ranges if the speed profile of the device 
+	# uses them (fast). Ranges cover the sweep extents and compliance
+	def set_fixed_ranges(self, __widget__, _mode, _levels, _cmpl):
+
+		_page = self._config.get_config_widget( __widget__.currentText() )
+
+		if _page is not None and QKeithleyProfile.is_fixed(_page.profile):
+			QKeithleyProfile.set_ranges(self.keithley(__widget__), _mode, _levels, _cmpl)
+
 	# Create Measurement 
 	def update_meas_params(self):
 
@@ -672,6 +840,7 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 				self.keithley(self.sweep_inst).voltage_src()
 				self.keithley(self.sweep_inst).set_voltage(0.0)
 				self.keithley(self.sweep_inst).current_cmp(self.voltage_sweep_cmpl.value())
+				self.set_fixed_ranges(self.sweep_inst, "Voltage", self._get_app_metadata("__sweep__"), self.voltage_sweep_cmpl.value())
 	
 
 		# Set up i-source(v-compliance) on keithley 
@@ -690,6 +859,7 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 				self.keithley(self.sweep_inst).current_src()
 				self.keithley(self.sweep_inst).set_current(0.0)
 				self.keithley(self.sweep_inst).voltage_cmp(self.current_sweep_cmpl.value())
+				self.set_fixed_ranges(self.sweep_inst, "Current", self._get_app_metadata("__sweep__"), self.current_sweep_cmpl.value())
 
 
 		# Set sweeep paramaters
@@ -704,6 +874,7 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 			self.keithley(self.step_inst).voltage_src()
 			self.keithley(self.step_inst).set_voltage(0.0)
 			self.keithley(self.step_inst).current_cmp(self.voltage_step_cmpl.value())		
+			self.set_fixed_ranges(self.step_inst, "Voltage", self._get_app_metadata("__step__"), self.voltage_step_cmpl.value())
 
 	#####################################
 	#  MEASUREMENT EXECUTION THREADS
@@ -767,168 +938,197 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 		self._set_app_metadata("__exec_voltage_step__", False)
 
 	
-	# Execute Sweep-Step Measurement
-	def exec_sweep_step_thread(self):
-
-		# Generate data key 
-		data = self._get_data_object()
-		key  = data.add_hash_key("iv-sweep-v-step")
-
-		# Add data fields to key	
-		data.set_subkeys(key, ["t", "V0", "I0", "P0", "V1", "I1", "P1"])
-		data.set_metadata(key, "__type__", "iv-sweep-v-step")
-
-		# Add key to meta widget
-		self.meta_widget.add_meta_key(key)
+	# Sweep delay for voltage/current mode
+	def get_sweep_delay(self):
 
-		# Generate function pointer for voltage/current mode
 		if self.sweep_src.currentText() == "Voltage":
-			__func__  = self.keithley(self.sweep_inst).set_voltage
-			__delay__ = self.voltage_sweep_delay.value()
+			return self.voltage_sweep_delay.value()
 
 		if self.sweep_src.currentText() == "Current":
-			__func__ = self.keithley(self.sweep_inst).set_current
-			__delay__ = self.current_sweep_delay.value()
+			return self.current_sweep_delay.value()
 
-		# Clear plot and zero arrays
-		start  = time.time()
+	# Adaptive integration for sweep. The NPLC of the device configuration 
+	# is restored after the sweep
+	def get_sweep_adaptive(self):
 
-		# Output on
-		self.keithley(self.step_inst).output_on()
-		self.keithley(self.sweep_inst).output_on()
+		if self.sweep_nplc.currentText() != "Adaptive":
+			return None
 
-		# Use generator function so all traces have same color
-		_c = self.plot.gen_next_color()
-		_handle_index = 0 
+		_page = self._config.get_config_widget( self.sweep_inst.currentText() )
+		_restore = 1.0 if _page is None else _page.nplc
 
-		# Loop through step variables
-		for _step in self._get_app_metadata("__step__"):
+		return QKeithleyAdaptive( self.sweep_noise.value() / 100.0, _restore=_restore )
 
-			# Set step voltage
-			self.keithley(self.step_inst).set_voltage(_step)
-			self.plot.add_axes_handle("111", key, _color=_c)
+	# Compliance policy for sweep (None flags points only)
+	def get_sweep_compliance(self):
 
-			# Bias settle
-			if __delay__ != 0: 
-				time.sleep(__delay__)
+		if self.sweep_cmpl.currentText() == "Continue":
+			return None
 
-			# Loop through sweep variables
-			for _bias in self._get_app_metadata("__sweep__"):
+		return QKeithleyCompliance( self.sweep_cmpl.currentText().lower(), int( self.sweep_cmpl_points.value() ) )
 
-				# If thread is running
-				if self.thread_running:
+	# Report points skipped on compliance and time saved
+	def update_cmpl_report(self, key):
 
-					# Set voltage/current bias
-					__func__(_bias)			
+		_meta = None if key is None else self._get_data_object().get_metadata(key, "__compliance__")
+		if _meta is None:
+			self.sweep_cmpl_report.setText("")
+			return
 
-					# Get data from buffer
-					_b0 = self.keithley(self.sweep_inst).meas().split(",")	
-					_b1 = self.keithley(self.step_inst).meas().split(",")
+		_meta = json.loads(_meta)
+		self.sweep_cmpl_report.setText("<i>%d points skipped, saved %.1fs</i>"%(_meta["skipped"], _meta["saved"]))
 
+	# Engine callback: add data key to meta widget and plot
+	def gen_sweep_handle(self, key):
 
-					if __delay__ != 0: 
-						time.sleep(__delay__)
+		self.meta_widget.add_meta_key(key)
+		self.plot.add_axes_handle("111", key)
+		self._sweep_key = key
 
-					# Extract data from buffer
-					_now = float(time.time() - start)
+	# Error band of averaged sweep (standard deviation of current)
+	def update_sweep_band(self, key):
 
-					# Append measured values to data arrays	
-					data.append_subkey_data(key,"t", _now )
-					data.append_subkey_data(key,"V0", float(_b0[0]) )
-					data.append_subkey_data(key,"I0", float(_b0[1]) )
-					data.append_subkey_data(key,"P0", float(_b0[0]) * float(_b0[1]) )
-					data.append_subkey_data(key,"V1", float(_b1[0]) )
-					data.append_subkey_data(key,"I1", float(_b1[1]) )
-					data.append_subkey_data(key,"P1", float(_b1[0]) * float(_b1[1]) )
+		_data = self._get_data_object()
+		if "Istd" not in _data.data[key].keys():
+			return
 
-					# Add data to plot
-					self.plot.append_handle_data("111", key, float(_b0[0]), float(_b0[1]), _handle_index)
-					self.plot.update_canvas()
-			
-			# Increment handle index
-			_handle_index += 1
-	
+		QKeithleyErrorBand.set_band(self.plot, "111", key, 
+			_data.get_subkey_data(key, "V"), 
+			_data.get_subkey_data(key, "I"), 
+			_data.get_subkey_data(key, "Istd"))
 
-		# Reset Keithleys
-		__func__(0.0)
-		self.keithley(self.step_inst).set_voltage(0.0)
-		self.keithley(self.step_inst).output_off()
-		self.keithley(self.sweep_inst).output_off()
-		
-		# Reset sweep control and update measurement state to stop. 
-		# Post a button click event to the QStateMachine to trigger 
-		# a state transition if thread is still running (not aborted)
-		if self.thread_running:
-			self.meas_button.click()			
+		self.plot.update_canvas()
 
+	# Engine callback: plot mean of repeated sweeps with 1σ band
+	def update_repeat_plot(self, key, _n):
 
-	# Execute Sweep Measurement
-	def exec_sweep_thread(self):
+		_data = self._get_data_object()
+		_v, _i = _data.get_subkey_data(key, "V"), _data.get_subkey_data(key, "I")
 
-		# Generate data key 
-		data = self._get_data_object()
-		key  = data.add_hash_key("iv-sweep")
+		self.plot.set_handle_data("111", key, _v, _i)
+		QKeithleyErrorBand.set_band(self.plot, "111", key, _v, _i, _data.get_subkey_data(key, "Istd"))
+		self.plot.update_canvas()
 
-		# Add data fields to key	
-		data.set_subkeys(key, ["t", "V", "I", "P"])
-		data.set_metadata(key, "__type__", "iv-sweep")
+	# Engine callback: add data key to meta widget. Use generator 
+	# function so all step traces have same color
+	def gen_step_color(self, key):
 
-		# Add key to meta widget
 		self.meta_widget.add_meta_key(key)
+		self._step_color = self.plot.gen_next_color()
 
-		# Generate function pointer for voltage/current mode
-		if self.sweep_src.currentText() == "Voltage":
-			__func__  = self.keithley(self.sweep_inst).set_voltage
-			__delay__ = self.voltage_sweep_delay.value()
+	# Engine callback: new plot handle for each step
+	def gen_step_handle(self, key, _n):
 
-		if self.sweep_src.currentText() == "Current":
-			__func__ = self.keithley(self.sweep_inst).set_current
-			__delay__ = self.current_sweep_delay.value()
+		self.plot.add_axes_handle("111", key, _color=self._step_color)
+		self._step_index = _n
 
-		# Clear plot and zero arrays
-		handle = self.plot.add_axes_handle("111", key)
-		start  = time.time()
-		
-		# Output on
-		self.keithley(self.sweep_inst).output_on()
+	# Engine callback: append sweep point to plot
+	def update_sweep_plot(self, key, _row):
 
-		# Loop through sweep variables
-		for _bias in self._get_app_metadata("__sweep__"):
+		self.plot.append_handle_data("111", key, _row["V"], _row["I"])
+		self.plot.update_canvas()	
 
-			# If thread is running
-			if self.thread_running:
+	# Engine callback: append sweep-step point to plot
+	def update_step_plot(self, key, _row):
 
-				# Set voltage/current bias
-				__func__(_bias)			
+		self.plot.append_handle_data("111", key, _row["V0"], _row["I0"], self._step_index)
+		self.plot.update_canvas()
 
-				# Get data from buffer
-				_b = self.keithley(self.sweep_inst).meas().split(",")
-		
-				if __delay__ != 0: 
-					time.sleep(__delay__)
+	# Execute Sweep-Step Measurement
+	def exec_sweep_step_thread(self):
 
-				# Extract data from buffer
-				_now = float(time.time() - start)
+		self._cmpl_key = QKeithleyEngine( self._get_data_object() ).sweep_step(
+			self.keithley(self.sweep_inst), 
+			self.keithley(self.step_inst), 
+			self.sweep_src.currentText(), 
+			self._get_app_metadata("__sweep__"), 
+			self._get_app_metadata("__step__"), 
+			self.get_sweep_delay(), 
+			lambda: self.thread_running, 
+			self.gen_step_color, 
+			self.update_step_plot, 
+			self.gen_step_handle, 
+			self.get_sweep_compliance()
+		)
 
-				# Append measured values to data arrays	
-				data.append_subkey_data(key,"t", _now )
-				data.append_subkey_data(key,"V", float(_b[0]) )
-				data.append_subkey_data(key,"I", float(_b[1]) )
-				data.append_subkey_data(key,"P", float(_b[0]) * float(_b[1]) )
+		# Reset sweep control and update measurement state to stop. 
+		# Post a button click event to the QStateMachine to trigger 
+		# a state transition if thread is still running (not aborted)
+		if self.thread_running:
+			self.meas_button.click()			
+
+	# Execute Sweep Measurement
+	def exec_sweep_thread(self):
+
+		if self.sweep_pulse.currentText() == "Pulsed":
+			self.exec_sweep_pulse()
+
+		elif int( self.sweep_repeat.value() ) > 1:
+			self.exec_sweep_repeat()
+
+		else:
+			self.exec_sweep_single()
 
-				self.plot.append_handle_data("111", key, float(_b[0]), float(_b[1]))
-				self.plot.update_canvas()	
-		
-		# Reset Keithley
-		__func__(0.0)
-		self.keithley(self.sweep_inst).output_off()
-		
 		# Reset sweep control and update measurement state to stop. 
 		# Post a button click event to the QStateMachine to trigger 
 		# a state transition if thread is still running (not aborted)
 		if self.thread_running:
 			self.meas_button.click()
 
+	# Repeated sweep statistics
+	def exec_sweep_repeat(self):
+
+		self._cmpl_key = QKeithleyEngine( self._get_data_object() ).sweep_repeat(
+			self.keithley(self.sweep_inst), 
+			self.sweep_src.currentText(), 
+			self._get_app_metadata("__sweep__"), 
+			int( self.sweep_repeat.value() ), 
+			self.get_sweep_delay(), 
+			lambda: self.thread_running, 
+			self.gen_sweep_handle, 
+			self.update_repeat_plot, 
+			int( self.sweep_keep.value() ), 
+			self.get_sweep_adaptive(), 
+			int( self.sweep_burst.value() ), 
+			self.get_sweep_compliance()
+		)
+
+	# Pulsed sweep
+	def exec_sweep_pulse(self):
+
+		self._cmpl_key = QKeithleyEngine( self._get_data_object() ).sweep_pulse(
+			self.keithley(self.sweep_inst), 
+			self.sweep_src.currentText(), 
+			self._get_app_metadata("__sweep__"), 
+			self.pulse_pages.currentWidget().value(), 
+			self.pulse_on.value(), 
+			self.pulse_off.value(), 
+			lambda: self.thread_running, 
+			self.gen_sweep_handle, 
+			self.update_sweep_plot, 
+			self.get_sweep_compliance()
+		)
+
+	# Single sweep
+	def exec_sweep_single(self):
+
+		self._cmpl_key = QKeithleyEngine( self._get_data_object() ).sweep(
+			self.keithley(self.sweep_inst), 
+			self.sweep_src.currentText(), 
+			self._get_app_metadata("__sweep__"), 
+			self.get_sweep_delay(), 
+			lambda: self.thread_running, 
+			self.gen_sweep_handle, 
+			self.update_sweep_plot, 
+			self.get_sweep_adaptive(), 
+			int( self.sweep_burst.value() ), 
+			self.get_sweep_compliance()
+		)
+
+		# Error band for averaged points
+		if self.sweep_band.isChecked():
+			self.update_sweep_band(self._sweep_key)
+
 	# Function we run when we enter run state
 	def exec_meas_run(self):
 
@@ -945,9 +1145,16 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 			# Disable controls
 			self.sweep_src.setEnabled(False)
 			self.sweep_inst.setEnabled(False)
+			self.sweep_nplc.setEnabled(False)
+			self.sweep_pulse.setEnabled(False)
+			self.pulse_ctrl.setEnabled(False)
+			self.sweep_burst.unit_value.setEnabled(False)
+			self.sweep_repeat.unit_value.setEnabled(False)
+			self.sweep_cmpl.setEnabled(False)
 			self.save_widget.setEnabled(False)
 			self.plot.mpl_refresh_setEnabled(False)
 			self.voltage_step_button.setEnabled(False)
+			self._cmpl_key = None
 
 	 		# Check app meta and run sweep or sweep-step tread
 			if self._get_app_metadata("__exec_voltage_step__") == True:
@@ -958,8 +1165,8 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 
 
 			self.thread.daemon = True						# Daemonize thread
+			self.thread_running = True						# Set execution flag
 			self.thread.start()         					# Start the execution
-			self.thread_running = True
 
 	# Function we run when we enter abort state
 	def exec_meas_stop(self):
@@ -974,6 +1181,12 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 			# Enable controls
 			self.sweep_src.setEnabled(True)
 			self.sweep_inst.setEnabled(True)
+			self.sweep_nplc.setEnabled(True)
+			self.sweep_pulse.setEnabled(True)
+			self.pulse_ctrl.setEnabled(True)
+			self.sweep_burst.unit_value.setEnabled(True)
+			self.sweep_repeat.unit_value.setEnabled(True)
+			self.sweep_cmpl.setEnabled(True)
 			self.save_widget.setEnabled(True)
 			self.plot.mpl_refresh_setEnabled(True)
 			self.voltage_step_button.setEnabled(True)
@@ -981,3 +1194,6 @@ class QKeithleySweep(QVisaApplication.QVisaApplication):
 			# Kill measurement thread
 			self.thread_running = False
 			self.thread.join()  # Waits for thread to complete
+
+			# Compliance report of last measurement
+			self.update_cmpl_report(self._cmpl_key)
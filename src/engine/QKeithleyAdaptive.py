@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyAdaptive
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Import header serialization
+from ..utils.QKeithleyHeader import QKeithleyHeader
+
+# Adaptive integration time for sweeps. Each point is first read at the 
+# shortest integration time of the NPLC ladder. The decade of the measured 
+# quantity (current in voltage source mode, voltage in current source mode) 
+# identifies the measurement range. On the first point in a range _samples 
+# quick readings estimate the relative noise, and the lowest NPLC which meets 
+# the relative noise target (noise scales as 1/sqrt(NPLC)) is selected for 
+# the range. If the quick reading already meets the target it is used as 
+# the point, otherwise the point is read again at the selected NPLC.
+#
+# Time saved is estimated against sweeping at _restore (the configured NPLC) 
+# from the integration time of all readings (NPLC / line frequency).
+class QKeithleyAdaptive:
+
+	def __init__(self, _target=1e-3, _ladder=(0.01, 0.1, 1.0, 10.0), _samples=4, _restore=1.0, _freq=50.0):
+
+		self._target, self._ladder = float(_target), sorted( [ float(_) for _ in _ladder ] )
+		self._samples, self._restore, self._freq = max( int(_samples), 2 ), float(_restore), float(_freq)
+
+		# Selected NPLC per range, NPLC set on device
+		self.ranges, self.nplc = {}, None
+
+		# Points, readings and integration time (PLC)
+		self.points, self.readings, self.plc = 0, 0, 0.0
+
+	# Set integration time (skip if unchanged)
+	def set_nplc(self, _device, _nplc):
+
+		if self.nplc != _nplc:
+			_device.update_nplc(_nplc)
+			self.nplc = _nplc
+
+	# Read device at NPLC. Returns list of readings
+	def read(self, _device, _nplc, _count=1):
+
+		self.set_nplc(_device, _nplc)
+		self.readings, self.plc = self.readings + _count, self.plc + _count * _nplc
+		return [ _device.meas() for _ in range(_count) ]
+
+	# Measurement range (decade) of reading
+	def get_range(self, _reading, _mode):
+
+		_value = abs( float( _reading.split(",")[1 if _mode == "Voltage" else 0] ) )
+		return int( np.floor( np.log10(_value) ) ) if _value > 0.0 else None
+
+	# Lowest NPLC in ladder which meets noise target
+	def select(self, _readings, _mode):
+
+		_values = np.array( [ float( _b.split(",")[1 if _mode == "Voltage" else 0] ) for _b in _readings ] )
+		_mean = abs( np.mean(_values) )
+		_noise = np.std(_values, ddof=1) / _mean if _mean > 0.0 else float("inf")
+
+		for _nplc in self._ladder:
+			if _noise * np.sqrt( self._ladder[0] / _nplc ) <= self._target:
+				return _nplc
+
+		return self._ladder[-1]
+
+	# Measure point. Returns (reading, NPLC)
+	def meas(self, _device, _mode):
+
+		self.points += 1
+		_fast = self._ladder[0]
+		_b = self.read(_device, _fast)
+		_range = self.get_range(_b[0], _mode)
+
+		# Estimate noise on first point in range 
+		if _range not in self.ranges.keys():
+			_b += self.read(_device, _fast, self._samples - 1)
+			self.ranges[_range] = self.select(_b, _mode)
+
+		_nplc = self.ranges[_range]
+		if _nplc == _fast:
+			return _b[0], _nplc
+
+		return self.read(_device, _nplc)[0], _nplc
+
+	# Restore configured integration time
+	def close(self, _device):
+		self.set_nplc(_device, self._restore)
+
+	# Integration time saved (s) relative to sweeping at configured NPLC
+	def saved(self):
+		return ( self.points * self._restore - self.plc ) / self._freq
+
+	# Summary for data header
+	def metadata(self):
+
+		return QKeithleyHeader.dumps({
+			"target" 	: self._target,
+			"ladder" 	: self._ladder,
+			"restore" 	: self._restore,
+			"ranges" 	: { str(_k) : _v for _k, _v in self.ranges.items() },
+			"points" 	: self.points,
+			"readings" 	: self.readings,
+			"saved" 	: self.saved()
+		})
@@ -0,0 +1,432 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyBenchmark
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import functools
+import numpy as np
+
+# Peak RSS is not available on all platforms
+try:
+	import resource
+except ImportError:
+	resource = None
+
+# Import measurement engine, simulator and writers (no Qt dependency)
+from PyQtVisa.utils import QVisaDataObject
+from .QKeithleyEngine import QKeithleyEngine
+from .QKeithleySimulator import QKeithleySimulator
+from .QKeithleyProcess import QKeithleyProcess
+from ..utils.QKeithleyDataStream import QKeithleyDataStream
+
+# Benchmark suite. Drives engine measurement loops against QKeithleySimulator 
+# (configurable bus latency), and times data appends, canvas updates and 
+# save to disk for various sizes N. Reports points/s, stage time and peak RSS 
+# and compares results against a stored baseline JSON.
+#
+#	python -m src.engine.QKeithleyBenchmark 
+#	python -m src.engine.QKeithleyBenchmark --save-baseline
+#
+_baseline = os.path.join(os.path.dirname(os.path.abspath(__file__)), "QKeithleyBenchmark.json")
+
+# Peak resident set size (MB)
+def peak_rss():
+
+	if resource is None:
+		return None
+
+	# ru_maxrss is in kB on linux and in bytes on OSX
+	_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return float( _rss / ( 1024. * 1024. ) if sys.platform == "darwin" else _rss / 1024. )
+
+# Run a stage function and time it. Stage functions return the number of 
+# points (rows, frames, iterations) processed, or a tuple of the number of 
+# points and a dict of additional stage results.
+def run_stage(__func__, _n, args):
+
+	start = time.perf_counter()
+	_points = __func__(_n, args)
+	_time = time.perf_counter() - start
+
+	_points, _extra = _points if isinstance(_points, tuple) else (_points, {})
+
+	return dict({
+		"n" 	: _n,
+		"time" 	: _time, 
+		"points": _points, 
+		"rate" 	: _points / _time if _time > 0.0 else 0.0,
+		"rss" 	: peak_rss()
+	}, **_extra)
+
+# Simulated device for measurement stages
+def gen_device(args):
+
+	_device = QKeithleySimulator(_latency=args.latency, _iph=0.01)
+	_device.rst()
+	return _device
+
+#####################################
+#  ACQUISITION STAGES
+#
+
+# Voltage sweep of N points
+def bench_sweep(_n, args):
+
+	engine, _device = QKeithleyEngine(), gen_device(args)
+	engine.configure(_device, "Voltage", 0.1)
+	key = engine.sweep(_device, "Voltage", engine.sweep_plan(-1.0, 1.0, _n))
+
+	return len( engine.data.get_subkey_data(key, "V") )
+
+# Plot callback for sweeps. Appends each point to a line and redraws (Agg)
+def gen_plot_point():
+
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+	_figure = Figure()
+	_canvas = FigureCanvasAgg(_figure)
+	_line, = _figure.add_subplot(111).plot([], [])
+
+	def _on_point(key, _row):
+		_line.set_data( np.append(_line.get_xdata(), _row["V"]), np.append(_line.get_ydata(), _row["I"]) )
+		_line.axes.relim()
+		_line.axes.autoscale_view()
+		_canvas.draw()
+
+	return _on_point
+
+# Voltage sweep of N points with plot redraw on each point. Serial engine 
+# (each point is parsed, stored and plotted before the next level is set) 
+def bench_sweep_serial(_n, args):
+
+	engine, _device = QKeithleyEngine(_pipeline=False), gen_device(args)
+	engine.configure(_device, "Voltage", 0.1)
+	key = engine.sweep(_device, "Voltage", engine.sweep_plan(-1.0, 1.0, _n), 0.0, None, None, gen_plot_point())
+
+	return len( engine.data.get_subkey_data(key, "V") )
+
+# Voltage sweep of N points with plot redraw on each point. Pipelined engine
+def bench_sweep_pipeline(_n, args):
+
+	engine, _device = QKeithleyEngine(_pipeline=True), gen_device(args)
+	engine.configure(_device, "Voltage", 0.1)
+	key = engine.sweep(_device, "Voltage", engine.sweep_plan(-1.0, 1.0, _n), 0.0, None, None, gen_plot_point())
+
+	return len( engine.data.get_subkey_data(key, "V") )
+
+# Sweep-step family of 5 sweeps of N / 5 points
+def bench_step(_n, args):
+
+	engine, _sweep, _step = QKeithleyEngine(), gen_device(args), gen_device(args)
+	engine.configure(_sweep, "Voltage", 0.1)
+	engine.configure(_step, "Voltage", 0.1)
+	engine.sweep_step(_sweep, _step, "Voltage", 
+		engine.sweep_plan(-1.0, 1.0, max(_n // 5, 2)), engine.step_plan(0.0, 1.0, 5))
+
+	return int( _sweep.readings )
+
+# Bias streaming of N samples
+def bench_bias(_n, args):
+
+	engine, _device = QKeithleyEngine(), gen_device(args)
+	engine.configure(_device, "Voltage", 0.1)
+	_device.set_voltage(0.5)
+	_device.output_on()
+
+	_count = [0]
+	def _on_point(key, _row): 
+		_count[0] += 1
+
+	engine.bias(_device, "Voltage", 0.0, lambda: _count[0] < _n, None, _on_point)
+	_device.output_off()
+
+	return _count[0]
+
+# MPP tracking. Each stored point runs perturbation iterations for 3s, so 
+# N is ignored and the rate is perturbation iterations per second
+def bench_mpp(_n, args):
+
+	engine, _device = QKeithleyEngine(), gen_device(args)
+	engine.mpp(_device, 0.4, 0.1, 0.01, 1.0, 0.0, None, None, None, args.mpp_time)
+
+	# Each iteration is one bias reading plus five perturbation readings
+	return int( _device.readings // 6 )
+
+# Timing jitter (ms) of sample interval. Standard deviation and maximum 
+# deviation from the median interval 
+def gen_jitter(_t):
+
+	_dt = np.diff(_t)
+	return {
+		"jitter" 	: float( 1e3 * np.std(_dt) ), 
+		"jitter_max": float( 1e3 * np.max( np.abs( _dt - np.median(_dt) ) ) )
+	}
+
+# Heavy plot load. Redraws a large figure until stopped (Agg, no display)
+def exec_plot_load(_stop, args):
+
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+	_figure = Figure()
+	_canvas = FigureCanvasAgg(_figure)
+	_axes = _figure.add_subplot(111)
+	_axes.plot( np.random.normal(size=args.load) )
+
+	while not _stop.is_set():
+		_canvas.draw()
+
+# Run stage with heavy plot load in a thread of this process
+def with_plot_load(__func__, _n, args):
+
+	_stop = threading.Event()
+	_load = threading.Thread(target=exec_plot_load, args=(_stop, args))
+	_load.start()
+
+	try:
+		return __func__(_n, args)
+
+	finally:
+		_stop.set()
+		_load.join()
+
+# Bias streaming of N samples at 10ms interval under plot load. Engine in 
+# a thread of this process 
+def bench_jitter_thread(_n, args):
+
+	def _stage(_n, args):
+
+		engine = QKeithleyEngine()
+		_device = QKeithleySimulator.biased("Voltage", 0.5, args.latency)
+
+		_count = [0]
+		def _on_point(key, _row): 
+			_count[0] += 1
+
+		key = engine.bias(_device, "Voltage", 0.01, lambda: _count[0] < _n, None, _on_point)
+		return np.asarray( engine.data.get_subkey_data(key, "t") )
+
+	_t = with_plot_load(_stage, _n, args)
+	return len(_t), gen_jitter(_t)
+
+# Bias streaming of N samples at 10ms interval under plot load. Engine in 
+# acquisition process, samples read from shared memory
+def bench_jitter_process(_n, args):
+
+	def _stage(_n, args):
+
+		_proc = QKeithleyProcess(functools.partial(QKeithleySimulator.biased, "Voltage", 0.5, args.latency), "Voltage", 0.01)
+		_proc.start()
+
+		_t = []
+		while len(_t) < _n and _proc.is_alive():
+			time.sleep(0.05)
+			_t.extend( _proc.read()["t"].tolist() )
+
+		_proc.stop()
+		_proc.close()
+		return np.asarray(_t[:_n])
+
+	_t = with_plot_load(_stage, _n, args)
+	return len(_t), gen_jitter(_t)
+
+#####################################
+#  DATA STAGES
+#
+
+# Row appends to QVisaDataObject
+def bench_append(_n, args):
+
+	engine = QKeithleyEngine()
+	key = engine._gen_key("v-bias", ["t", "V", "I", "P"])
+	for _ in range(_n):
+		engine._append(key, {"t" : float(_), "V" : 1.0, "I" : 1e-3, "P" : 1e-3})
+
+	return _n
+
+# Save N rows with QVisaDataObject.write_to_file and QKeithleyDataStream
+def bench_save(_n, args):
+
+	engine = QKeithleyEngine()
+	key = engine._gen_key("v-bias", ["t", "V", "I", "P"])
+	for _ in range(_n):
+		engine._append(key, {"t" : float(_), "V" : 1.0, "I" : 1e-3, "P" : 1e-3})
+
+	with tempfile.TemporaryDirectory() as _dir:
+
+		engine.data.write_to_file( os.path.join(_dir, "object.dat") )
+
+		_stream = QKeithleyDataStream( os.path.join(_dir, "stream.dat") )
+		_stream.open_block("v-bias", ["t", "V", "I", "P"])
+		for _ in range(_n):
+			_stream.write_row([float(_), 1.0, 1e-3, 1e-3])
+		_stream.close()
+
+	return 2 * _n
+
+# Append N points to a plot handle and update canvas every args.draw points
+def bench_canvas(_n, args):
+
+	from PyQt5.QtWidgets import QApplication
+	from PyQtVisa.widgets import QVisaDynamicPlot
+
+	_app = QApplication.instance() or QApplication(sys.argv)
+	_plot = QVisaDynamicPlot.QVisaDynamicPlot(None)
+	_plot.add_subplot(111)
+	_plot.add_axes_handle("111", "bench")
+
+	for _ in range(_n):
+		_plot.append_handle_data("111", "bench", float(_), np.sin(0.01 * _))
+		if ( _ + 1 ) % args.draw == 0:
+			_plot.update_canvas()
+			_app.processEvents()
+
+	_plot.close()
+	return _n
+
+# Stage registry: name, function, default sizes
+_stages = [
+	("sweep", 	bench_sweep,	[100, 1000]),
+	("sweep-s",	bench_sweep_serial,		[100]),
+	("sweep-p",	bench_sweep_pipeline,	[100]),
+	("step",	bench_step,		[100, 1000]),
+	("bias",	bench_bias,		[100, 1000]),
+	("mpp",		bench_mpp,		[1]),
+	("jitter-t",bench_jitter_thread,	[100]),
+	("jitter-p",bench_jitter_process,	[100]),
+	("append",	bench_append,	[1000, 10000, 100000]),
+	("save",	bench_save,		[1000, 10000, 100000]),
+	("canvas",	bench_canvas,	[100, 1000]),
+]
+
+#####################################
+#  REPORTING
+#
+
+# Compare result with baseline. Returns ratio of rates and regression flag
+def compare(_result, _base, _tol):
+
+	if _base is None or _base.get("rate", 0.0) <= 0.0:
+		return None, False
+
+	_ratio = _result["rate"] / _base["rate"]
+	return _ratio, _ratio < ( 1.0 - _tol )
+
+def print_result(_name, _result, _ratio, _regress):
+
+	_rss = "%8.1f"%_result["rss"] if _result["rss"] is not None else "%8s"%"-"
+	_cmp = "%7.2fx"%_ratio if _ratio is not None else "%8s"%"-"
+
+	_jitter = "jitter %.2f ms (max %.2f ms)"%(_result["jitter"], _result["jitter_max"]) if "jitter" in _result else ""
+
+	print("%-8s %8d %10.3f %12.1f %s %s %s%s"%(
+		_name, _result["n"], _result["time"], _result["rate"], _rss, _cmp, 
+		"REGRESSION " if _regress else "", _jitter))
+
+def gen_parser():
+
+	parser = argparse.ArgumentParser(prog="QKeithleyBenchmark", 
+		description="Benchmark QKeithleyControl acquisition, storage, plotting and save paths")
+
+	parser.add_argument("stages", nargs="*", default=[], help="stages to run (%s)"%", ".join([_[0] for _ in _stages]))
+	parser.add_argument("-n", "--sizes", type=int, nargs="+", default=None, help="override sizes N for all stages")
+	parser.add_argument("--latency", type=float, default=0.001, help="simulated bus latency per transaction (s)")
+	parser.add_argument("--mpp-time", type=float, default=3.0, help="MPP tracking time (s)")
+	parser.add_argument("--draw", type=int, default=10, help="canvas update interval (points)")
+	parser.add_argument("--load", type=int, default=200000, help="points in plot load figure (jitter stages)")
+	parser.add_argument("--baseline", default=_baseline, help="baseline JSON file")
+	parser.add_argument("--save-baseline", action="store_true", help="write results to baseline file")
+	parser.add_argument("--tolerance", type=float, default=0.2, help="fractional rate drop flagged as regression")
+	parser.add_argument("-o", "--output", default=None, help="write results JSON")
+	return parser
+
+def main(argv=None):
+
+	args = gen_parser().parse_args(argv)
+
+	# Qt canvas stage runs without display
+	os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+	# Check requested stages
+	_names = [ _[0] for _ in _stages ]
+	for _name in args.stages:
+		if _name not in _names:
+			sys.exit("QKeithleyBenchmark: unknown stage (%s)"%_name)
+
+	# Load baseline. Results are compared only at equal latency
+	_base = {}
+	if os.path.isfile(args.baseline) and not args.save_baseline:
+		with open(args.baseline) as f:
+			_base = json.load(f)
+
+		if _base.get("latency") != args.latency:
+			print("QKeithleyBenchmark: baseline latency %s differs (not compared)"%_base.get("latency"))
+			_base = {}
+
+	results, _regress = {"latency" : args.latency, "stages" : {}}, False
+
+	print("%-8s %8s %10s %12s %8s %8s"%("stage", "N", "time(s)", "points/s", "rss(MB)", "base"))
+	for _name, __func__, _sizes in _stages:
+
+		if args.stages and _name not in args.stages:
+			continue
+
+		results["stages"][_name] = {}
+		for _n in ( args.sizes or _sizes ):
+
+			try:
+				_result = run_stage(__func__, _n, args)
+
+			# Optional stages (canvas requires PyQt5)
+			except ImportError as e:
+				print("%-8s skipped (%s)"%(_name, e))
+				break
+
+			_ratio, _flag = compare(_result, _base.get("stages", {}).get(_name, {}).get(str(_n)), args.tolerance)
+			_regress = _regress or _flag
+			print_result(_name, _result, _ratio, _flag)
+
+			results["stages"][_name][str(_n)] = _result
+
+	# Write results
+	if args.save_baseline:
+		args.output = args.baseline
+
+	if args.output is not None:
+		with open(args.output, "w") as f:
+			json.dump(results, f, indent=4, sort_keys=True)
+
+	# Non-zero exit on regression
+	sys.exit(1 if _regress else 0)
+
+if __name__ == "__main__":
+	main()
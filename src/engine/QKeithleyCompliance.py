@@ -0,0 +1,106 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyCompliance
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+
+# Import header serialization
+from ..utils.QKeithleyHeader import QKeithleyHeader
+
+# Compliance policy for sweeps. The sourcemeter sets bit 3 of the status 
+# element (STAT) of a reading when the source is in compliance, in which case 
+# the measured value is clamped. Policies on compliance are 
+#
+#	"continue"	: flag points only
+#	"stop"		: stop the measurement after _points consecutive points in compliance
+#	"skip"		: as stop, but sweep-step measurements continue with the next step
+#
+# Points which are not measured are counted, and the time saved is estimated 
+# from the mean time per measured point.
+class QKeithleyCompliance:
+
+	policies = ["continue", "stop", "skip"]
+
+	# Compliance bit of status word
+	bit = 8
+
+	def __init__(self, _policy="continue", _points=1):
+
+		if _policy not in self.policies:
+			raise ValueError("unknown compliance policy (%s)"%_policy)
+
+		self.policy, self._points = _policy, max( int(_points), 1 )
+
+		# Consecutive points in compliance
+		self._run = 0
+
+		# Measured, flagged and skipped points and levels where sweeps were cut
+		self.points, self.flagged, self.skipped = 0, 0, 0
+		self.cuts = []
+
+	# Compliance flag of raw reading (or block of readings). A block is in 
+	# compliance if any reading is. Readings without status element are not
+	@classmethod
+	def flag(cls, _raw):
+
+		_stat = _raw.split(",")[4::5]
+		return int( any( [ int( float(_s) ) & cls.bit for _s in _stat ] ) )
+
+	# Start of sweep
+	def reset(self):
+		self._run = 0
+
+	# Push compliance flag of measured point. Returns True if the sweep is cut
+	def push(self, _flag, _level):
+
+		self.points  += 1
+		self.flagged += int(_flag)
+		self._run = self._run + 1 if _flag else 0
+
+		if self.policy != "continue" and self._run >= self._points:
+			self.cuts.append( float(_level) )
+			return True
+
+		return False
+
+	# Count points which are not measured
+	def skip(self, _count):
+		self.skipped += int(_count)
+
+	# Time saved (s) from measurement time of measured points
+	def saved(self, _time):
+		return float(_time) * self.skipped / max(self.points, 1)
+
+	# Summary for data header
+	def metadata(self, _time):
+
+		return QKeithleyHeader.dumps({
+			"policy" 	: self.policy,
+			"points" 	: self._points,
+			"measured" 	: self.points,
+			"flagged" 	: self.flagged,
+			"skipped" 	: self.skipped,
+			"cuts" 		: self.cuts,
+			"saved" 	: self.saved(_time)
+		})
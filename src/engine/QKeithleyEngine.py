@@ -0,0 +1,1068 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyEngine
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import numpy as np
+
+# Import QVisaDataObject (no Qt dependency)
+from PyQtVisa.utils import QVisaDataObject
+
+# Import acquisition pipeline and buffered readings
+from ..utils.QKeithleyPipeline import QKeithleyPipeline
+from ..utils.QKeithleyBuffer import QKeithleyBuffer
+from ..utils.QKeithleyWelford import QKeithleyWelford
+from ..utils.QKeithleyDecay import QKeithleyDecay
+from ..utils.QKeithleyOCVD import QKeithleyOCVD
+from ..utils.QKeithleyHysteresis import QKeithleyHysteresis
+from ..utils.QKeithleyWaveform import QKeithleyWaveform
+from ..utils.QKeithleyHeader import QKeithleyHeader
+from .QKeithleyCompliance import QKeithleyCompliance
+
+# GUI free measurement engine. Each measurement method drives one or more 
+# keithley2400 driver objects, stores data in a QVisaDataObject and returns 
+# the data key. Front-ends attach via optional callbacks: 
+#
+#	_running()			: measurement continues while True (abort flag)
+#	_on_start(key)		: called once the data key has been generated
+#	_on_point(key, row)	: called for each stored row (dict of subkey values)
+#
+# Loop parameters (delay, gain, amplitude ...) may be passed as values or as 
+# callables, in which case they are read on every iteration. This allows the 
+# GUI to tune parameters while a measurement is running.
+#
+# Sweep, step, bias and PV sweep loops are pipelined (QKeithleyPipeline). The 
+# measurement thread only sets levels and reads raw readings; parsing, storage 
+# and _on_point run as downstream stages, so the next point is acquired while 
+# the previous one is processed. _on_point is called in the order points were 
+# acquired, and all points are processed before the method returns. Pass 
+# _pipeline=False to process each point in the measurement thread.
+#
+# Sweep and PV sweep loops accept a burst size (_burst). Each point is then 
+# acquired as a block of _burst buffered readings in one bus transaction 
+# and reduced to the mean V and I, with the standard deviation, minimum and 
+# maximum stored in the burst statistics columns.
+#
+# Pulsed sweeps (sweep_pulse) are timed by the insturment trigger model and 
+# read back in blocks, so pulse width and off-time do not depend on the bus 
+# or on the measurement thread.
+#
+# Sweep loops store the compliance flag of each point (status bit 3) in the 
+# CMPL column. If a QKeithleyCompliance policy is passed (_compliance), the 
+# sweep is cut short once the device stays in compliance.
+#
+# Hysteresis sweeps (more than one segment in the sweep plan) are tagged with 
+# the segment of each point in the SEG column. The forward and reverse 
+# branches are compared after the run and the result is stored in the 
+# __hysteresis__ header.
+class QKeithleyEngine:
+
+	# Burst statistics subkeys
+	burst = ["Vstd", "Vmin", "Vmax", "Istd", "Imin", "Imax"]
+
+	def __init__(self, _data=None, _pipeline=True):
+
+		# Data object to store measurement data
+		self.data = QVisaDataObject.QVisaDataObject() if _data is None else _data
+		self.pipeline = _pipeline
+
+	#####################################
+	#  SWEEP PLANS
+	#
+
+	# Generate sweep levels. Hysteresis modes are "None", "Reverse-sweep" 
+	# and "Zero-centered"
+	@staticmethod
+	def sweep_plan(start, stop, npts, hist="None"):
+
+		# Create a linspace
+		sp = np.linspace(float(start), float(stop), int(npts) )
+
+		# Prepare reverse sweep
+		if hist == "Reverse-sweep":
+			sp = np.concatenate( (sp, sp[-2::-1]) )
+
+		# Prepare a zero centered hysteresis
+		if hist == "Zero-centered":
+
+			# Extract positive and negative slices
+			pos = sp[ sp > 0 ]
+			neg = sp[ sp < 0 ]
+
+			# Create the zero centered hysteresis re-insert zeros
+			# Forward sweep, zero crossing
+			if (start < 0.) and (stop > 0.) and (start < stop):
+				sp = np.concatenate( ([0.0], pos, pos[-2::-1], [0.0], neg[::-1], neg[1::], [0.0]) )
+
+		 	# Reverse sweep, zero crossing
+			elif  (start > 0.) and (stop < 0.) and (start > stop):	
+				sp = np.concatenate( ([0.0], neg, neg[-2::-1], [0.0], pos[::-1], pos[1::], [0.0]) )
+
+			# If not zero crossing, default to "Reverse-sweep" case
+			else: 	
+				sp = np.concatenate( (sp, sp[-2::-1]) )	
+
+		return sp
+
+	# Tag each level of a sweep plan with its segment. A new segment starts 
+	# whenever the sweep direction reverses, so hysteresis plans have more 
+	# than one segment
+	@staticmethod
+	def sweep_segments(levels):
+
+		_d = np.sign( np.diff( np.asarray(levels, dtype=float) ) )
+
+		if len(_d) == 0:
+			return np.zeros(1, dtype=int)
+
+		# Repeated levels continue the previous direction
+		_d = _d[ np.maximum.accumulate( np.where( _d != 0, np.arange( len(_d) ), 0 ) ) ]
+
+		# First level belongs to first step
+		return np.concatenate( ([0, 0], np.cumsum( _d[1:] != _d[:-1] )) )
+
+	# Generate step levels 
+	@staticmethod
+	def step_plan(start, stop, npts):
+		return np.linspace(float(start), float(stop), int(npts) )
+
+	#####################################
+	#  ENGINE HELPERS
+	#
+
+	# Evaluate a parameter passed as value or callable
+	def _value(self, _param):
+		return _param() if callable(_param) else _param
+
+	# Check abort flag
+	def _check(self, _running):
+		return True if _running is None else bool( _running() )
+
+	# Tag hysteresis sweep with plan segments (SEG) and analyse branches. The 
+	# tags are truncated to the points measured (aborted or cut sweeps)
+	def _hysteresis(self, key, _mode, _levels):
+
+		_seg = self.sweep_segments(_levels)
+		_n = len( self.data.get_subkey_data(key, "V") )
+
+		if _seg[-1] == 0 or _n == 0:
+			return
+
+		self.data.add_subkey(key, "SEG")
+		self.data.set_subkey_data(key, "SEG", _seg[:_n].tolist())
+
+		try:
+			self.sweep_hysteresis(key, _mode)
+
+		except ValueError:
+			pass
+
+	# Invoke optional callback
+	def _call(self, __func__, *args):
+		if __func__ is not None:
+			__func__(*args)
+
+	# Generate data key with subkeys and type
+	def _gen_key(self, _type, _subkeys):
+
+		key = self.data.add_hash_key(_type)
+		self.data.set_subkeys(key, _subkeys)
+		self.data.set_metadata(key, "__type__", _type)
+		return key
+
+	# Append a row (dict) of values to data key
+	def _append(self, key, _row):
+
+		for _subkey, _value in _row.items():
+			self.data.append_subkey_data(key, _subkey, _value)
+
+		return _row
+
+	# Generate pipeline for data key. _parse maps a raw item to a list of 
+	# rows, which are then stored and passed to _on_point
+	def _gen_pipeline(self, key, _parse, _on_point):
+
+		def _store(_rows):
+			return [ self._append(key, _row) for _row in _rows ]
+
+		def _point(_rows):
+			for _row in _rows:
+				self._call(_on_point, key, _row)
+			return _rows
+
+		return QKeithleyPipeline([_parse, _store, _point], _threaded=self.pipeline)
+
+	# Reduce a block of readings (n, 5) to mean V and I and burst statistics. 
+	# _sign = -1.0 reports the current as photocurrent
+	def _reduce(self, _block, _sign=1.0):
+
+		_vi = _block[:, :2] * np.array([1.0, _sign])
+		_mean, _min, _max = _vi.mean(axis=0), _vi.min(axis=0), _vi.max(axis=0)
+		_std = _vi.std(axis=0, ddof=1) if len(_vi) > 1 else np.zeros(2)
+
+		return {
+			"V" 	: float(_mean[0]), 
+			"I" 	: float(_mean[1]), 
+			"P" 	: float(_mean[0] * _mean[1]), 
+			"Vstd" 	: float(_std[0]), 
+			"Vmin" 	: float(_min[0]), 
+			"Vmax" 	: float(_max[0]), 
+			"Istd" 	: float(_std[1]), 
+			"Imin" 	: float(_min[1]), 
+			"Imax" 	: float(_max[1])
+		}
+
+	# Configure burst acquisition. Returns buffer (None for single readings)
+	def _gen_burst(self, _device, _burst):
+
+		if int(_burst) <= 1:
+			return None
+
+		_buffer = QKeithleyBuffer(_device)
+		_buffer.configure(_burst, _fast=False)
+		return _buffer
+
+	# Get source function for mode ("Voltage" or "Current")
+	def source(self, _device, _mode):
+		return _device.set_voltage if _mode == "Voltage" else _device.set_current
+
+	# Configure source mode, zero the level and set compliance
+	def configure(self, _device, _mode, _cmpl):
+
+		if _mode == "Voltage":
+			_device.voltage_src()
+			_device.set_voltage(0.0)
+			_device.current_cmp(_cmpl)
+
+		if _mode == "Current":
+			_device.current_src()
+			_device.set_current(0.0)
+			_device.voltage_cmp(_cmpl)
+
+	#####################################
+	#  IV-CHARACTERIZATION
+	#
+
+	# Single device sweep over levels. If a QKeithleyAdaptive is passed, the 
+	# integration time is selected per point and stored in the NPLC column. 
+	# With _burst > 1 each point is the mean of a burst of readings
+	def sweep(self, _device, _mode, _levels, _delay=0.0, _running=None, _on_start=None, _on_point=None, _adaptive=None, _burst=1, _compliance=None):
+
+		_buffer = self._gen_burst(_device, _burst)
+
+		key = self._gen_key("iv-sweep", ["t", "V", "I", "P", "CMPL"] + 
+			( [] if _buffer is None else self.burst ) + ( [] if _adaptive is None else ["NPLC"] ) )
+		self._call(_on_start, key)
+
+		if _buffer is not None:
+			self.data.set_metadata(key, "__burst__", _buffer.count())
+
+		# Parse raw reading into row
+		def _parse(_item):
+
+			if _buffer is not None:
+				_row = dict( {"t" : _item[0]}, **self._reduce( _buffer.parse(_item[1]) ) )
+
+			else:
+				_b = _item[1].split(",")
+				_row = {
+					"t"	: _item[0],
+					"V"	: float(_b[0]),
+					"I"	: float(_b[1]),
+					"P"	: float(_b[0]) * float(_b[1])
+				}
+
+			_row["CMPL"] = QKeithleyCompliance.flag(_item[1])
+
+			if _adaptive is not None:
+				_row["NPLC"] = _item[2]
+
+			return [_row]
+
+		_pipe = self._gen_pipeline(key, _parse, _on_point)
+
+		# Function pointer for voltage/current mode
+		__func__ = self.source(_device, _mode)
+
+		# Output on
+		start = time.time()
+		_device.output_on()
+
+		if _compliance is not None:
+			_compliance.reset()
+
+		try:
+
+			# Loop through sweep variables
+			for _n, _bias in enumerate(_levels):
+
+				if not ( self._check(_running) and _pipe.ok() ):
+					break
+
+				# Set voltage/current bias and get data from buffer
+				__func__(_bias)
+				if _adaptive is not None:
+					_b = _adaptive.meas(_device, _mode)
+
+				else:
+					_b = _device.meas() if _buffer is None else _buffer.read_raw()
+
+				if self._value(_delay) != 0: 
+					time.sleep(self._value(_delay))
+
+				_pipe.put( ( float(time.time() - start), ) + ( (_b,) if _adaptive is None else _b ) )
+
+				# Cut sweep on compliance
+				if _compliance is not None and _compliance.push( QKeithleyCompliance.flag(_b if _adaptive is None else _b[0]), _bias ):
+					_compliance.skip( len(_levels) - _n - 1 )
+					break
+
+			# Reset Keithley
+			__func__(0.0)
+			_device.output_off()
+
+		# Restore trigger model and integration time and process remaining points
+		finally:
+
+			if _buffer is not None:
+				_buffer.reset()
+
+			if _adaptive is not None:
+				_adaptive.close(_device)
+				self.data.set_metadata(key, "__nplc__", _adaptive.metadata())
+
+			if _compliance is not None:
+				self.data.set_metadata(key, "__compliance__", _compliance.metadata(time.time() - start))
+
+			_pipe.close()
+
+		self._hysteresis(key, _mode, _levels)
+		return key
+
+	# Forward/reverse analysis of a hysteresis sweep tagged with plan segments 
+	# (QKeithleyHysteresis). Branches are compared in I(V) for voltage sweeps 
+	# and V(I) for current sweeps. The summary is stored in the __hysteresis__ 
+	# header. Returns summary (dict)
+	def sweep_hysteresis(self, key, _mode):
+
+		_x, _y = ("V", "I") if _mode == "Voltage" else ("I", "V")
+
+		_summary = QKeithleyHysteresis.analyse( 
+			self.data.get_subkey_data(key, _x), self.data.get_subkey_data(key, _y), self.data.get_subkey_data(key, "SEG") )
+
+		self.data.set_metadata(key, "__hysteresis__", QKeithleyHeader.dumps(_summary))
+		return _summary
+
+	# Repeated sweep statistics. The sweep is repeated _repeats times and each 
+	# complete sweep is folded into running per-point mean and standard 
+	# deviation (QKeithleyWelford). Only the aggregates are stored, so memory 
+	# does not grow with the number of repeats. With _keep > 0 every _keep-th 
+	# raw sweep is stored in the V_<n> and I_<n> columns. _on_sweep(key, n) is 
+	# called after each sweep has been folded. Incomplete (aborted, or cut by 
+	# the compliance policy) sweeps are discarded and end the run.
+	def sweep_repeat(self, _device, _mode, _levels, _repeats, _delay=0.0, _running=None, _on_start=None, _on_sweep=None, _keep=0, _adaptive=None, _burst=1, _compliance=None):
+
+		key = self._gen_key("iv-sweep-repeat", ["V", "I", "Vstd", "Istd"])
+		self._call(_on_start, key)
+
+		_v, _i = QKeithleyWelford(), QKeithleyWelford()
+
+		for _n in range( int(_repeats) ):
+
+			if not self._check(_running):
+				break
+
+			# Sweep into scratch data object
+			engine = QKeithleyEngine(None, self.pipeline)
+			_key = engine.sweep(_device, _mode, _levels, _delay, _running, None, None, _adaptive, _burst, _compliance)
+
+			_sweep_v = engine.data.get_subkey_data(_key, "V")
+			_sweep_i = engine.data.get_subkey_data(_key, "I")
+
+			if len(_sweep_i) != len(_levels):
+				break
+
+			# Fold sweep into aggregates
+			_v.push(_sweep_v)
+			_i.push(_sweep_i)
+
+			for _subkey, _data in [("V", _v.mean), ("I", _i.mean), ("Vstd", _v.std()), ("Istd", _i.std())]:
+				self.data.set_subkey_data(key, _subkey, _data.tolist())
+
+			# Decimated raw sweeps
+			if _keep > 0 and _n % int(_keep) == 0:
+				for _subkey, _data in [("V_%d"%_n, _sweep_v), ("I_%d"%_n, _sweep_i)]:
+					self.data.add_subkey(key, _subkey)
+					self.data.set_subkey_data(key, _subkey, list(_data))
+
+			self.data.set_metadata(key, "__repeats__", _i.count)
+
+			if _compliance is not None:
+				self.data.set_metadata(key, "__compliance__", engine.data.get_metadata(_key, "__compliance__"))
+			self._call(_on_sweep, key, _n)
+
+		self._hysteresis(key, _mode, _levels)
+		return key
+
+	# Sweep over levels on sweep device for each voltage step on step device. 
+	# _on_step(key, n) is called at the start of each step. The compliance 
+	# policy applies to the sweep device ("skip" continues with the next step)
+	def sweep_step(self, _sweep, _step, _mode, _levels, _steps, _delay=0.0, _running=None, _on_start=None, _on_point=None, _on_step=None, _compliance=None):
+
+		key = self._gen_key("iv-sweep-v-step", ["t", "V0", "I0", "P0", "CMPL0", "V1", "I1", "P1", "CMPL1"])
+		self._call(_on_start, key)
+
+		# Parse raw readings into row
+		def _parse(_item):
+
+			_t, _b0, _b1 = _item[0], _item[1].split(","), _item[2].split(",")
+			return [{
+				"t"		: _t,
+				"V0"	: float(_b0[0]),
+				"I0"	: float(_b0[1]),
+				"P0"	: float(_b0[0]) * float(_b0[1]),
+				"CMPL0"	: QKeithleyCompliance.flag(_item[1]),
+				"V1"	: float(_b1[0]),
+				"I1"	: float(_b1[1]),
+				"P1"	: float(_b1[0]) * float(_b1[1]),
+				"CMPL1"	: QKeithleyCompliance.flag(_item[2])
+			}]
+
+		_pipe = self._gen_pipeline(key, _parse, _on_point)
+
+		# Function pointer for voltage/current mode
+		__func__ = self.source(_sweep, _mode)
+
+		# Output on
+		start = time.time()
+		_step.output_on()
+		_sweep.output_on()
+
+		try:
+
+			# Loop through step variables
+			for _n, _level in enumerate(_steps):
+
+				if not ( self._check(_running) and _pipe.ok() ):
+					break
+
+				# Set step voltage. Step callback runs in order with points
+				_step.set_voltage(_level)
+				_pipe.call(self._call, _on_step, key, _n)
+
+				# Bias settle
+				if self._value(_delay) != 0: 
+					time.sleep(self._value(_delay))
+
+				if _compliance is not None:
+					_compliance.reset()
+
+				# Loop through sweep variables
+				_cut = False
+				for _m, _bias in enumerate(_levels):
+
+					if not ( self._check(_running) and _pipe.ok() ):
+						break
+
+					# Set voltage/current bias and get data from buffers
+					__func__(_bias)
+					_b0 = _sweep.meas()
+					_b1 = _step.meas()
+
+					if self._value(_delay) != 0: 
+						time.sleep(self._value(_delay))
+
+					_pipe.put( ( float(time.time() - start), _b0, _b1 ) )
+
+					# Cut sweep on compliance
+					if _compliance is not None and _compliance.push( QKeithleyCompliance.flag(_b0), _bias ):
+						_compliance.skip( len(_levels) - _m - 1 )
+						_cut = True
+						break
+
+				# Stop policy skips the remaining steps
+				if _cut and _compliance.policy == "stop":
+					_compliance.skip( ( len(_steps) - _n - 1 ) * len(_levels) )
+					break
+
+			# Reset Keithleys
+			__func__(0.0)
+			_step.set_voltage(0.0)
+			_step.output_off()
+			_sweep.output_off()
+
+		# Process remaining points
+		finally:
+
+			if _compliance is not None:
+				self.data.set_metadata(key, "__compliance__", _compliance.metadata(time.time() - start))
+
+			_pipe.close()
+
+		return key
+
+	# Push compliance flags of a block of pulse readings. Returns True on cut
+	def _pulse_cut(self, _compliance, _block, _pulse):
+
+		for _p, _bias in zip(_block, _pulse):
+			if _compliance.push( int( int(_p[4]) & QKeithleyCompliance.bit != 0 ), _bias ):
+				return True
+
+		return False
+
+	# Pulsed sweep. Each level is applied as a pulse from the base level _base 
+	# with timing by the instrument trigger model. The source list alternates 
+	# pulse and base levels and each arm event triggers one pulse and one base 
+	# reading. Readings are taken after the source delay _on, so the pulse is 
+	# longer than _on by the integration time. The arm timer sets the pulse 
+	# period to _on + _off (at least two reading cycles). Pulses are acquired 
+	# in blocks (source list size) and each block is read back in one bus 
+	# transaction. The base reading after each pulse is stored in Vbase and 
+	# Ibase, and the pulse width and off-time measured from the hardware 
+	# timestamps are stored in the __on__ and __off__ headers. The compliance 
+	# policy is applied after each block.
+	def sweep_pulse(self, _device, _mode, _levels, _base, _on, _off, _running=None, _on_start=None, _on_point=None, _compliance=None):
+
+		key = self._gen_key("iv-sweep-pulse", ["t", "V", "I", "P", "CMPL", "Vbase", "Ibase"])
+		self._call(_on_start, key)
+
+		self.data.set_metadata(key, "__base__", float(_base))
+
+		# Pulses per block. The block must complete within the VISA timeout
+		_period = float(_on) + float(_off)
+		_count = max( min( QKeithleyWaveform.max_list // 2, int( QKeithleyWaveform.max_list_time / max(_period, 1e-9) ) ), 1 )
+
+		# Parse block of pulse and base readings into rows
+		def _parse(_item):
+
+			_t, _block = _item
+			return [{
+				"t"		: float(_t[_n]),
+				"V"		: float(_p[0]),
+				"I"		: float(_p[1]),
+				"P"		: float(_p[0] * _p[1]),
+				"CMPL"	: int( int(_p[4]) & QKeithleyCompliance.bit != 0 ),
+				"Vbase"	: float(_b[0]),
+				"Ibase"	: float(_b[1])
+			} for _n, ( _p, _b ) in enumerate( zip(_block[0::2], _block[1::2]) ) ]
+
+		_pipe = self._gen_pipeline(key, _parse, _on_point)
+
+		# Source list and trigger model (one pulse and one base reading per arm 
+		# event). The output waits at the base level between blocks
+		_src = "VOLT" if _mode == "Voltage" else "CURR"
+		_buffer = QKeithleyBuffer(_device)
+
+		# Pulse width and off-time from hardware timestamps
+		_width, _gap = [], []
+
+		if _compliance is not None:
+			_compliance.reset()
+
+		start = time.time()
+
+		try:
+
+			_buffer.configure(2)
+			_buffer.source_delay(float(_on))
+			_device.write(":ARM:SOUR TIM")
+			_device.write(":ARM:TIM %s"%_period)
+
+			# Output on at base level
+			self.source(_device, _mode)(_base)
+			_device.output_on()
+
+			for _n in range(0, len(_levels), _count):
+
+				if not ( self._check(_running) and _pipe.ok() ):
+					break
+
+				_pulse = np.asarray(_levels[_n:_n + _count], dtype=float)
+				_list  = np.column_stack( ( _pulse, np.full( len(_pulse), float(_base) ) ) ).ravel()
+
+				_device.write(":SOUR:%s:MODE LIST"%_src)
+				_device.write(":SOUR:LIST:%s %s"%( _src, ",".join( ["%s"%_l for _l in _list] ) ) )
+				_device.write(":ARM:COUN %d"%len(_pulse))
+
+				# Acquire block
+				_now   = float(time.time() - start)
+				_block = _buffer.read()
+				_t = _buffer.stitch(_block[:, 3], _now)
+
+				_width.extend( ( _t[1::2] - _t[0::2] ).tolist() )
+				_gap.extend( np.diff( _t[0::2] ).tolist() )
+
+				_pipe.put( ( _t[0::2], _block ) )
+
+				# Cut sweep on compliance. Pulses of the block after the cut 
+				# have been measured and are stored
+				if _compliance is not None and self._pulse_cut(_compliance, _block[0::2], _pulse):
+					_compliance.skip( len(_levels) - _n - len(_pulse) )
+					break
+
+		# Restore trigger model, reset Keithley and process remaining points. 
+		# Also runs on instrument errors during setup
+		finally:
+
+			_device.write(":ARM:SOUR IMM")
+			_device.write(":ARM:COUN 1")
+			_device.write(":SOUR:%s:MODE FIX"%_src)
+			_buffer.reset()
+
+			self.source(_device, _mode)(0.0)
+			_device.output_off()
+
+			# A base reading cycle is as long as a pulse reading cycle 
+			if len(_width) > 0:
+				self.data.set_metadata(key, "__on__", float( np.median(_width) ))
+
+			if len(_gap) > 0:
+				self.data.set_metadata(key, "__off__", float( np.median(_gap) - np.median(_width) ))
+
+			if _compliance is not None:
+				self.data.set_metadata(key, "__compliance__", _compliance.metadata(time.time() - start))
+
+			_pipe.close()
+
+		self._hysteresis(key, _mode, _levels)
+		return key
+
+	#####################################
+	#  BIAS MODE
+	#
+
+	# Hold constant bias and sample. The output must be on and the level set. 
+	# If a QKeithleyDeadband filter is passed, samples are stored in deadband 
+	# recording mode. Runs until aborted or for _duration (s).
+	def bias(self, _device, _mode, _delay=0.0, _running=None, _on_start=None, _on_point=None, _duration=None, _deadband=None):
+
+		_type = "v-bias" if _mode == "Voltage" else "i-bias"
+		key = self._gen_key(_type, ["t", "V", "I", "P"])
+		self._call(_on_start, key)
+
+		# Parse raw reading into rows to store (deadband filter)
+		def _parse(_item):
+
+			_b = _item[1].split(",")
+			_samples = [ ( _item[0], float(_b[0]), float(_b[1]) ) ]
+
+			if _deadband is not None:
+				_samples = _deadband.push(*_samples[0])
+
+			return [ {"t" : _t, "V" : _v, "I" : _i, "P" : _v * _i} for _t, _v, _i in _samples ]
+
+		_pipe = self._gen_pipeline(key, _parse, _on_point)
+
+		start = time.time()
+
+		try:
+
+			# Thread loop
+			while self._check(_running) and _pipe.ok():
+
+				if _duration is not None and ( time.time() - start ) >= _duration:
+					break
+
+				# Get data from buffer
+				_b = _device.meas()
+
+				# Measurement delay 
+				if self._value(_delay) != 0: 
+					time.sleep(self._value(_delay))
+
+				_pipe.put( ( float(time.time() - start), _b ) )
+
+		# Process remaining samples
+		finally:
+			_pipe.close()
+
+		# Flush deadband filter and store reconstruction metadata
+		if _deadband is not None:
+
+			for _t, _v, _i in _deadband.flush():
+				self._call(_on_point, key, self._append(key, {"t" : _t, "V" : _v, "I" : _i, "P" : _v * _i}))
+
+			for _key, _value in _deadband.metadata().items():
+				self.data.set_metadata(key, _key, _value)
+
+		return key
+
+	# Transient capture after a bias step. The output must be on and at the 
+	# initial level. The trigger count is set to _count (fast mode) at 
+	# integration time _nplc, and the hardware timestamp is reset immediately 
+	# before the level is stepped to _level. All readings are then acquired 
+	# in one :READ? transaction, so t is the instrument time since the step. 
+	# The output stays at _level and the integration time is restored to 
+	# _restore afterwards. Returns data key.
+	def transient(self, _device, _mode, _level, _count, _nplc=0.01, _restore=1.0, _on_start=None):
+
+		_type = "v-transient" if _mode == "Voltage" else "i-transient"
+		key = self._gen_key(_type, ["t", "V", "I"])
+		self._call(_on_start, key)
+
+		_buffer = QKeithleyBuffer(_device)
+		_buffer.configure(_count)
+		_device.update_nplc(_nplc)
+
+		try:
+
+			# Reset timestamp, step and capture
+			_device.write(":SYST:TIME:RES")
+			self.source(_device, _mode)(_level)
+			_block = _buffer.read()
+
+		finally:
+			_buffer.reset()
+			_device.update_nplc(_restore)
+
+		self.data.set_subkey_data(key, "t", _block[:, 3].tolist())
+		self.data.set_subkey_data(key, "V", _block[:, 0].tolist())
+		self.data.set_subkey_data(key, "I", _block[:, 1].tolist())
+		self.data.set_metadata(key, "__level__", float(_level))
+		self.data.set_metadata(key, "__nplc__", float(_nplc))
+
+		return key
+
+	# Single exponential fit (QKeithleyDecay) of the measured quantity of a 
+	# transient (current in voltage mode). Does not access the device, so 
+	# front-ends may run it in a background thread. The fit is stored in the 
+	# __fit__ header. Returns fit (dict)
+	def transient_fit(self, key):
+
+		_col = "I" if self.data.get_metadata(key, "__type__") == "v-transient" else "V"
+
+		_fit = QKeithleyDecay.fit( self.data.get_subkey_data(key, "t"), self.data.get_subkey_data(key, _col) )
+		self.data.set_metadata(key, "__fit__", QKeithleyHeader.dumps(_fit))
+		return _fit
+
+	#####################################
+	#  PV-CHARACTERIZATION
+	#
+
+	# PV sweep (voltage source). Current is reported as photocurrent (-I). 
+	# With _burst > 1 each point is the mean of a burst of readings
+	def iv(self, _device, _levels, _cmpl, _running=None, _on_start=None, _on_point=None, _burst=1):
+
+		_buffer = self._gen_burst(_device, _burst)
+
+		key = self._gen_key("pv-bias", ["t", "V", "I", "P"] + ( [] if _buffer is None else self.burst ) )
+		self._call(_on_start, key)
+
+		if _buffer is not None:
+			self.data.set_metadata(key, "__burst__", _buffer.count())
+
+		# Parse raw reading into row
+		def _parse(_item):
+
+			if _buffer is not None:
+				return [ dict( {"t" : _item[0]}, **self._reduce( _buffer.parse(_item[1]), -1.0 ) ) ]
+
+			_t, _b = _item[0], _item[1].split(",")
+			return [{
+				"t"	: _t,
+				"V"	: float(_b[0]),
+				"I"	: -1.0 * float(_b[1]),
+				"P"	: -1.0 * float(_b[1]) * float(_b[0])
+			}]
+
+		_pipe = self._gen_pipeline(key, _parse, _on_point)
+
+		# Output on
+		start = time.time()
+		_device.voltage_src()
+		_device.current_cmp(_cmpl)
+		_device.output_on()
+
+		try:
+
+			# Loop through sweep parameters
+			for _bias in _levels: 
+
+				if not ( self._check(_running) and _pipe.ok() ):
+					break
+
+				# Set bias and get data from buffer
+				_device.set_voltage(_bias)
+				_b = _device.meas() if _buffer is None else _buffer.read_raw()
+
+				_pipe.put( ( float(time.time() - start), _b ) )
+
+			_device.set_voltage(0.0)
+			_device.output_off()
+
+		# Restore trigger model and process remaining points
+		finally:
+
+			if _buffer is not None:
+				_buffer.reset()
+
+			_pipe.close()
+
+		return key
+
+	# Open circuit voltage tracking. Bias is adjusted by _gain (1/1000) until 
+	# the current is below _conv (or for 3s) on each iteration.
+	def voc(self, _device, _bias, _cmpl, _conv, _gain, _delay=0.0, _running=None, _on_start=None, _on_point=None, _duration=None):
+
+		key = self._gen_key("pv-voc", ["t", "Voc", "Ioc"])
+		self._call(_on_start, key)
+
+		# Set bias to initial value in volts and turn output ON
+		start = time.time()
+		_device.set_voltage(_bias)
+		_device.current_cmp(_cmpl)
+		_device.output_on()
+
+		# Thread loop
+		while self._check(_running):
+
+			if _duration is not None and ( time.time() - start ) >= _duration:
+				break
+
+			# Iteration timer
+			_iter_start = float(time.time())
+
+			# Convergence loop
+			while True:
+				
+				# Get data from buffer
+				_b = _device.meas().split(",")
+				
+				# Check if current is below convergence value
+				if abs( float(_b[1]) ) <= float( self._value(_conv) ):
+					break
+				
+				# If convergence takes too long paint a value
+				elif float( time.time() - _iter_start ) >= 3.0:
+					break
+
+				# Otherwise, adjust the voltage proportionally
+				else:
+
+					# Create 1mV sense amplitude
+					_v, _i = np.add(float(_b[0]), np.linspace(-0.0005, 0.0005, 3)), []
+					
+					# Measure current over sense amplitude array
+					for _ in _v:
+						_device.set_voltage(_)
+						_i.append( -1.0 * float( _device.meas().split(",")[1] ) )
+
+					# Adjust bias in direction of lower current. If 
+					# current is positive (photo-current) increase voltage
+					_g = float( self._value(_gain) / 1000. )
+					_device.set_voltage( float(_b[0]) * ( 1.0 + _g if np.mean(_i) >= 0.0 else 1.0 - _g ) )
+
+			# Append measured values to data arrays
+			_row = self._append(key, {
+				"t"		: float(time.time() - start),
+				"Voc"	:  1.0 * float(_b[0]),
+				"Ioc"	: -1.0 * float(_b[1])
+			})
+			self._call(_on_point, key, _row)
+
+			# Measurement delay	
+			if self._value(_delay) != 0: 
+				time.sleep(self._value(_delay))
+
+		# Cleanup after thread termination
+		_device.set_voltage(0.0)
+		_device.output_off()	
+
+		return key
+
+	# Maximum power point tracking. Perturbs bias over +/- _ampl and adjusts 
+	# bias by _gain (1/1000) in the direction of increasing power.
+	def mpp(self, _device, _bias, _cmpl, _ampl, _gain, _delay=0.0, _running=None, _on_start=None, _on_point=None, _duration=None):
+
+		key = self._gen_key("pv-mpp", ["t", "Vmpp", "Impp", "Pmpp"])
+		self._call(_on_start, key)
+
+		# Set bias to initial value in volts and turn output ON
+		start = time.time()
+		_device.set_voltage(_bias)
+		_device.current_cmp(_cmpl)
+		_device.output_on()
+
+		# Thread loop
+		while self._check(_running):
+
+			if _duration is not None and ( time.time() - start ) >= _duration:
+				break
+
+			# Iteration timer
+			_iter_start = float(time.time())
+
+			# Convergence loop
+			while True:
+				
+				# Get data from buffer
+				_b = _device.meas().split(",")
+				
+				# Paint a value after 3s
+				if float( time.time() - _iter_start ) >= 3.0:
+					break
+
+				# Sense amplitude array
+				_amplitude = float( self._value(_ampl) )
+				_v, _i = np.add(float(_b[0]), np.linspace(-1.0 * _amplitude, _amplitude, 5)), []
+
+				# Measure current over sense amplitude array
+				for _ in _v:
+					_device.set_voltage(_)
+					_i.append( -1.0 * float( _device.meas().split(",")[1] ) )
+
+				# Calculate derivative
+				_d = np.divide( np.gradient( np.multiply(_i, _v) ), _amplitude )
+
+				# Differential gain controller
+				_g = float( self._value(_gain) / 1000. )
+				_device.set_voltage( float(_b[0]) * ( 1.0 - _g if np.mean(_d) <= 0.0 else 1.0 + _g ) )
+
+			# Append measured values to data arrays
+			_row = self._append(key, {
+				"t"		: float(time.time() - start),
+				"Vmpp"	:  1.0 * float(_b[0]),
+				"Impp"	: -1.0 * float(_b[1]),
+				"Pmpp"	: -1.0 * float(_b[1]) * float(_b[0])
+			})
+			self._call(_on_point, key, _row)
+
+			# Measurement delay	
+			if self._value(_delay) != 0: 
+				time.sleep(self._value(_delay))
+
+		# Cleanup after thread termination
+		_device.set_voltage(0.0)
+		_device.output_off()	
+
+		return key
+
+	# Open-circuit voltage decay. The device is held at open circuit (0A 
+	# current source) and a burst of _count voltage readings at integration 
+	# time _nplc is captured into the trace buffer. With the "Software" 
+	# trigger the capture starts on :INIT, the light is held on by the digital 
+	# output lines (:SOUR2:TTL) for _soak seconds before and switched off 
+	# after :INIT, and _on_trigger() is called so front-ends may switch the 
+	# light by other means. With the "External" trigger the capture is armed 
+	# on trigger link input _line (light source trigger output). The buffer 
+	# is polled until full and fetched in one transaction. t is instrument 
+	# time since the first reading. Returns data key.
+	def ocvd(self, _device, _count, _nplc=0.01, _trigger="Software", _line=1, _cmpl=2.0, _soak=0.0, _restore=1.0, _running=None, _on_start=None, _on_trigger=None):
+
+		key = self._gen_key("ocvd", ["t", "V", "I"])
+		self._call(_on_start, key)
+
+		# Open circuit
+		_device.current_src()
+		_device.set_current(0.0)
+		_device.voltage_cmp(_cmpl)
+
+		_buffer = QKeithleyBuffer(_device)
+		_buffer.configure(_count)
+		_device.update_nplc(_nplc)
+
+		# Trace buffer (filled from :INIT)
+		_device.write(":TRAC:CLE")
+		_device.write(":TRAC:POIN %d"%_buffer.count())
+		_device.write(":TRAC:FEED SENS")
+		_device.write(":TRAC:FEED:CONT NEXT")
+
+		if _trigger == "External":
+			_device.write(":ARM:SOUR TLIN")
+			_device.write(":ARM:ILIN %d"%int(_line))
+
+		_device.output_on()
+
+		try:
+
+			# Light soak
+			if _trigger == "Software":
+
+				_device.write(":SOUR2:TTL 15")
+				_soak = time.time() + float(_soak)
+
+				while self._check(_running) and time.time() < _soak:
+					time.sleep(0.01)
+
+			# Arm capture and switch light off (unless aborted during soak)
+			_n = 0
+			if self._check(_running):
+
+				_device.write(":INIT")
+
+				if _trigger == "Software":
+					_device.write(":SOUR2:TTL 0")
+					self._call(_on_trigger)
+
+				# Wait for buffer (or abort)
+				_n = int( float( _device.query(":TRAC:POIN:ACT?") ) )
+
+				while _n < _buffer.count():
+
+					if not self._check(_running):
+						_device.write(":ABOR")
+						break
+
+					time.sleep(0.01)
+					_n = int( float( _device.query(":TRAC:POIN:ACT?") ) )
+
+			_block = _buffer.parse( _device.query(":TRAC:DATA?") ) if _n > 0 else np.zeros( (0, 5) )
+
+		# Light off (also on abort during soak), restore trigger model, trace 
+		# and integration time
+		finally:
+
+			if _trigger == "Software":
+				_device.write(":SOUR2:TTL 0")
+
+			_device.write(":ARM:SOUR IMM")
+			_device.write(":TRAC:FEED:CONT NEV")
+			_device.write(":TRAC:CLE")
+			_buffer.reset()
+			_device.update_nplc(_restore)
+			_device.output_off()
+
+		self.data.set_subkey_data(key, "t", ( _block[:, 3] - _block[0, 3] ).tolist() if len(_block) > 0 else [])
+		self.data.set_subkey_data(key, "V", _block[:, 0].tolist())
+		self.data.set_subkey_data(key, "I", _block[:, 1].tolist())
+		self.data.set_metadata(key, "__trigger__", _trigger)
+		self.data.set_metadata(key, "__nplc__", float(_nplc))
+
+		return key
+
+	# Carrier lifetime of an OCVD capture (QKeithleyOCVD). Adds the tau column 
+	# and the time since the onset of decay (tdecay) and stores the summary in 
+	# the __ocvd__ header. Returns summary (dict)
+	def ocvd_lifetime(self, key, _ideality=1.0, _temperature=300.0, _window=5):
+
+		_t, _tau, _summary = QKeithleyOCVD.analyse( 
+			self.data.get_subkey_data(key, "t"), self.data.get_subkey_data(key, "V"), _ideality, _temperature, _window )
+
+		for _subkey, _values in [("tdecay", _t), ("tau", _tau)]:
+			self.data.add_subkey(key, _subkey)
+			self.data.set_subkey_data(key, _subkey, _values.tolist())
+
+		self.data.set_metadata(key, "__ocvd__", QKeithleyHeader.dumps(_summary))
+		return _summary
@@ -0,0 +1,117 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyPrecheck
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import numpy as np
+
+# Import compliance status flag
+from .QKeithleyCompliance import QKeithleyCompliance
+
+# Contact and open-circuit pre-check. Before a sweep the device under test 
+# is biased at _level (V or A, in the source mode of the sweep) and read 
+# _samples times at a short integration time (_nplc). The default level 
+# depends on the source mode (levels). The device is classified from the 
+# resistance R = V/I:
+#
+#	"open"	: R > _open (Ohm), or voltage compliance in current source 
+#			  mode. No contact, or open device
+#	"short"	: R < _short (Ohm). Shorted device or needles
+#	"ok"	: plausible device
+#
+# The level should be chosen so that a plausible device does not reach 
+# compliance. The integration time is set back to _restore (NPLC) and the 
+# output is turned off after the check. With _skip, devices which fail the 
+# check are skipped by the runners, otherwise they are measured and flagged.
+class QKeithleyPrecheck:
+
+	# Default bias level in source mode (V or A)
+	levels = {"Voltage" : 0.1, "Current" : 1e-6}
+
+	def __init__(self, _level=None, _open=1e9, _short=10.0, _samples=2, _nplc=0.01, _restore=1.0, _skip=True):
+
+		self._level = None if _level is None else float(_level)
+		self._open, self._short = float(_open), float(_short)
+		self._samples, self._nplc, self._restore = int(_samples), _nplc, _restore
+		self._skip = bool(_skip)
+
+	# Pre-check from recipe parameter. Either true (defaults) or a dict with 
+	# keys level, open, short, samples, nplc and skip
+	@classmethod
+	def from_recipe(cls, _params, _restore=1.0):
+
+		if _params is True:
+			_params = {}
+
+		_keys = ["level", "open", "short", "samples", "nplc", "skip"]
+		for _key in _params.keys():
+			if _key not in _keys:
+				raise ValueError("unknown precheck parameter (%s)"%_key)
+
+		return cls(_restore=_restore, **{ "_%s"%_key : _value for _key, _value in _params.items() })
+
+	# Skip devices which fail the check
+	def skip(self, _result):
+		return self._skip and _result["state"] != "ok"
+
+	# Classify device. The source mode and compliance must be configured. 
+	# Returns dict of state, mean readings, resistance and check time
+	def check(self, _device, _mode):
+
+		start = time.time()
+		__func__ = _device.set_voltage if _mode == "Voltage" else _device.set_current
+
+		# Fast integration and bias
+		_device.update_nplc(self._nplc)
+		__func__(self.levels[_mode] if self._level is None else self._level)
+		_device.output_on()
+
+		try:
+			_raw = [ _device.meas() for _ in range(self._samples) ]
+			_readings = [ _b.split(",") for _b in _raw ]
+
+		# Output off and restore integration time
+		finally:
+			__func__(0.0)
+			_device.output_off()
+			_device.update_nplc(self._restore)
+
+		_v = float( np.mean( [ float(_b[0]) for _b in _readings ] ) )
+		_i = float( np.mean( [ float(_b[1]) for _b in _readings ] ) )
+		_r = abs( _v / _i ) if _i != 0.0 else float("inf")
+
+		# An open device drives a current source into voltage compliance
+		_cmpl = any( [ QKeithleyCompliance.flag(_b) for _b in _raw ] )
+
+		if _r > self._open or ( _mode == "Current" and _cmpl ):
+			_state = "open"
+
+		elif _r < self._short:
+			_state = "short"
+
+		else:
+			_state = "ok"
+
+		return {"state" : _state, "V" : _v, "I" : _i, "R" : _r, "time" : time.time() - start}
@@ -0,0 +1,118 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyProber
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import numpy as np
+
+# Prober interface for QKeithleySequencer. Drivers for stages or wafer 
+# probers subclass QKeithleyProber and implement the motion methods. Dies 
+# are addressed by (column, row) index on the wafer map.
+class QKeithleyProber:
+
+	# Dies to test in order 
+	def dies(self):
+		raise NotImplementedError
+
+	# Move to die (needles separated)
+	def move(self, _die):
+		raise NotImplementedError
+
+	# Bring needles into contact
+	def contact(self):
+		raise NotImplementedError
+
+	# Separate needles from wafer
+	def separate(self):
+		raise NotImplementedError
+
+	def close(self):
+		pass
+
+# Simulated prober for testing. Dies on a _cols x _rows grid are visited in 
+# serpentine order. Stage motion costs _index (s) per die pitch plus _settle 
+# (s), contact and separation cost _contact (s). 
+#
+# If a QKeithleySimulator is passed, the simulated device under test is 
+# varied from die to die on contact. A fraction _dead of the dies are open 
+# (no contact) and the same fraction are shorted.
+class QKeithleyProberSimulator(QKeithleyProber):
+
+	def __init__(self, _cols=10, _rows=10, _index=0.005, _settle=0.02, _contact=0.01, _device=None, _dead=0.0, _seed=0):
+
+		self._cols, self._rows = int(_cols), int(_rows)
+		self._index, self._settle, self._contact = _index, _settle, _contact
+		self._device, self._dead = _device, _dead
+		self._random = np.random.default_rng(_seed)
+
+		# Stage position and contact state
+		self.position, self.contacted = (0, 0), False
+
+		# Device under test parameters at first contact
+		if self._device is not None:
+			self._params = { _k : getattr(self._device, _k) for _k in ["i0", "nvt", "rs", "rsh", "iph"] }
+
+	# Serpentine wafer map
+	def dies(self):
+		return [ ( _c if _r % 2 == 0 else self._cols - 1 - _c, _r ) for _r in range(self._rows) for _c in range(self._cols) ]
+
+	def move(self, _die):
+
+		if self.contacted:
+			raise RuntimeError("move with needles in contact")
+
+		_steps = abs( _die[0] - self.position[0] ) + abs( _die[1] - self.position[1] )
+		time.sleep( self._index * _steps + self._settle )
+		self.position = tuple(_die)
+
+	def contact(self):
+
+		time.sleep(self._contact)
+		self.contacted = True
+
+		if self._device is not None:
+			self.gen_device()
+
+	def separate(self):
+
+		time.sleep(self._contact)
+		self.contacted = False
+
+	# Vary simulated device under test for die
+	def gen_device(self):
+
+		for _k, _v in self._params.items():
+			setattr(self._device, _k, _v)
+
+		self._device.i0 *= float( np.exp( self._random.normal(0.0, 0.5) ) )
+		self._device.rs *= float( np.exp( self._random.normal(0.0, 0.2) ) )
+
+		# Open (no contact) or shorted die
+		_state = self._random.uniform()
+		if _state < self._dead:
+			self._device.i0, self._device.rsh, self._device.iph = 0.0, 1e15, 0.0
+
+		elif _state < 2.0 * self._dead:
+			self._device.i0, self._device.rsh, self._device.rs = 0.0, 0.1, 0.1
@@ -0,0 +1,137 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyProcess
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import multiprocessing as mp
+
+# Import driver, engine and ring buffer (no Qt dependency)
+from PyQtVisa.drivers import keithley2400
+from .QKeithleyEngine import QKeithleyEngine
+from ..utils.QKeithleyRing import QKeithleyRing
+
+# Ring buffer columns 
+_columns = ["t", "V", "I", "P"]
+
+# Acquisition process target. Opens its own session to the instrument (the 
+# source must already be configured and the output on), runs the engine bias 
+# loop and pushes each stored row into the ring buffer. Deadband metadata 
+# and errors are returned on the result queue.
+def exec_bias_process(_device, _mode, _ring, _stop, _delay, _deadband, _result):
+
+	ring = QKeithleyRing(_ring, _write=True)
+	_meta, _error = {}, None
+
+	try:
+
+		# Open device from VISA resource or factory
+		if isinstance(_device, str):
+
+			_resource, _device = _device, keithley2400.keithley2400(_device)
+			if _device.get_property("inst") is None:
+				raise IOError("device not found (%s)"%_resource)
+
+		else:
+			_device = _device()
+
+		engine = QKeithleyEngine()
+		key = engine.bias(_device, _mode, 
+			lambda: _delay.value, 
+			lambda: not _stop.is_set(), 
+			None, 
+			lambda key, _row: ring.push([ _row[_c] for _c in _columns ]), 
+			None, 
+			_deadband
+		)
+		_meta = { _k : _v for _k, _v in engine.data.meta[key].items() if _k != "__type__" }
+
+	except Exception as e:
+		_error = "%s: %s"%(type(e).__name__, str(e))
+
+	_result.put({"meta" : _meta, "error" : _error})
+	ring.close()
+
+# Runs the bias measurement loop of QKeithleyEngine in a child process. 
+# Samples are handed to the calling process through a shared memory ring 
+# buffer (QKeithleyRing) which the caller maps read-only. Acquisition timing 
+# is therefore independent of the GIL and event loop of the caller. 
+#
+# _device is a VISA resource string or a picklable callable returning a 
+# driver object. The measurement interval can be updated while running.
+class QKeithleyProcess:
+
+	def __init__(self, _device, _mode, _delay=0.0, _deadband=None, _capacity=65536):
+
+		# Spawn (not fork) so the child does not inherit Qt state
+		self._ctx = mp.get_context("spawn")
+
+		self.ring   = QKeithleyRing(None, len(_columns), _capacity)
+		self._stop  = self._ctx.Event()
+		self._delay = self._ctx.Value("d", float(_delay))
+		self._queue = self._ctx.Queue()
+		self._since, self.lost, self.result = 0, 0, None
+
+		self.process = self._ctx.Process(target=exec_bias_process, 
+			args=(_device, _mode, self.ring.name(), self._stop, self._delay, _deadband, self._queue))
+		self.process.daemon = True
+
+	def start(self):
+		self.process.start()
+
+	def is_alive(self):
+		return self.process.is_alive()
+
+	# Update measurement interval 
+	def set_delay(self, _delay):
+		self._delay.value = float(_delay)
+
+	# New rows since last read. Returns dict of column arrays
+	def read(self):
+
+		_rows, self._since, _lost = self.ring.read(self._since)
+		self.lost += _lost
+
+		return { _c : _rows[:, _n] for _n, _c in enumerate(_columns) }
+
+	# Stop acquisition. Returns result dict {"meta" : {...}, "error" : str}
+	def stop(self, _timeout=10.0):
+
+		self._stop.set()
+
+		try:
+			self.result = self._queue.get(timeout=_timeout)
+
+		except Exception:
+			self.result = {"meta" : {}, "error" : "acquisition process did not respond"}
+
+		self.process.join(_timeout)
+		if self.process.is_alive():
+			self.process.terminate()
+
+		return self.result
+
+	# Remove shared memory segment (after final read)
+	def close(self):
+		self.ring.close()
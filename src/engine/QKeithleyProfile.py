@@ -0,0 +1,124 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyProfile
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import numpy as np
+
+# Speed profiles. Each profile sets the instrument settings which trade 
+# accuracy for reading rate together:
+#
+#	azero	: autozero (reference and zero measured on every reading)
+#	range	: "auto" (source and measure autorange) or "fixed" (autorange 
+#			  off. Ranges are derived from the sweep extents and compliance 
+#			  in set_ranges)
+#	delay	: source delay (s) or "auto"
+#	filter	: repeat filter count (0 is off)
+#	display	: front panel display 
+#
+# The "normal" profile corresponds to the instrument reset state.
+class QKeithleyProfile:
+
+	profiles = {
+		"fast" 		: {"azero" : False, "range" : "fixed", "delay" : 0.0, "filter" : 0, "display" : False},
+		"normal" 	: {"azero" : True, "range" : "auto", "delay" : "auto", "filter" : 0, "display" : True},
+		"accurate" 	: {"azero" : True, "range" : "auto", "delay" : "auto", "filter" : 10, "display" : True},
+	}
+
+	# Profile names
+	@classmethod
+	def get_profiles(cls):
+		return list( cls.profiles.keys() )
+
+	# Profile uses fixed ranges
+	@classmethod
+	def is_fixed(cls, _name):
+		return cls.profiles.get(_name, cls.profiles["normal"])["range"] == "fixed"
+
+	# Apply speed profile to device
+	@classmethod
+	def set_profile(cls, _device, _name):
+
+		_profile = cls.profiles[_name]
+
+		_device.write(":SYST:AZER:STAT %s"%( "ON" if _profile["azero"] else "OFF" ))
+
+		# Source delay
+		if _profile["delay"] == "auto":
+			_device.write(":SOUR:DEL:AUTO ON")
+
+		else:
+			_device.write(":SOUR:DEL:AUTO OFF")
+			_device.write(":SOUR:DEL %s"%str(_profile["delay"]))
+
+		# Repeat filter
+		if _profile["filter"] > 0:
+			_device.write(":SENS:AVER:TCON REP")
+			_device.write(":SENS:AVER:COUN %d"%_profile["filter"])
+			_device.write(":SENS:AVER:STAT ON")
+
+		else:
+			_device.write(":SENS:AVER:STAT OFF")
+
+		# Autorange. Fixed profiles hold the present ranges until set_ranges 
+		# sets them from the measurement extents
+		for _function in ["VOLT", "CURR"]:
+			_device.write(":SOUR:%s:RANG:AUTO %s"%( _function, "ON" if _profile["range"] == "auto" else "OFF" ))
+			_device.write(":SENS:%s:RANG:AUTO %s"%( _function, "ON" if _profile["range"] == "auto" else "OFF" ))
+
+		_device.write(":DISP:ENAB %s"%( "ON" if _profile["display"] else "OFF" ))
+
+	# Fixed source and measure ranges. The source range is the lowest range 
+	# which contains all levels, the measure range the lowest range which 
+	# contains the compliance. Must be called after the compliance is set (the 
+	# driver enables measure autorange with the compliance)
+	@staticmethod
+	def set_ranges(_device, _mode, _levels, _cmpl):
+
+		_source, _sense = ("VOLT", "CURR") if _mode == "Voltage" else ("CURR", "VOLT")
+		_device.write(":SOUR:%s:RANG %s"%( _source, str( float( np.max( np.abs(_levels) ) ) ) ))
+		_device.write(":SENS:%s:RANG %s"%( _sense, str( float(_cmpl) ) ))
+
+	# Measure time per reading (s) with current settings. Both source levels 
+	# are set to zero while the output is on
+	@staticmethod
+	def get_reading_cost(_device, _count=5):
+
+		_device.set_voltage(0.0)
+		_device.set_current(0.0)
+		_device.output_on()
+
+		try:
+			# First reading may include range changes
+			_device.meas()
+
+			start = time.time()
+			for _ in range(_count):
+				_device.meas()
+
+			return ( time.time() - start ) / _count
+
+		finally:
+			_device.output_off()
@@ -0,0 +1,374 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyRecipe
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import os
+import json
+import time
+
+# YAML recipes are optional (PyYAML)
+try:
+	import yaml
+except ImportError:
+	yaml = None
+
+# Import driver, engine and deadband filter (no Qt dependency)
+from PyQtVisa.drivers import keithley2400
+from .QKeithleyEngine import QKeithleyEngine
+from ..utils.QKeithleyDeadband import QKeithleyDeadband
+from .QKeithleyPrecheck import QKeithleyPrecheck
+from .QKeithleyAdaptive import QKeithleyAdaptive
+from .QKeithleyCompliance import QKeithleyCompliance
+from ..utils.QKeithleyHeader import QKeithleyHeader
+
+# Recipe parameters and defaults. Parameter names follow the command line 
+# options of python -m src.engine. None marks a required parameter. Sweeps 
+# accept a precheck parameter (true, or dict of QKeithleyPrecheck options).
+_common = {"name" : None, "device" : None, "output" : None, "nplc" : None, "note" : None}
+_sweep 	= {"mode" : "voltage", "start" : 0.0, "stop" : 1.0, "npts" : 11, "hist" : "None", "cmpl" : 0.1, "delay" : 0.0, "precheck" : False, 
+			"on_compliance" : "continue", "compliance_points" : 1}
+_track 	= {"bias" : 0.5, "cmpl" : 0.1, "gain" : 30.0, "delay" : 0.1, "duration" : None}
+
+_recipes = {
+	"sweep" : dict(_sweep, noise=None, burst=1),
+	"step" 	: dict(_sweep, step_device=None, step_start=0.0, step_stop=1.0, step_npts=3, step_cmpl=0.1),
+	"bias" 	: {"mode" : "voltage", "level" : 0.0, "cmpl" : 0.1, "delay" : 0.1, "duration" : None, 
+				"dv" : 0.0, "di" : 0.0, "rel" : 0.0, "heartbeat" : 0.0},
+	"iv" 	: {"start" : 0.0, "stop" : 1.0, "npts" : 51, "cmpl" : 0.1, "precheck" : False, "burst" : 1},
+	"voc" 	: dict(_track, conv=1e-6),
+	"mpp" 	: dict(_track, ampl=0.01),
+}
+
+# Parameters which must be given 
+_required = ["measurement", "device", "duration", "step_device"]
+
+# Check recipe and apply defaults. Returns complete recipe
+def gen_recipe(_recipe, _defaults={}):
+
+	_recipe = dict(_defaults, **_recipe)
+	_meas = _recipe.get("measurement")
+
+	if _meas not in _recipes.keys():
+		raise ValueError("unknown measurement (%s)"%_meas)
+
+	_params = dict(_common, measurement=None, **_recipes[_meas])
+
+	# Keys from file defaults may belong to other measurements
+	for _key in _recipe.keys():
+		if _key not in _params.keys() and _key not in _defaults.keys():
+			raise ValueError("unknown parameter for %s (%s)"%(_meas, _key))
+
+	_recipe = { _key : _recipe.get(_key, _value) for _key, _value in _params.items() }
+
+	for _key in _required:
+		if _key in _recipe.keys() and _recipe[_key] is None:
+			raise ValueError("missing parameter for %s (%s)"%(_meas, _key))
+
+	if _recipe["name"] is None:
+		_recipe["name"] = _meas
+
+	if _recipe.get("precheck"):
+		QKeithleyPrecheck.from_recipe(_recipe["precheck"])
+
+	if "on_compliance" in _recipe.keys():
+		QKeithleyCompliance(_recipe["on_compliance"], _recipe["compliance_points"])
+
+	return _recipe
+
+# Load recipe file (JSON, or YAML if PyYAML is installed). A file contains 
+# one recipe, a list of recipes, or {"defaults" : {...}, "recipes" : [...]}. 
+# Defaults are applied to each recipe in the file.
+def load_recipes(_filename):
+
+	with open(_filename) as f:
+
+		if os.path.splitext(_filename)[1].lower() in [".yaml", ".yml"]:
+
+			if yaml is None:
+				raise ValueError("PyYAML is required for YAML recipes (%s)"%_filename)
+
+			_content = yaml.safe_load(f)
+
+		else:
+			_content = json.load(f)
+
+	if isinstance(_content, dict) and "recipes" in _content.keys():
+		_defaults, _content = _content.get("defaults", {}), _content["recipes"]
+
+	else:
+		_defaults = {}
+
+	if isinstance(_content, dict):
+		_content = [_content]
+
+	return [ gen_recipe(_recipe, _defaults) for _recipe in _content ]
+
+# Open and reset a keithley from a VISA resource string
+def open_device(_resource):
+
+	_device = keithley2400.keithley2400(_resource)
+
+	if _device.get_property("inst") is None:
+		raise IOError("device not found (%s)"%_resource)
+
+	_device.rst()
+	return _device
+
+# Batch runner. Executes recipes back-to-back and saves the data of each 
+# recipe to its own file. Devices are opened once. The source mode, 
+# compliance and NPLC applied to each device are cached, and consecutive 
+# recipes with the same settings skip reconfiguration. A failing recipe is 
+# recorded in the batch summary and the batch continues with the next one.
+#
+# Sweep recipes with a precheck parameter check the device for open and 
+# short circuit first. Skipped recipes are recorded with the check result 
+# and an estimate of the time saved (from the time per point of measured 
+# recipes).
+#
+#	_open(resource)	: returns device (default: open_device)
+#	_running()		: batch continues while True (abort flag)
+#	_on_point		: engine point callback
+#	_log(message)	: progress messages
+class QKeithleyBatch:
+
+	def __init__(self, _open=None, _running=None, _on_point=None, _log=print):
+
+		self._open = open_device if _open is None else _open
+		self._running, self._on_point, self._log = _running, _on_point, _log
+
+		# Open devices and applied settings {resource : (mode, cmpl, nplc)}
+		self.devices, self.settings = {}, {}
+
+		# Measured points and time per device (pre-check time saved)
+		self.timing = {}
+
+	def _check(self):
+		return True if self._running is None else bool( self._running() )
+
+	# Get device. Devices are opened on first use
+	def get_device(self, _resource):
+
+		if _resource not in self.devices.keys():
+			self.devices[_resource] = self._open(_resource)
+
+		return self.devices[_resource]
+
+	# Source mode of recipe. PV measurements (None) set voltage source and 
+	# compliance themselves
+	def get_mode(self, _r):
+
+		if "mode" not in _r.keys():
+			return None
+
+		return "Current" if str(_r["mode"]).lower() == "current" else "Voltage"
+
+	# Apply source mode, compliance and NPLC unless already applied. Returns 
+	# True if the device was reconfigured
+	def configure(self, engine, _resource, _mode, _cmpl, _nplc):
+
+		_device = self.get_device(_resource)
+		_prev = self.settings.get(_resource, (None, None, None))
+
+		# Keep NPLC if not given in recipe
+		_nplc = _prev[2] if _nplc is None else _nplc
+		_state = ("Voltage" if _mode is None else _mode, _cmpl, _nplc)
+
+		if _prev == _state:
+			return False
+
+		if _mode is not None and _prev[:2] != _state[:2]:
+			engine.configure(_device, _mode, _cmpl)
+
+		if _nplc is not None and _nplc != _prev[2]:
+			_device.update_nplc(_nplc)
+
+		self.settings[_resource] = _state
+		return True
+
+	# Number of points of sweep recipe
+	def get_points(self, _r):
+
+		if _r["measurement"] == "iv":
+			return int(_r["npts"])
+
+		_points = len( QKeithleyEngine.sweep_plan(_r["start"], _r["stop"], _r["npts"], _r["hist"]) )
+		return _points * int(_r["step_npts"]) if _r["measurement"] == "step" else _points
+
+	# Pre-check device of recipe. Returns check result
+	def exec_precheck(self, _r):
+
+		_precheck = QKeithleyPrecheck.from_recipe(_r["precheck"], self.settings[_r["device"]][2] or 1.0)
+		_result = _precheck.check( self.get_device(_r["device"]), self.get_mode(_r) or "Voltage" )
+		_result["skip"] = _precheck.skip(_result)
+
+		# Time per point on device, or on all devices if not yet measured
+		_timing = list( self.timing.values() )
+		if _r["device"] in self.timing.keys():
+			_timing = [ self.timing[_r["device"]] ]
+
+		if _result["skip"] and _timing:
+			_points, _time = sum( [ _[0] for _ in _timing ] ), sum( [ _[1] for _ in _timing ] )
+			_result["saved"] = self.get_points(_r) * _time / max(_points, 1) - _result["time"]
+
+		return _result
+
+	# Run recipe on engine. Returns data key
+	def exec_recipe(self, engine, _r):
+
+		_meas, _running = _r["measurement"], self._running
+		_mode, _device = self.get_mode(_r), self.get_device(_r["device"])
+
+		# Compliance policy (sweep and step)
+		_compliance = None
+		if _r.get("on_compliance", "continue") != "continue":
+			_compliance = QKeithleyCompliance(_r["on_compliance"], _r["compliance_points"])
+
+		if _meas == "sweep":
+
+			_adaptive = None
+			if _r["noise"] is not None:
+				_adaptive = QKeithleyAdaptive(_r["noise"], _restore=self.settings[_r["device"]][2] or 1.0)
+
+			return engine.sweep(_device, _mode, 
+				engine.sweep_plan(_r["start"], _r["stop"], _r["npts"], _r["hist"]), 
+				_r["delay"], _running, None, self._on_point, _adaptive, _r["burst"], _compliance)
+
+		if _meas == "step":
+			self.configure(engine, _r["step_device"], "Voltage", _r["step_cmpl"], _r["nplc"])
+			return engine.sweep_step(_device, self.get_device(_r["step_device"]), _mode, 
+				engine.sweep_plan(_r["start"], _r["stop"], _r["npts"], _r["hist"]), 
+				engine.step_plan(_r["step_start"], _r["step_stop"], _r["step_npts"]), 
+				_r["delay"], _running, None, self._on_point, None, _compliance)
+
+		if _meas == "bias":
+
+			_deadband = None
+			if _r["dv"] != 0.0 or _r["di"] != 0.0:
+				_deadband = QKeithleyDeadband(_r["dv"], _r["di"], _r["rel"], _r["heartbeat"])
+
+			engine.source(_device, _mode)(_r["level"])
+			_device.output_on()
+
+			try:
+				return engine.bias(_device, _mode, _r["delay"], _running, None, self._on_point, _r["duration"], _deadband)
+			
+			finally:
+				engine.source(_device, _mode)(0.0)
+				_device.output_off()
+
+		if _meas == "iv":
+			return engine.iv(_device, engine.step_plan(_r["start"], _r["stop"], _r["npts"]), _r["cmpl"], 
+				_running, None, self._on_point, _r["burst"])
+
+		if _meas == "voc":
+			return engine.voc(_device, _r["bias"], _r["cmpl"], _r["conv"], _r["gain"], _r["delay"], 
+				_running, None, self._on_point, _r["duration"])
+
+		if _meas == "mpp":
+			return engine.mpp(_device, _r["bias"], _r["cmpl"], _r["ampl"], _r["gain"], _r["delay"], 
+				_running, None, self._on_point, _r["duration"])
+
+	# Run recipe and save data. Returns summary dict
+	def run_recipe(self, _r, _filename):
+
+		engine, start = QKeithleyEngine(), time.time()
+		_summary = {"name" : _r["name"], "measurement" : _r["measurement"]}
+
+		try:
+
+			_summary["reconfigured"] = self.configure(engine, _r["device"], self.get_mode(_r), _r["cmpl"], _r["nplc"])
+
+			# Pre-check. Failed devices are skipped or flagged
+			if _r.get("precheck"):
+
+				_summary["precheck"] = self.exec_precheck(_r)
+
+				if _summary["precheck"]["skip"]:
+					_summary["status"], _summary["time"] = _summary["precheck"]["state"], time.time() - start
+					return _summary
+
+			_measure = time.time()
+			key = self.exec_recipe(engine, _r)
+
+			if "precheck" in _summary.keys():
+				engine.data.set_metadata(key, "__precheck__", QKeithleyHeader.dumps(_summary["precheck"]))
+
+			# Store recipe with data 
+			engine.data.set_metadata(key, "__recipe__", QKeithleyHeader.dumps(_r))
+			if _r["note"] is not None:
+				engine.data.set_metadata(engine.data.hash, "__note__", QKeithleyHeader.dumps(_r["note"]))
+
+			engine.data.write_to_file(_filename)
+			_summary["output"] = _filename
+			_summary["status"] = "ok" if self._check() else "aborted"
+			_summary["rows"] = len( list( engine.data.data[key].values() )[0] )
+
+			if "precheck" in _recipes[_r["measurement"]].keys() and _summary["status"] == "ok":
+				_points, _time = self.timing.get(_r["device"], (0, 0.0))
+				self.timing[_r["device"]] = (_points + _summary["rows"], _time + time.time() - _measure)
+
+		except Exception as e:
+
+			# Device state is unknown after failure
+			for _resource in [ _r["device"], _r.get("step_device") ]:
+				self.settings.pop(_resource, None)
+
+			_summary["status"], _summary["error"] = "error", "%s: %s"%(type(e).__name__, str(e))
+
+		_summary["time"] = time.time() - start
+		return _summary
+
+	# Run recipes. Data files are written to _outdir as <n>-<name>.dat unless 
+	# an output file is given in the recipe. The batch summary is written 
+	# to _outdir/batch.json. Returns list of summaries
+	def run(self, _recipes, _outdir):
+
+		os.makedirs(_outdir, exist_ok=True)
+		_batch = []
+
+		for _n, _r in enumerate(_recipes):
+
+			_filename = _r["output"] or os.path.join(_outdir, "%03d-%s.dat"%(_n, _r["name"]))
+
+			if not self._check():
+				_batch.append({"name" : _r["name"], "measurement" : _r["measurement"], "status" : "skipped"})
+				continue
+
+			self._log("QKeithleyBatch: [%d/%d] %s (%s)"%(_n + 1, len(_recipes), _r["name"], _r["measurement"]))
+			_batch.append( self.run_recipe(_r, _filename) )
+			self._log("QKeithleyBatch: %s %s"%(_batch[-1]["status"], _batch[-1].get("error", "")))
+
+			with open(os.path.join(_outdir, "batch.json"), "w") as f:
+				json.dump(_batch, f, indent=4)
+
+		# Pre-check report. Checks of measured recipes count against time saved
+		_checks = [ _["precheck"] for _ in _batch if "precheck" in _.keys() ]
+		if _checks:
+			self._log("QKeithleyBatch: %d recipes skipped, pre-check %.1fs, saved %.1fs"%(
+				len( [ _ for _ in _checks if _["skip"] ] ), 
+				sum( [ _["time"] for _ in _checks ] ), 
+				sum( [ _.get("saved", 0.0) if _["skip"] else -_["time"] for _ in _checks ] ) ) )
+
+		return _batch
@@ -0,0 +1,212 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleySequencer
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import os
+import json
+import time
+import numpy as np
+
+# Import engine and pipeline (no Qt dependency)
+from .QKeithleyEngine import QKeithleyEngine
+from ..utils.QKeithleyPipeline import QKeithleyPipeline
+from ..utils.QKeithleyHeader import QKeithleyHeader
+
+# Default die analysis for sweep data. Maximum and minimum current and the 
+# small signal resistance at zero bias (from the points closest to 0V)
+def analyze_iv(data, key):
+
+	_v = np.asarray( data.get_subkey_data(key, "V") )
+	_i = np.asarray( data.get_subkey_data(key, "I") )
+
+	_result = {"Imax" : float( np.max(_i) ), "Imin" : float( np.min(_i) ), "R0" : None}
+
+	# Fit around zero bias 
+	_n = np.argsort( np.abs(_v) )[:3]
+	if len( np.unique(_v[_n]) ) > 1:
+
+		_g = np.polyfit(_v[_n], _i[_n], 1)[0]
+		_result["R0"] = float( 1.0 / _g ) if _g != 0.0 else float("inf")
+
+	return _result
+
+# Multi-die sequencer. For each die of the prober wafer map the stage is 
+# moved, needles are brought into contact and the sweep of QKeithleyEngine 
+# is run (output is off during motion). Data of each die is then handed to a 
+# save stage (QKeithleyPipeline) which runs the analysis and writes the data 
+# file while the prober moves to and measures the next die.
+#
+# If a QKeithleyPrecheck is passed, each die is checked for open and short 
+# circuit before the sweep. Failed dies are skipped (or measured and flagged) 
+# and the sweep time saved on skipped dies is reported in the summary.
+#
+#	_analyze(data, key)	: returns dict of die results (default analyze_iv)
+#	_running()			: sequence continues while True (abort flag)
+#	_overlap			: False saves each die before moving to the next
+class QKeithleySequencer:
+
+	def __init__(self, _prober, _device, _mode, _levels, _cmpl, _delay=0.0, _analyze=None, _running=None, _overlap=True, _log=print, _precheck=None):
+
+		self._prober, self._device = _prober, _device
+		self._mode, self._levels, self._cmpl, self._delay = _mode, _levels, _cmpl, _delay
+		self._analyze = analyze_iv if _analyze is None else _analyze
+		self._running, self._overlap, self._log = _running, _overlap, _log
+		self._precheck = _precheck
+
+		# Die results in test order
+		self.results = []
+
+	def _check(self):
+		return True if self._running is None else bool( self._running() )
+
+	# Save stage. Analyse die, store results in header and write data file
+	def exec_save(self, _item):
+
+		_result, data, key = _item
+		_start = time.time()
+
+		try:
+			_result.update( self._analyze(data, key) )
+			data.set_metadata(key, "__analysis__", QKeithleyHeader.dumps(_result))
+
+		except Exception as e:
+			_result["error"] = "%s: %s"%(type(e).__name__, str(e))
+
+		data.set_metadata(key, "__die__", "%d,%d"%tuple(_result["die"]))
+		if "precheck" in _result.keys():
+			data.set_metadata(key, "__precheck__", QKeithleyHeader.dumps(_result["precheck"]))
+
+		data.write_to_file(_result["output"])
+
+		_result["save"] = time.time() - _start
+		self.results.append(_result)
+		self._log("QKeithleySequencer: die %s %s"%(tuple(_result["die"]), _result.get("error", "")))
+
+	# Record skipped die (runs in save stage)
+	def exec_skip(self, _result):
+
+		self.results.append(_result)
+		self._log("QKeithleySequencer: die %s skipped (%s)"%(tuple(_result["die"]), _result["status"]))
+
+	# Run sequence. Data files are written to _outdir as die_<col>_<row>.dat 
+	# and the sequence summary to _outdir/sequence.json. Returns summary
+	def run(self, _outdir, _dies=None):
+
+		os.makedirs(_outdir, exist_ok=True)
+		_dies = self._prober.dies() if _dies is None else _dies
+
+		# Configure source once for the sequence
+		QKeithleyEngine().configure(self._device, self._mode, self._cmpl)
+
+		_save, start = QKeithleyPipeline([self.exec_save], _size=4, _threaded=self._overlap), time.time()
+
+		try:
+
+			for _die in _dies:
+
+				if not ( self._check() and _save.ok() ):
+					break
+
+				# Move and contact
+				_t0 = time.time()
+				self._prober.move(_die)
+				_t1 = time.time()
+				self._prober.contact()
+
+				_result = {
+					"die" 		: list(_die), 
+					"output" 	: os.path.join(_outdir, "die_%d_%d.dat"%tuple(_die)), 
+					"move" 		: _t1 - _t0, 
+					"status" 	: "ok"
+				}
+
+				# Pre-check and sweep die
+				try:
+
+					if self._precheck is not None:
+
+						_result["precheck"] = self._precheck.check(self._device, self._mode)
+						_result["status"] = _result["precheck"]["state"]
+
+					if self._precheck is None or not self._precheck.skip(_result["precheck"]):
+						engine = QKeithleyEngine()
+						key = engine.sweep(self._device, self._mode, self._levels, self._delay, self._running)
+
+					else:
+						engine, key = None, None
+
+				finally:
+					self._prober.separate()
+
+				_result["measure"] = time.time() - _t1
+
+				# Skipped dies are recorded in order with measured dies
+				if key is None:
+					_result["output"], _result["save"] = None, 0.0
+					_save.call(self.exec_skip, _result)
+
+				else:
+					_save.put( (_result, engine.data, key) )
+
+		finally:
+			_save.close()
+
+		return self.gen_summary(_outdir, time.time() - start)
+
+	# Sequence summary with throughput (dies per hour). The time saved by the 
+	# pre-check is the mean sweep time of measured dies for each skipped die, 
+	# less the time spent checking
+	def gen_summary(self, _outdir, _time):
+
+		_n = len(self.results)
+		_swept = [ _ for _ in self.results if _["output"] is not None ]
+		_skipped = [ _ for _ in self.results if _["output"] is None ]
+		_checks = sum( [ _["precheck"]["time"] for _ in self.results if "precheck" in _.keys() ] )
+
+		_sweep = np.mean( [ _["measure"] - _.get("precheck", {"time" : 0.0})["time"] for _ in _swept ] ) if _swept else 0.0
+
+		_summary = {
+			"dies" 			: _n,
+			"time" 			: _time,
+			"dies_per_hour" : 3600.0 * _n / _time if _time > 0.0 else 0.0,
+			"overlap" 		: self._overlap,
+			"move" 			: sum( [ _["move"] for _ in self.results ] ),
+			"measure" 		: sum( [ _["measure"] for _ in self.results ] ),
+			"save" 			: sum( [ _["save"] for _ in self.results ] ),
+			"skipped" 		: len(_skipped),
+			"precheck" 		: _checks,
+			"saved" 		: float( _sweep * len(_skipped) - _checks ),
+			"results" 		: self.results
+		}
+
+		with open(os.path.join(_outdir, "sequence.json"), "w") as f:
+			json.dump(_summary, f, indent=4)
+
+		self._log("QKeithleySequencer: %d dies in %.1fs (%.0f dies/hour)"%(_n, _time, _summary["dies_per_hour"]))
+
+		if self._precheck is not None:
+			self._log("QKeithleySequencer: %d dies skipped, pre-check %.1fs, saved %.1fs"%(len(_skipped), _checks, _summary["saved"]))
+
+		return _summary
@@ -0,0 +1,413 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleySimulator
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import threading
+import numpy as np
+
+# Stand-in for the keithley2400 driver. Implements the driver methods and the 
+# subset of SCPI used by QKeithleyControl against a simulated device under 
+# test (diode with photocurrent, series and shunt resistance). Each bus 
+# transaction costs _latency (s) and each reading costs _integration (s) at 
+# 1 NPLC (scaled with the integration time set by update_nplc, autozero, 
+# autorange and repeat filter), so acquisition code paths can be exercised 
+# and timed without hardware.
+class QKeithleySimulator:
+
+	def __init__(self, _name="Keithley SIM::24", _latency=0.0, _integration=0.0, _iph=0.0):
+
+		# Device name and timing
+		self._name = _name
+		self._latency = float(_latency)
+		self._integration = float(_integration)
+
+		# Device under test parameters
+		self.i0  = 1e-9		# Diode saturation current (A)
+		self.nvt = 0.05		# Ideality factor times thermal voltage (V)
+		self.rs  = 10.0		# Series resistance (Ohm)
+		self.rsh = 1e6		# Shunt resistance (Ohm)
+		self.iph = float(_iph)	# Photocurrent (A)
+		self.noise = 0.0		# Current noise at 1 NPLC (A rms)
+		self.tau = 0.0		# Current relaxation time after level change (s)
+		self.lifetime = 1e-3	# Carrier lifetime (photocurrent decay after light off) (s)
+
+		# Source state
+		self.reset_state()
+
+		# Bus lock, transaction counters and readings (returned and discarded)
+		self._lock = threading.Lock()
+		self.writes, self.queries, self.readings, self.discarded = 0, 0, 0, 0
+
+	# Simulator with output on at bias _level. Picklable as a device factory 
+	# for acquisition processes: functools.partial(QKeithleySimulator.biased, ...)
+	@classmethod
+	def biased(cls, _mode="Voltage", _level=0.0, _latency=0.0, _iph=0.0):
+
+		_device = cls(_latency=_latency, _iph=_iph)
+		_device.voltage_src() if _mode == "Voltage" else _device.current_src()
+		_device.level = float(_level)
+		_device.output_on()
+		return _device
+
+	# Reset source and trigger state
+	def reset_state(self):
+
+		self.src, self.mode, self.level = "VOLT", "FIX", 0.0
+		self.list, self.cmpl, self.vcmpl = [], 0.1, 20.0
+		self.count, self.output, self.nplc = 1, False, 1.0
+		self.arm, self.arm_src, self.interval, self.delay = 1, "IMM", 0.0, 0.0
+		self.trace, self.feed, self.armed, self.dark = 1, "NEV", None, None
+		self.azero, self.autorange, self.filter, self.average = True, True, 0, 10
+		self.auto_delay, self.delay_set, self.display = True, 0.0, True
+		self.step = ( 0.0, 0.0 )
+		self.time = time.time()
+
+	#####################################
+	#  DEVICE MODEL
+	#
+
+	# Device current at terminal voltage _v (photocurrent _iph defaults to iph)
+	def current(self, _v, _iph=None):
+
+		_v, _iph = float(_v), self.iph if _iph is None else _iph
+		_i = self.i0 * ( np.exp( min( _v / self.nvt, 80.0 ) ) - 1.0 ) + _v / self.rsh - _iph
+
+		# Series resistance limits forward current
+		return float( np.clip( _i, -abs(_v) / self.rs - _iph, abs(_v) / self.rs ) )
+
+	# Device voltage at current _i (bisection on device model)
+	def voltage(self, _i, _iph=None):
+
+		_lo, _hi = -20.0, 20.0
+		for _ in range(60):
+			_mid = 0.5 * ( _lo + _hi )
+			_lo, _hi = ( _mid, _hi ) if self.current(_mid, _iph) < _i else ( _lo, _mid )
+
+		return 0.5 * ( _lo + _hi )
+
+	# Photocurrent at host time _t. After the light is switched off the 
+	# photocurrent (excess carriers) decays with the carrier lifetime
+	def photocurrent(self, _t):
+
+		if self.dark is None or _t < self.dark:
+			return self.iph
+
+		return self.iph * float( np.exp( -( _t - self.dark ) / self.lifetime ) )
+
+	# Switch light on or off (digital output lines or external trigger)
+	def light(self, _on):
+		self.dark = None if _on else time.time()
+
+	# Generate one reading (V, I, R, T, STAT) at source level _level. The 
+	# timestamp _time defaults to the current time
+	def reading(self, _level, _time=None):
+
+		_stat = 0
+		if not self.output:
+			_v, _i = 0.0, 0.0
+
+		elif self.src == "VOLT":
+			_v, _i = _level, self.current(_level)
+
+			# Relaxation from current before last level change
+			if self.tau > 0.0:
+				_t = time.time() if _time is None else self.time + _time
+				_i += ( self.step[1] - _i ) * np.exp( -max( _t - self.step[0], 0.0 ) / self.tau )
+
+			# Measurement noise (decreases with integration time)
+			if self.noise > 0.0:
+				_i += float( np.random.normal( 0.0, self.noise / np.sqrt(self.nplc) ) )
+
+			# Current compliance (status bit 3)
+			if abs(_i) > self.cmpl:
+				_i, _stat = float( np.sign(_i) * self.cmpl ), 8
+
+		else:
+			_t = time.time() if _time is None else self.time + _time
+			_i, _v = _level, self.voltage(_level, self.photocurrent(_t))
+
+			# Voltage compliance (status bit 3)
+			if abs(_v) > self.vcmpl:
+				_v, _stat = float( np.sign(_v) * self.vcmpl ), 8
+
+		self.readings += 1
+		return "%e,%e,%e,%e,%e"%( _v, _i, 9.91e37, time.time() - self.time if _time is None else _time, _stat )
+
+	# Time per reading (s). Autozero doubles the integration, autorange adds 
+	# range checks and the repeat filter integrates each reading _filter times
+	def reading_time(self):
+		return self._integration * self.nplc * ( 2.0 if self.azero else 1.0 ) * ( 1.25 if self.autorange else 1.0 ) * max(self.filter, 1)
+
+	# Generate block of readings for current trigger model. Each arm event 
+	# triggers count readings. With the arm timer enabled arm events are 
+	# spaced by the timer interval (or back to back if the readings take longer)
+	def readings_block(self):
+
+		# Source list or fixed level 
+		_total  = self.count * self.arm
+		_levels = self.list[ :_total ] if self.mode == "LIST" else [ self.level ] * _total
+
+		# Readings are timestamped at the end of their integration. The 
+		# source delay precedes each reading
+		_t0, _dt = time.time() - self.time, self.delay + self.reading_time()
+		_arm = max( self.interval if self.arm_src.startswith("TIM") else 0.0, self.count * _dt )
+		_t = [ _t0 + ( _n // self.count ) * _arm + ( _n % self.count + 1 ) * _dt for _n in range( len(_levels) ) ]
+
+		if self._integration > 0.0 and len(_t) > 0:
+			time.sleep( _t[-1] - _t0 )
+
+		return ",".join( [ self.reading(_l, _tn) for _l, _tn in zip(_levels, _t) ] )
+
+	# Readings stored in trace buffer since :INIT (time per reading as in 
+	# readings_block)
+	def trace_points(self):
+
+		if self.armed is None:
+			return 0
+
+		_dt = self.delay + self.reading_time()
+		return self.trace if _dt <= 0.0 else min( int( ( time.time() - self.armed ) / _dt ), self.trace )
+
+	# Readings in trace buffer
+	def trace_block(self):
+
+		if self.armed is None:
+			return ""
+
+		_t0, _dt = self.armed - self.time, self.delay + self.reading_time()
+		return ",".join( [ self.reading(self.level, _t0 + ( _n + 1 ) * _dt) for _n in range( self.trace_points() ) ] )
+
+	#####################################
+	#  BUS IO
+	#
+
+	def write(self, _cmd):
+
+		with self._lock:
+
+			self.writes += 1
+			if self._latency > 0.0:
+				time.sleep(self._latency)
+
+			_cmd = _cmd.strip().upper()
+			_arg = _cmd.split(" ")[-1]
+
+			if _cmd.startswith(":TRIG:COUN"):
+				self.count = int(float(_arg))
+
+			elif _cmd.startswith(":ARM:COUN"):
+				self.arm = int(float(_arg))
+
+			elif _cmd.startswith(":ARM:SOUR"):
+				self.arm_src = _arg
+
+			elif _cmd.startswith(":ARM:TIM"):
+				self.interval = float(_arg)
+
+			# Auto delay is modelled as no delay
+			elif _cmd.startswith(":SOUR:DEL:AUTO"):
+				self.auto_delay = _arg in ["ON", "1"]
+				self.delay = 0.0 if self.auto_delay else self.delay_set
+
+			elif _cmd.startswith(":SOUR:DEL"):
+				self.auto_delay, self.delay_set, self.delay = False, float(_arg), float(_arg)
+
+			elif _cmd.startswith(":DISP:ENAB"):
+				self.display = _arg in ["ON", "1"]
+
+			elif _cmd.startswith(":SOUR:VOLT:LEV") or _cmd.startswith(":SOUR:CURR:LEV"):
+				self.step  = ( time.time(), self.current(self.level) if self.src == "VOLT" else 0.0 )
+				self.level = float(_arg)
+
+			elif _cmd.startswith(":SOUR:FUNC"):
+				self.src = "VOLT" if "VOLT" in _arg else "CURR"
+
+			elif _cmd.startswith(":SENS:CURR:PROT"):
+				self.cmpl = float(_arg)
+
+			elif _cmd.startswith(":SENS:VOLT:PROT"):
+				self.vcmpl = float(_arg)
+
+			elif _cmd.startswith(":SOUR:LIST:"):
+				self.list = [ float(_l) for _l in _arg.split(",") ]
+
+			elif _cmd.startswith(":SOUR:VOLT:MODE") or _cmd.startswith(":SOUR:CURR:MODE"):
+				self.mode = _arg
+
+			elif _cmd.startswith(":SENS:CURR:NPLC") or _cmd.startswith(":SENS:VOLT:NPLC"):
+				self.nplc = float(_arg)
+
+			elif _cmd.startswith(":SYST:AZER:STAT"):
+				self.azero = _arg in ["ON", "1"]
+
+			elif _cmd.startswith(":SENS:CURR:RANG:AUTO") or _cmd.startswith(":SENS:VOLT:RANG:AUTO"):
+				self.autorange = _arg in ["ON", "1"]
+
+			elif _cmd.startswith(":SENS:CURR:RANG") or _cmd.startswith(":SENS:VOLT:RANG"):
+				self.autorange = False
+
+			elif _cmd.startswith(":SENS:AVER:COUN"):
+				self.average = int(float(_arg))
+
+			elif _cmd.startswith(":SENS:AVER:STAT"):
+				self.filter = self.average if _arg in ["ON", "1"] else 0
+
+			elif _cmd.startswith(":SYST:TIME:RES"):
+				self.time = time.time()
+
+			# Trace buffer. Light is switched by the digital output lines, and 
+			# an external (trigger link) arm coincides with the light off
+			elif _cmd.startswith(":TRAC:POIN"):
+				self.trace = int(float(_arg))
+
+			elif _cmd.startswith(":TRAC:FEED:CONT"):
+				self.feed = _arg
+
+			elif _cmd.startswith(":TRAC:CLE") or _cmd.startswith(":ABOR"):
+				self.armed = None
+
+			elif _cmd.startswith(":SOUR2:TTL"):
+				self.light( int(float(_arg)) != 0 )
+
+			elif _cmd.startswith(":INIT") and self.feed == "NEXT":
+
+				self.armed = time.time()
+				if self.arm_src.startswith("TLIN"):
+					self.light(False)
+
+			# Without trace buffer :INIT runs the trigger model and the readings 
+			# are discarded. A following :READ? triggers again
+			elif _cmd.startswith(":INIT"):
+
+				self.discarded += self.count * self.arm
+				if self._integration > 0.0:
+					time.sleep( self.count * self.arm * ( self.delay + self.reading_time() ) )
+
+	def query(self, _cmd):
+
+		with self._lock:
+
+			self.queries += 1
+			if self._latency > 0.0:
+				time.sleep(self._latency)
+
+			_cmd = _cmd.strip().upper()
+
+			if _cmd.startswith(":READ?") or _cmd.startswith(":FETC?"):
+				return self.readings_block()
+
+			if _cmd.startswith(":TRAC:POIN:ACT?"):
+				return "%d"%self.trace_points()
+
+			if _cmd.startswith(":TRAC:DATA?"):
+				return self.trace_block()
+
+			if _cmd.startswith(":SYST:AZER:STAT?"):
+				return "%d"%self.azero
+
+			if _cmd.startswith(":SOUR:DEL:AUTO?"):
+				return "%d"%self.auto_delay
+
+			if _cmd.startswith(":SOUR:DEL?"):
+				return "%e"%self.delay_set
+
+			if _cmd.startswith(":DISP:ENAB?"):
+				return "%d"%self.display
+
+			if _cmd.startswith("*IDN?"):
+				return "KEITHLEY INSTRUMENTS INC.,MODEL 2400,SIM,0"
+
+			return "0"
+
+	#####################################
+	#  DRIVER METHODS
+	#
+
+	def get_property(self, _key):
+		return { "name" : self._name, "resource" : "%s::INSTR"%self._name.split()[-1], "inst" : self }.get(_key)
+
+	def IDN(self):
+		return self.query("*IDN?")
+
+	def check_idn(self):
+		return True
+
+	def rst(self):
+		self.reset_state()
+
+	def close(self):
+		pass
+
+	def WAI(self):
+		self.write("*WAI")
+
+	def wai(self):
+		self.WAI()
+
+	def output_on(self):
+		self.output = True
+
+	def output_off(self):
+		self.output = False
+
+	def four_wire_sense_on(self):
+		self.write(":SYST:RSEN ON")
+
+	def four_wire_sense_off(self):
+		self.write(":SYST:RSEN OFF")
+
+	def output_route_front(self):
+		self.write(":ROUT:TERM FRON")
+
+	def output_route_rear(self):
+		self.write(":ROUT:TERM REAR")
+
+	def update_nplc(self, _value):
+		self.write(":SENS:CURR:NPLC %s"%_value)
+
+	def voltage_src(self):
+		self.src, self.mode = "VOLT", "FIX"
+
+	def current_src(self):
+		self.src, self.mode = "CURR", "FIX"
+
+	# Compliance enables measure autorange (as the driver)
+	def current_cmp(self, _level):
+		self.cmpl, self.autorange = float(_level), True
+
+	def voltage_cmp(self, _level):
+		self.vcmpl, self.autorange = float(_level), True
+
+	def set_voltage(self, _level):
+		self.write(":SOUR:VOLT:LEV %s"%str(_level))
+
+	def set_current(self, _level):
+		self.write(":SOUR:CURR:LEV %s"%str(_level))
+
+	def meas(self):
+		self.write(":INIT")
+		self.WAI()
+		return self.query(":READ?")
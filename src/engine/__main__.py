@@ -0,0 +1,384 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyEngine command line interface
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import sys
+import json
+import time
+import signal
+import argparse
+import importlib
+import threading
+
+# Import driver (no Qt dependency)
+from PyQtVisa.drivers import keithley2400
+
+# Import engine and deadband filter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyAdaptive import QKeithleyAdaptive
+from src.engine.QKeithleyCompliance import QKeithleyCompliance
+from src.utils.QKeithleyDeadband import QKeithleyDeadband
+
+# Import recipe loader and batch runner
+from src.engine.QKeithleyRecipe import QKeithleyBatch, load_recipes
+
+# Import multi-die sequencer and probers
+from src.engine.QKeithleySequencer import QKeithleySequencer
+from src.engine.QKeithleyProber import QKeithleyProberSimulator
+from src.engine.QKeithleyPrecheck import QKeithleyPrecheck
+
+# Command line front-end for QKeithleyEngine. Runs measurements without Qt 
+# or matplotlib and writes data in QVisaDataObject format. Usage:
+#
+#	python -m src.engine <measurement> --device GPIB0::24::INSTR -o data.dat [options]
+#	python -m src.engine batch recipes.json [recipes.yaml ...] --outdir results
+#	python -m src.engine dies --device GPIB0::24::INSTR --prober sim:10x10 --outdir wafer
+#	python -m src.engine transient --device GPIB0::24::INSTR --bias 0.0 --level 1.0 -o step.dat
+#	python -m src.engine ocvd --device GPIB0::24::INSTR --trigger external -o decay.dat
+#
+# All values are in SI units. Ctrl-C aborts the measurement and turns the 
+# output off before data is written.
+
+# Open and reset a keithley from a VISA resource string
+def open_device(_resource, _nplc=None):
+
+	_device = keithley2400.keithley2400(_resource)
+
+	if _device.get_property("inst") is None:
+		sys.exit("QKeithleyEngine: device not found (%s)"%_resource)
+
+	_device.rst()
+	if _nplc is not None:
+		_device.update_nplc(_nplc)
+
+	return _device
+
+# Open prober from specification. "sim:<cols>x<rows>" for the simulated 
+# prober or "<module>:<class>" for a QKeithleyProber driver
+def open_prober(_spec):
+
+	_module, _, _name = _spec.partition(":")
+
+	if _module == "sim":
+		_cols, _, _rows = _name.partition("x")
+		return QKeithleyProberSimulator(int(_cols), int(_rows or _cols))
+
+	return getattr( importlib.import_module(_module), _name )()
+
+# Print each stored row (tab separated)
+def print_row(key, _row):
+	print( "\t".join( ["%.6g"%_value for _value in _row.values()] ), flush=True )
+
+# Generate argument parser
+def gen_parser():
+
+	parser = argparse.ArgumentParser(prog="python -m src.engine", description="Headless QKeithleyControl measurements")
+	_sub = parser.add_subparsers(dest="meas", required=True)
+
+	# Common options
+	_common = argparse.ArgumentParser(add_help=False)
+	_common.add_argument("--device", required=True, help="VISA resource of (sweep) device")
+	_common.add_argument("-o", "--output", required=True, help="output data file")
+	_common.add_argument("--nplc", type=float, default=None, help="integration time (NPLC)")
+	_common.add_argument("-q", "--quiet", action="store_true", help="do not print data rows")
+
+	# Sweep options
+	_sweep = argparse.ArgumentParser(add_help=False)
+	_sweep.add_argument("--mode", choices=["voltage", "current"], default="voltage")
+	_sweep.add_argument("--start", type=float, default=0.0)
+	_sweep.add_argument("--stop", type=float, default=1.0)
+	_sweep.add_argument("--npts", type=int, default=11)
+	_sweep.add_argument("--hist", choices=["None", "Reverse-sweep", "Zero-centered"], default="None")
+	_sweep.add_argument("--cmpl", type=float, default=0.1, help="compliance (A or V)")
+	_sweep.add_argument("--delay", type=float, default=0.0, help="measurement delay (s)")
+
+	# Tracking options
+	_track = argparse.ArgumentParser(add_help=False)
+	_track.add_argument("--bias", type=float, default=0.5, help="initial bias (V)")
+	_track.add_argument("--cmpl", type=float, default=0.1, help="current compliance (A)")
+	_track.add_argument("--gain", type=float, default=30.0, help="tracking gain (1/1000)")
+	_track.add_argument("--delay", type=float, default=0.1, help="measurement interval (s)")
+	_track.add_argument("--duration", type=float, required=True, help="measurement time (s)")
+
+	# Compliance policy options (sweep and step)
+	_cmpl = argparse.ArgumentParser(add_help=False)
+	_cmpl.add_argument("--on-compliance", choices=QKeithleyCompliance.policies, default="continue", 
+		help="stop sweep (or skip to next step) when in compliance")
+	_cmpl.add_argument("--compliance-points", type=int, default=1, help="consecutive points in compliance before stopping")
+
+	# IV-characterization
+	_iv_sweep = _sub.add_parser("sweep", parents=[_common, _sweep, _cmpl], help="IV sweep")
+	_iv_sweep.add_argument("--noise", type=float, default=None, help="adaptive NPLC relative noise target (fraction)")
+	_iv_sweep.add_argument("--burst", type=int, default=1, help="readings averaged per point")
+	_iv_sweep.add_argument("--repeat", type=int, default=1, help="repeat sweep and store mean and standard deviation")
+	_iv_sweep.add_argument("--keep", type=int, default=0, help="store every n-th raw sweep in repeat mode")
+	_iv_sweep.add_argument("--pulse-on", type=float, default=None, help="pulsed sweep with on-time (s)")
+	_iv_sweep.add_argument("--pulse-off", type=float, default=0.05, help="pulse off-time (s)")
+	_iv_sweep.add_argument("--pulse-base", type=float, default=0.0, help="pulse base level (V or A)")
+
+	_step = _sub.add_parser("step", parents=[_common, _sweep, _cmpl], help="IV sweep with voltage step")
+	_step.add_argument("--step-device", required=True, help="VISA resource of step device")
+	_step.add_argument("--step-start", type=float, default=0.0)
+	_step.add_argument("--step-stop", type=float, default=1.0)
+	_step.add_argument("--step-npts", type=int, default=3)
+	_step.add_argument("--step-cmpl", type=float, default=0.1, help="step current compliance (A)")
+
+	# Bias mode
+	_bias = _sub.add_parser("bias", parents=[_common], help="constant bias")
+	_bias.add_argument("--mode", choices=["voltage", "current"], default="voltage")
+	_bias.add_argument("--level", type=float, default=0.0, help="bias level (V or A)")
+	_bias.add_argument("--cmpl", type=float, default=0.1, help="compliance (A or V)")
+	_bias.add_argument("--delay", type=float, default=0.1, help="measurement interval (s)")
+	_bias.add_argument("--duration", type=float, required=True, help="measurement time (s)")
+	_bias.add_argument("--dv", type=float, default=None, help="voltage deadband (V)")
+	_bias.add_argument("--di", type=float, default=None, help="current deadband (A)")
+	_bias.add_argument("--rel", type=float, default=0.0, help="relative deadband (fraction)")
+	_bias.add_argument("--heartbeat", type=float, default=0.0, help="deadband heartbeat (s)")
+
+	# Transient capture
+	_trans = _sub.add_parser("transient", parents=[_common], help="capture response to bias step")
+	_trans.add_argument("--mode", choices=["voltage", "current"], default="voltage")
+	_trans.add_argument("--bias", type=float, default=0.0, help="bias level before step (V or A)")
+	_trans.add_argument("--level", type=float, required=True, help="step level (V or A)")
+	_trans.add_argument("--cmpl", type=float, default=0.1, help="compliance (A or V)")
+	_trans.add_argument("--count", type=int, default=500, help="readings in capture burst")
+	_trans.add_argument("--fast-nplc", type=float, default=0.01, help="integration time during capture (NPLC)")
+	_trans.add_argument("--settle", type=float, default=1.0, help="time at bias level before step (s)")
+
+	# PV-characterization
+	_iv = _sub.add_parser("iv", parents=[_common], help="PV sweep")
+	_iv.add_argument("--start", type=float, default=0.0)
+	_iv.add_argument("--stop", type=float, default=1.0)
+	_iv.add_argument("--npts", type=int, default=51)
+	_iv.add_argument("--cmpl", type=float, default=0.1, help="current compliance (A)")
+	_iv.add_argument("--burst", type=int, default=1, help="readings averaged per point")
+
+	_voc = _sub.add_parser("voc", parents=[_common, _track], help="Voc tracking")
+	_voc.add_argument("--conv", type=float, default=1e-6, help="convergence current (A)")
+
+	_mpp = _sub.add_parser("mpp", parents=[_common, _track], help="MPP tracking")
+	_mpp.add_argument("--ampl", type=float, default=0.01, help="sense amplitude (V)")
+
+	_ocvd = _sub.add_parser("ocvd", parents=[_common], help="open-circuit voltage decay")
+	_ocvd.add_argument("--count", type=int, default=1000, help="readings in decay capture")
+	_ocvd.add_argument("--fast-nplc", type=float, default=0.01, help="integration time during capture (NPLC)")
+	_ocvd.add_argument("--trigger", choices=["software", "external"], default="software", 
+		help="switch light from digital output or wait on trigger link")
+	_ocvd.add_argument("--line", type=int, default=1, help="trigger link input line")
+	_ocvd.add_argument("--cmpl", type=float, default=2.0, help="voltage compliance (V)")
+	_ocvd.add_argument("--soak", type=float, default=5.0, help="light soak before decay (s)")
+	_ocvd.add_argument("--ideality", type=float, default=1.0, help="diode ideality factor")
+	_ocvd.add_argument("--temperature", type=float, default=300.0, help="cell temperature (K)")
+	_ocvd.add_argument("--window", type=int, default=9, help="readings in slope window")
+
+	# Multi-die sequence
+	_dies = _sub.add_parser("dies", parents=[_sweep], help="IV sweep on each die of a prober wafer map")
+	_dies.add_argument("--device", required=True, help="VISA resource of device")
+	_dies.add_argument("--prober", required=True, help="sim:<cols>x<rows> or <module>:<class>")
+	_dies.add_argument("--outdir", default="dies", help="output directory for die data and sequence.json")
+	_dies.add_argument("--nplc", type=float, default=None, help="integration time (NPLC)")
+	_dies.add_argument("-q", "--quiet", action="store_true", help="do not print die progress")
+	_dies.add_argument("--precheck", action="store_true", help="check dies for open and short circuit before sweep")
+	_dies.add_argument("--precheck-level", type=float, default=None, help="pre-check bias level (V or A, default 0.1V or 1uA)")
+	_dies.add_argument("--precheck-open", type=float, default=1e9, help="open circuit resistance (Ohm)")
+	_dies.add_argument("--precheck-short", type=float, default=10.0, help="short circuit resistance (Ohm)")
+	_dies.add_argument("--flag", action="store_true", help="measure and flag failed dies instead of skipping")
+
+	# Recipe batch
+	_batch = _sub.add_parser("batch", help="run recipe files back-to-back")
+	_batch.add_argument("recipes", nargs="+", help="recipe files (JSON or YAML)")
+	_batch.add_argument("--outdir", default="batch", help="output directory for data files and batch.json")
+	_batch.add_argument("--dry-run", action="store_true", help="check recipes and exit")
+	_batch.add_argument("-q", "--quiet", action="store_true", help="do not print data rows")
+
+	return parser
+
+# Run measurement
+def main(argv=None):
+
+	args = gen_parser().parse_args(argv)
+
+	# Abort on Ctrl-C. Outputs are turned off by the engine
+	_abort = threading.Event()
+	signal.signal(signal.SIGINT, lambda *_: _abort.set())
+	_running = lambda: not _abort.is_set()
+
+	engine = QKeithleyEngine()
+	_point = None if args.quiet else print_row
+
+	# Recipe batch. Exit status is non-zero if a recipe failed
+	if args.meas == "batch":
+
+		try:
+			_recipes = [ _r for _file in args.recipes for _r in load_recipes(_file) ]
+
+		except (ValueError, OSError) as e:
+			sys.exit("QKeithleyEngine: invalid recipe (%s)"%str(e))
+
+		if args.dry_run:
+			for _n, _r in enumerate(_recipes):
+				print("%03d %s (%s) on %s"%(_n, _r["name"], _r["measurement"], _r["device"]))
+			return
+
+		_batch = QKeithleyBatch(None, _running, _point).run(_recipes, args.outdir)
+		sys.exit( 0 if all( [ _["status"] == "ok" for _ in _batch ] ) else 1 )
+
+	_device = open_device(args.device, args.nplc)
+
+	# Multi-die sequence. Data is written per die
+	if args.meas == "dies":
+
+		_prober = open_prober(args.prober)
+		_mode = args.mode.capitalize()
+
+		_precheck = None
+		if args.precheck:
+			_precheck = QKeithleyPrecheck(args.precheck_level, args.precheck_open, args.precheck_short, 
+				_restore=args.nplc or 1.0, _skip=not args.flag)
+
+		try:
+			QKeithleySequencer(_prober, _device, _mode, 
+				engine.sweep_plan(args.start, args.stop, args.npts, args.hist), 
+				args.cmpl, args.delay, None, _running, 
+				_log=(lambda *_: None) if args.quiet else print, _precheck=_precheck).run(args.outdir)
+
+		finally:
+			_prober.close()
+
+		return
+
+	if args.meas in ["sweep", "step", "bias", "transient"]:
+		_mode = args.mode.capitalize()
+
+	_compliance = None
+	if args.meas in ["sweep", "step"] and args.on_compliance != "continue":
+		_compliance = QKeithleyCompliance(args.on_compliance, args.compliance_points)
+
+	if args.meas == "sweep":
+
+		_adaptive = None
+		if args.noise is not None:
+			_adaptive = QKeithleyAdaptive(args.noise, _restore=args.nplc or 1.0)
+
+		engine.configure(_device, _mode, args.cmpl)
+
+		# Pulsed sweep (timed by the instrument)
+		if args.pulse_on is not None:
+			_key = engine.sweep_pulse(_device, _mode, 
+				engine.sweep_plan(args.start, args.stop, args.npts, args.hist), 
+				args.pulse_base, args.pulse_on, args.pulse_off, _running, None, _point, _compliance)
+
+		# Repeated sweep statistics. Progress is reported per sweep
+		elif args.repeat > 1:
+			_key = engine.sweep_repeat(_device, _mode, 
+				engine.sweep_plan(args.start, args.stop, args.npts, args.hist), 
+				args.repeat, args.delay, _running, None, 
+				None if args.quiet else lambda key, _n: print("QKeithleyEngine: sweep %d/%d"%(_n + 1, args.repeat), file=sys.stderr), 
+				args.keep, _adaptive, args.burst, _compliance)
+
+		else:
+			_key = engine.sweep(_device, _mode, 
+				engine.sweep_plan(args.start, args.stop, args.npts, args.hist), 
+				args.delay, _running, None, _point, _adaptive, args.burst, _compliance)
+
+		if _adaptive is not None:
+			print("QKeithleyEngine: adaptive NPLC saved %.2fs"%_adaptive.saved(), file=sys.stderr)
+
+		# Hysteresis summary (forward and reverse branch overlap)
+		if engine.data.get_metadata(_key, "__hysteresis__") is not None:
+			_hyst = json.loads( engine.data.get_metadata(_key, "__hysteresis__") )
+			print("QKeithleyEngine: hysteresis area %.4g, index %s"%(_hyst["area"], 
+				"none" if _hyst["index"] is None else "%.4f"%_hyst["index"]), file=sys.stderr)
+
+	if args.meas == "step":
+
+		_step = open_device(args.step_device, args.nplc)
+		engine.configure(_device, _mode, args.cmpl)
+		engine.configure(_step, "Voltage", args.step_cmpl)
+		_key = engine.sweep_step(_device, _step, _mode, 
+			engine.sweep_plan(args.start, args.stop, args.npts, args.hist), 
+			engine.step_plan(args.step_start, args.step_stop, args.step_npts), 
+			args.delay, _running, None, _point, None, _compliance)
+
+	# Compliance report
+	if _compliance is not None:
+		print("QKeithleyEngine: %d of %d points in compliance, %d skipped, saved %.2fs"%(
+			_compliance.flagged, _compliance.points, _compliance.skipped, 
+			json.loads( engine.data.get_metadata(_key, "__compliance__") )["saved"]), file=sys.stderr)
+
+	if args.meas == "bias":
+
+		# Deadband recording if a deadband is given
+		_deadband = None
+		if args.dv is not None or args.di is not None:
+			_deadband = QKeithleyDeadband(args.dv or 0.0, args.di or 0.0, args.rel, args.heartbeat)
+
+		engine.configure(_device, _mode, args.cmpl)
+		engine.source(_device, _mode)(args.level)
+		_device.output_on()
+		engine.bias(_device, _mode, args.delay, _running, None, _point, args.duration, _deadband)
+		_device.output_off()
+
+	if args.meas == "transient":
+
+		engine.configure(_device, _mode, args.cmpl)
+		engine.source(_device, _mode)(args.bias)
+		_device.output_on()
+		time.sleep(args.settle)
+		_key = engine.transient(_device, _mode, args.level, args.count, args.fast_nplc, args.nplc or 1.0)
+		engine.source(_device, _mode)(args.bias)
+		_device.output_off()
+
+		engine.data.set_metadata(_key, "__bias__", args.bias)
+		_fit = engine.transient_fit(_key)
+		print("QKeithleyEngine: tau %.4gs, amplitude %.4g, offset %.4g, r2 %.4f%s"%(
+			_fit["tau"], _fit["amplitude"], _fit["offset"], _fit["r2"], "" if _fit["converged"] else " (not resolved)"), file=sys.stderr)
+
+	if args.meas == "iv":
+		engine.iv(_device, engine.step_plan(args.start, args.stop, args.npts), args.cmpl, _running, None, _point, args.burst)
+
+	if args.meas == "voc":
+		engine.voc(_device, args.bias, args.cmpl, args.conv, args.gain, args.delay, _running, None, _point, args.duration)
+
+	if args.meas == "mpp":
+		engine.mpp(_device, args.bias, args.cmpl, args.ampl, args.gain, args.delay, _running, None, _point, args.duration)
+
+	if args.meas == "ocvd":
+		_key = engine.ocvd(_device, args.count, args.fast_nplc, args.trigger.capitalize(), args.line, 
+			args.cmpl, args.soak, args.nplc or 1.0, _running)
+
+		try:
+			_summary = engine.ocvd_lifetime(_key, args.ideality, args.temperature, args.window)
+			print("QKeithleyEngine: voc %.4gV, lifetime %s"%(_summary["voc"], 
+				"none" if _summary["tau"] is None else "%.4gs"%_summary["tau"]), file=sys.stderr)
+
+		except ValueError as e:
+			print("QKeithleyEngine: %s"%str(e), file=sys.stderr)
+
+	# Write data
+	engine.data.write_to_file(args.output)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,141 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyBuffer
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Helper class to acquire blocks of readings from the Keithley 2400 in a single 
+# bus transaction. The trigger count is set to the block size and readings are 
+# returned by :READ? as one comma separated list of (V, I, R, T, STAT) elements. 
+# The T element is the insturment (hardware) timestamp in seconds.
+class QKeithleyBuffer:
+
+	# Reading elements in :FORM:ELEM order
+	elements = ["V", "I", "R", "T", "S"]
+
+	# Maximum trigger count on 2400 series
+	max_count = 2500
+
+	def __init__(self, _device):
+
+		# Cache device reference
+		self._device = _device
+		self._count = 1
+
+		# Settings changed by configure and their previous values
+		self._saved = {}
+
+		# Timestamp stitching state 
+		self._offset = None
+		self._last = None
+		self._wrap = 0.0
+
+	# Query and keep the current value of settings before they are changed. 
+	# Only the value before the first change is kept
+	def _save(self, *_cmds):
+
+		for _cmd in _cmds:
+			if _cmd not in self._saved:
+				self._saved[_cmd] = self._device.query("%s?"%_cmd).strip()
+
+	# Configure trigger model for block acquisition. In fast mode autozero, 
+	# source delay and the front panel display are disabled to reach the 
+	# maximum reading rate of the insturment. The previous settings (e.g. 
+	# from the speed profile) are saved and restored by reset.
+	def configure(self, _count, _fast=True):
+
+		self._count = int( min( max( int(_count), 1 ), self.max_count ) )
+
+		self._device.write(":FORM:ELEM VOLT,CURR,RES,TIME,STAT")
+		self._device.write(":TRIG:DEL 0")
+		self._device.write(":TRIG:COUN %d"%self._count)
+
+		if _fast:
+			self._save(":SYST:AZER:STAT", ":SOUR:DEL:AUTO", ":SOUR:DEL", ":DISP:ENAB")
+			self._device.write(":SYST:AZER:STAT OFF")
+			self._device.write(":SOUR:DEL 0")
+			self._device.write(":DISP:ENAB OFF")
+
+		# Reset hardware timestamp
+		self._device.write(":SYST:TIME:RES")
+		self._offset, self._last, self._wrap = None, None, 0.0
+
+	# Source delay for the acquisition (e.g. list dwell or pulse width). The 
+	# previous setting is saved and restored by reset
+	def source_delay(self, _delay):
+
+		self._save(":SOUR:DEL:AUTO", ":SOUR:DEL")
+		self._device.write(":SOUR:DEL %s"%_delay)
+
+	# Restore single reading trigger model and the saved settings. Settings 
+	# are written back in reverse order (source delay before auto delay)
+	def reset(self):
+
+		self._device.write(":TRIG:COUN 1")
+
+		for _cmd, _value in reversed( list( self._saved.items() ) ):
+			self._device.write("%s %s"%(_cmd, _value))
+
+		self._saved = {}
+		self._count = 1
+
+	# Block size
+	def count(self):
+		return self._count
+
+	# Parse a raw reading string into an (n, 5) array
+	def parse(self, _raw):
+		return np.array( _raw.split(","), dtype=float ).reshape(-1, len(self.elements) )
+
+	# Acquire one block of readings as raw reading string. :READ? alone 
+	# triggers the block (the driver meas() method also writes :INIT, which 
+	# triggers the block twice)
+	def read_raw(self):
+		return self._device.query(":READ?")
+
+	# Acquire one block of readings. Returns an (n, 5) array
+	def read(self):
+		return self.parse( self.read_raw() )
+
+	# Map hardware timestamps onto host time base. The first timestamp is 
+	# aligned to the host elapsed time _now. Timestamp rollover is handled 
+	# by accumulating the last timestamp before a wrap.
+	def stitch(self, _t, _now):
+
+		_t = np.asarray(_t, dtype=float)
+
+		# Previous timestamp for each reading. A decreasing timestamp 
+		# indicates rollover, in which case the previous value is added 
+		_prev = np.concatenate( ( [ _t[0] if self._last is None else self._last ], _t[:-1] ) )
+		_jump = np.cumsum( np.where( _t < _prev, _prev, 0.0 ) )
+		_out  = _t + self._wrap + _jump
+
+		self._wrap += _jump[-1]
+		self._last  = _t[-1]
+
+		if self._offset is None:
+			self._offset = float(_now) - _out[0]
+
+		return _out + self._offset
@@ -0,0 +1,115 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyDataStream
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import hashlib
+
+# Append-only data writer for long running measurements. Produces files in the 
+# QVisaDataObject format so they can be read back with read_from_file(). Data 
+# blocks are opened, streamed row by row, and closed. Nothing is retained in 
+# memory, so file size is the only quantity which grows with run time.
+class QKeithleyDataStream:
+
+	def __init__(self, _filename, _note=None):
+
+		# Open file (line buffered) and write data header
+		self._file = open(_filename, 'w+', buffering=1)
+		self._file.write("*! QVisaDataObject v1.1\n")
+
+		if _note is not None:
+			self._file.write("*! note %s\n"%str(_note))
+
+		self._file.write("*! hash %s\n\n"%self.gen_hash("_root"))
+
+		# Block state
+		self._key    = None
+		self._rows   = 0
+		self._blocks = 0
+
+	# Generate hash (same construction as QVisaDataObject)
+	def gen_hash(self, _salt=""):
+
+		m = hashlib.sha256()		
+		m.update( str( "%s%s"%( _salt, str(time.time())) ).encode() )
+		return str( m.hexdigest()[:7] )
+
+	# Open a new data block. Any open block is closed first
+	def open_block(self, _type, _subkeys, _meta={}):
+
+		self.close_block()
+
+		# Write measurement hash and metadata. Block counter is used 
+		# as salt so blocks opened in quick succession are unique
+		self._key = self.gen_hash( "%s%d"%(_type, self._blocks) )
+		self._blocks += 1
+		self._file.write( "#! __data__ %s\n"%self._key )
+		self._file.write( "#! __type__ %s\n"%str(_type) )
+
+		for _subkey, _data in _meta.items():
+			self._file.write( "#! %s %s\n"%( str(_subkey), str(_data) ) )
+
+		# Write data keys
+		for _subkey in _subkeys:
+			self._file.write( "%s\t\t"%str(_subkey) )
+
+		self._file.write("\n")
+		return self._key
+
+	# Write one row of data into the open block
+	def write_row(self, _values):
+
+		for _value in _values:
+			self._file.write( "%s\t"%str(_value) )
+
+		self._file.write("\n")
+		self._rows += 1
+
+	# Write a complete block of column data
+	def write_block(self, _type, _subkeys, _columns, _meta={}):
+
+		_key = self.open_block(_type, _subkeys, _meta)
+		for _row in zip(*_columns):
+			self.write_row(_row)
+
+		self.close_block()
+		return _key
+
+	# Terminate the open data block
+	def close_block(self):
+
+		if self._key is not None:
+			self._file.write("\n\n")
+			self._key = None
+
+	# Number of rows written
+	def rows(self):
+		return self._rows
+
+	# Close the file
+	def close(self):
+
+		self.close_block()
+		self._file.close()
@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyDeadband
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Change based compression for long measurement logs. A sample is stored when 
+# V or I leaves the deadband around the last stored sample, or when the 
+# heartbeat interval expires. When a change is detected the preceding sample 
+# is also stored (if it was dropped) so the end of each flat segment is kept.
+# The series is reconstructed by holding each stored value until the next 
+# stored sample. Every dropped sample lies within the deadband of the value 
+# held at its time.
+class QKeithleyDeadband:
+
+	def __init__(self, _dv, _di, _rel=0.0, _heartbeat=0.0):
+
+		# Absolute deadbands (V, A), relative deadband (fraction) 
+		# and heartbeat interval (s). Zero disables a criterion
+		self._dv  = float(_dv)
+		self._di  = float(_di)
+		self._rel = float(_rel)
+		self._heartbeat = float(_heartbeat)
+
+		# Last stored and last dropped samples
+		self._stored  = None
+		self._dropped = None
+
+		# Sample counters
+		self._raw   = 0
+		self._count = 0
+
+	# Check if a value has left the deadband around a reference value
+	def _outside(self, _value, _ref, _abs):
+		return abs(_value - _ref) > max( _abs, self._rel * abs(_ref) )
+
+	# Push one sample. Returns the list of (t, v, i) samples to store
+	def push(self, _t, _v, _i):
+
+		self._raw += 1
+		_sample = ( float(_t), float(_v), float(_i) )
+
+		# Always store the first sample
+		if self._stored is None:
+			return self._store([_sample])
+
+		_t0, _v0, _i0 = self._stored
+
+		# Change detected. Store the preceding dropped sample as well
+		if self._outside(_sample[1], _v0, self._dv) or self._outside(_sample[2], _i0, self._di):
+
+			if self._dropped is not None:
+				return self._store([self._dropped, _sample])
+
+			return self._store([_sample])
+
+		# Heartbeat
+		if self._heartbeat > 0.0 and ( _sample[0] - _t0 ) >= self._heartbeat:
+			return self._store([_sample])
+
+		# Drop sample
+		self._dropped = _sample
+		return []
+
+	# Push a block of samples. Returns (t, v, i) arrays of samples to store
+	def push_block(self, _t, _v, _i):
+
+		_out = []
+		for _sample in zip(_t, _v, _i):
+			_out.extend( self.push(*_sample) )
+
+		if _out == []:
+			return np.array([]), np.array([]), np.array([])
+
+		_out = np.array(_out)
+		return _out[:, 0], _out[:, 1], _out[:, 2]
+
+	# Flush the last dropped sample (call at end of measurement) 
+	def flush(self):
+
+		if self._dropped is not None:
+			return self._store([self._dropped])
+
+		return []
+
+	# Store samples and update reference
+	def _store(self, _samples):
+
+		self._stored  = _samples[-1]
+		self._dropped = None
+		self._count  += len(_samples)
+		return _samples
+
+	# Metadata required to reconstruct the series
+	def metadata(self):
+
+		return {
+			"__compress__"	: "deadband-hold",
+			"__dv__"		: self._dv,
+			"__di__"		: self._di,
+			"__rel__"		: self._rel,
+			"__heartbeat__"	: self._heartbeat,
+			"__raw__"		: self._raw,
+			"__stored__"	: self._count
+		}
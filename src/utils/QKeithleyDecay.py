@@ -0,0 +1,89 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyDecay
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Single exponential fit of a transient, y = offset + amplitude * exp(-t/tau). 
+# For fixed tau the model is linear in offset and amplitude, which are solved 
+# by least squares. Tau is located on a logarithmic grid from the sample 
+# interval to ten times the capture window and refined by golden section 
+# search in log(tau). No initial guess is needed. A tau at the edge of the 
+# grid (converged = False) means the decay is not resolved by the capture.
+class QKeithleyDecay:
+
+	# Least squares offset and amplitude for fixed tau. Returns (offset, amplitude, sse)
+	@staticmethod
+	def _solve(_t, _y, _tau):
+
+		_a = np.column_stack( ( np.ones_like(_t), np.exp( -_t / _tau ) ) )
+		_p = np.linalg.lstsq(_a, _y, rcond=None)[0]
+		return float(_p[0]), float(_p[1]), float( np.sum( ( _a.dot(_p) - _y ) ** 2 ) )
+
+	# Fit transient. Returns dict of fit parameters
+	@classmethod
+	def fit(cls, _t, _y, _grid=64, _iter=40):
+
+		_t, _y = np.asarray(_t, dtype=float), np.asarray(_y, dtype=float)
+
+		if len(_t) < 4:
+			raise ValueError("transient too short for fit (%d points)"%len(_t))
+
+		# Grid in log(tau)
+		_dt   = max( float( np.median( np.diff(_t) ) ), 1e-9 )
+		_span = max( float( _t[-1] - min(_t[0], 0.0) ), _dt )
+		_grid = np.linspace( np.log(_dt / 2.0), np.log(_span * 10.0), int(_grid) )
+		_sse  = [ cls._solve(_t, _y, np.exp(_g))[2] for _g in _grid ]
+		_n    = int( np.argmin(_sse) )
+
+		# Golden section refinement between neighbours of grid minimum
+		_lo, _hi = _grid[ max(_n - 1, 0) ], _grid[ min(_n + 1, len(_grid) - 1) ]
+		_r = ( np.sqrt(5.0) - 1.0 ) / 2.0
+
+		for _ in range( int(_iter) ):
+
+			_a, _b = _hi - _r * ( _hi - _lo ), _lo + _r * ( _hi - _lo )
+			if cls._solve(_t, _y, np.exp(_a))[2] < cls._solve(_t, _y, np.exp(_b))[2]:
+				_hi = _b
+			else:
+				_lo = _a
+
+		_tau = float( np.exp( 0.5 * ( _lo + _hi ) ) )
+		_offset, _amplitude, _sse = cls._solve(_t, _y, _tau)
+		_var = float( np.sum( ( _y - np.mean(_y) ) ** 2 ) )
+
+		return {
+			"tau"		: _tau,
+			"amplitude"	: _amplitude,
+			"offset"	: _offset,
+			"rms"		: float( np.sqrt( _sse / len(_t) ) ),
+			"r2"		: 1.0 - _sse / _var if _var > 0.0 else 1.0,
+			"converged"	: 0 < _n < len(_grid) - 1
+		}
+
+	# Evaluate fitted model
+	@staticmethod
+	def model(_t, _fit):
+		return _fit["offset"] + _fit["amplitude"] * np.exp( -np.asarray(_t, dtype=float) / _fit["tau"] )
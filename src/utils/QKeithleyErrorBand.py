@@ -0,0 +1,56 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyErrorBand
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Error band for a data trace on a QVisaDynamicPlot. The band is drawn around 
+# the trace handle (y - dy, y + dy) in the trace color and is registered as a 
+# handle of the trace key, so it is hidden and cleared together with the 
+# trace. A band set again on the same key replaces the previous band.
+class QKeithleyErrorBand:
+
+	# Transparency of band
+	alpha = 0.25
+
+	@classmethod
+	def set_band(cls, _plot, _axes_key, _key, _x, _y, _dy):
+
+		_handles = _plot.get_axes_handles().get_subkey_data(_axes_key, _key)
+
+		# Remove previous band
+		for _band in [ _h for _h in _handles if getattr(_h, "_error_band", False) ]:
+			_band.remove()
+			_handles.remove(_band)
+
+		_x, _y, _dy = np.asarray(_x), np.asarray(_y), np.asarray(_dy)
+		_line = _handles[0]
+
+		_band = _line.axes.fill_between(_x, _y - _dy, _y + _dy, color=_line.get_color(), alpha=cls.alpha, linewidth=0)
+		_band.set_visible( _line.get_visible() )
+		_band._error_band = True
+
+		_handles.append(_band)
+		return _band
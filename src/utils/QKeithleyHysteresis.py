@@ -0,0 +1,136 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyHysteresis
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Hysteresis analysis of forward/reverse sweeps. Points are tagged with the 
+# sweep segment they were measured in (QKeithleyEngine.sweep_segments). The 
+# forward branch collects the segments on which the source level increases 
+# and the reverse branch the segments on which it decreases, so "Reverse-sweep" 
+# and "Zero-centered" plans are handled alike. Both branches are interpolated 
+# onto a common grid over their overlap and compared there:
+#
+#	area 	= integral( y_rev - y_fwd ) dx
+#	index 	= integral( |y_rev - y_fwd| ) dx / max( integral( |y_fwd| ) dx, integral( |y_rev| ) dx )
+#
+# Each branch also gets the figures of merit of an IV curve: the intercepts 
+# (x0, y0), the maximum power point (pmax, xmpp) and fill factor (ff). Power is 
+# -x*y (generated power for a cell under illumination) and is None if the 
+# branch never generates. The power hysteresis index is 
+#
+#	pindex	= ( pmax_rev - pmax_fwd ) / pmax_rev
+class QKeithleyHysteresis:
+
+	# Trapezoid integral
+	@staticmethod
+	def area(_x, _y):
+		return float( np.sum( 0.5 * ( _y[1:] + _y[:-1] ) * np.diff(_x) ) )
+
+	# Split trace into branches. Each segment includes the turning point it 
+	# starts from. Returns (x, y) of forward and reverse branch, sorted with 
+	# repeated levels averaged
+	@staticmethod
+	def branches(_x, _y, _seg):
+
+		_x, _y, _seg = np.asarray(_x, dtype=float), np.asarray(_y, dtype=float), np.asarray(_seg)
+
+		# Segment index and direction (first to last level, turning point included)
+		_id = np.concatenate( ([0], np.cumsum( np.diff(_seg) != 0 )) )
+		_first = np.concatenate( ([0], np.nonzero( np.diff(_id) )[0] + 1) )
+		_last = np.concatenate( (_first[1:] - 1, [len(_x) - 1]) )
+		_dir = np.sign( _x[_last] - _x[ np.maximum(_first - 1, 0) ] )[_id]
+
+		_out = []
+		for _sign in [1.0, -1.0]:
+
+			_mask = _dir == _sign
+			_mask[:-1] |= _mask[1:] & ( _id[1:] != _id[:-1] )
+
+			_u, _inv = np.unique(_x[_mask], return_inverse=True)
+			_out.append( ( _u, np.bincount(_inv, _y[_mask]) / np.bincount(_inv) ) )
+
+		return _out
+
+	# Figures of merit of sorted branch
+	@classmethod
+	def figures(cls, _x, _y):
+
+		_fom = {"x0" : None, "y0" : None, "pmax" : None, "xmpp" : None, "ff" : None}
+
+		# Current (voltage) at zero level
+		if _x[0] <= 0.0 <= _x[-1]:
+			_fom["y0"] = float( np.interp(0.0, _x, _y) )
+
+		# First zero crossing
+		_cross = np.nonzero( np.sign(_y[:-1]) * np.sign(_y[1:]) <= 0 )[0]
+		if len(_cross) > 0:
+			_n = _cross[0]
+			_fom["x0"] = float( _x[_n] if _y[_n] == _y[_n + 1] else _x[_n] - _y[_n] * ( _x[_n + 1] - _x[_n] ) / ( _y[_n + 1] - _y[_n] ) )
+
+		# Maximum power point
+		_p = -_x * _y
+		_n = int( np.argmax(_p) )
+		if _p[_n] > 0.0:
+			_fom["pmax"], _fom["xmpp"] = float(_p[_n]), float(_x[_n])
+
+			if _fom["x0"] is not None and _fom["y0"] is not None and _fom["x0"] * _fom["y0"] != 0.0:
+				_fom["ff"] = _fom["pmax"] / abs( _fom["x0"] * _fom["y0"] )
+
+		return _fom
+
+	# Analyse tagged trace. Returns summary (dict). Raises ValueError if the 
+	# trace does not contain two overlapping branches
+	@classmethod
+	def analyse(cls, _x, _y, _seg):
+
+		( _xf, _yf ), ( _xr, _yr ) = cls.branches(_x, _y, _seg)
+
+		if len(_xf) < 2 or len(_xr) < 2:
+			raise ValueError("hysteresis needs forward and reverse branch")
+
+		_lo, _hi = max(_xf[0], _xr[0]), min(_xf[-1], _xr[-1])
+		if _hi <= _lo:
+			raise ValueError("forward and reverse branch do not overlap")
+
+		# Common grid over overlap
+		_grid = np.linspace(_lo, _hi, max( len(_xf), len(_xr) ))
+		_f, _r = np.interp(_grid, _xf, _yf), np.interp(_grid, _xr, _yr)
+		_d = _r - _f
+		_n = int( np.argmax( np.abs(_d) ) )
+
+		_norm = max( cls.area(_grid, np.abs(_f)), cls.area(_grid, np.abs(_r)) )
+		_fwd, _rev = cls.figures(_xf, _yf), cls.figures(_xr, _yr)
+
+		return {
+			"range"		: [float(_lo), float(_hi)],
+			"area"		: cls.area(_grid, _d),
+			"index"		: cls.area(_grid, np.abs(_d)) / _norm if _norm > 0.0 else None,
+			"dmax"		: float(_d[_n]),
+			"xdmax"		: float(_grid[_n]),
+			"pindex"	: ( _rev["pmax"] - _fwd["pmax"] ) / _rev["pmax"] if _fwd["pmax"] and _rev["pmax"] else None,
+			"forward"	: _fwd,
+			"reverse"	: _rev
+		}
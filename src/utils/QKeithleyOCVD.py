@@ -0,0 +1,115 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyOCVD
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Open-circuit voltage decay (OCVD) analysis. After the light is switched off 
+# the excess carriers recombine and the open-circuit voltage decays. The 
+# effective carrier lifetime follows from the decay rate
+#
+#	tau = - ( n * k * T / q ) / ( dVoc / dt )
+#
+# where n is the ideality factor. The decay rate is the slope of a linear fit 
+# over a sliding window of _window readings, computed with running sums, so 
+# the analysis is vectorised over the whole capture. Points where the voltage 
+# does not decay have no lifetime (nan).
+class QKeithleyOCVD:
+
+	# Boltzmann constant over elementary charge (V/K)
+	kq = 8.617333262e-5
+
+	# Start of decay. The reading noise is estimated from successive 
+	# differences (robust against the decay itself). The decay starts after the 
+	# last reading within _k standard deviations (at least 1mV) of the initial 
+	# level, and the plateau is the median up to the onset. Returns (index, plateau)
+	@staticmethod
+	def onset(_v, _k=5.0):
+
+		_v = np.asarray(_v, dtype=float)
+		_sigma = float( np.median( np.abs( np.diff(_v) ) ) ) / 0.6745 / np.sqrt(2.0)
+		_below = np.nonzero( _v < float( np.median(_v[:3]) ) - max( _k * _sigma, 1e-3 ) )[0]
+
+		_n = max( int(_below[0]) - 1, 0 ) if len(_below) > 0 else 0
+		return _n, float( np.median(_v[:_n + 1]) )
+
+	# Sliding window slope dV/dt (nan at the edges)
+	@staticmethod
+	def slope(_t, _v, _window=5):
+
+		# Odd window of at least 3 and at most the capture length
+		_t, _v = np.asarray(_t, dtype=float), np.asarray(_v, dtype=float)
+		_w = min( max( int(_window) | 1, 3 ), len(_t) - ( 1 - len(_t) % 2 ) )
+		_out = np.full( len(_t), np.nan )
+
+		if _w < 3:
+			return _out
+
+		# Window sums of t, v, t*v and t*t (time relative to first reading)
+		_t = _t - _t[0]
+		_k = np.ones(_w)
+		_st, _sv = np.convolve(_t, _k, "valid"), np.convolve(_v, _k, "valid")
+		_stv, _stt = np.convolve(_t * _v, _k, "valid"), np.convolve(_t * _t, _k, "valid")
+
+		_den = _stt - _st * _st / _w
+		with np.errstate(divide="ignore", invalid="ignore"):
+			_out[ _w // 2 : len(_t) - _w // 2 ] = np.where( _den > 0.0, ( _stv - _st * _sv / _w ) / _den, np.nan )
+
+		return _out
+
+	# Lifetime from decay rate (nan where the voltage does not decay)
+	@classmethod
+	def lifetime(cls, _t, _v, _ideality=1.0, _temperature=300.0, _window=5):
+
+		_dvdt = cls.slope(_t, _v, _window)
+
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return np.where( _dvdt < 0.0, -float(_ideality) * cls.kq * float(_temperature) / _dvdt, np.nan )
+
+	# Analyse capture. Returns (t, tau, summary) with time relative to the 
+	# onset of decay. The summary lifetime is the median lifetime while the 
+	# voltage is above half of the plateau
+	@classmethod
+	def analyse(cls, _t, _v, _ideality=1.0, _temperature=300.0, _window=5):
+
+		_t, _v = np.asarray(_t, dtype=float), np.asarray(_v, dtype=float)
+
+		if len(_t) < 4:
+			raise ValueError("decay too short for analysis (%d points)"%len(_t))
+
+		_n, _plateau = cls.onset(_v)
+		_tau = cls.lifetime(_t, _v, _ideality, _temperature, _window)
+		_tau[:_n] = np.nan
+
+		_valid = np.isfinite(_tau) & ( _v > 0.5 * _plateau )
+
+		return _t - _t[_n], _tau, {
+			"t0"			: float(_t[_n]),
+			"voc"			: _plateau,
+			"ideality"		: float(_ideality),
+			"temperature"	: float(_temperature),
+			"window"		: int(_window),
+			"tau"			: float( np.median(_tau[_valid]) ) if np.any(_valid) else None
+		}
@@ -0,0 +1,142 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyPipeline
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import queue
+import threading
+
+# Deferred call passed through the pipeline. Executed by the last stage in 
+# order with the items put before and after it.
+class QKeithleyPipelineCall:
+
+	def __init__(self, __func__, *args):
+		self.__func__, self.args = __func__, args
+
+	def __call__(self):
+		self.__func__(*self.args)
+
+# Producer/consumer pipeline. Each stage function runs in its own thread and 
+# stages are connected by bounded queues. A stage receives the item returned 
+# by the previous stage (None drops the item), so items are processed in the 
+# order they were put. When the pipeline is full put() blocks the producer 
+# (backpressure), so memory use is bounded by _size items per stage.
+#
+# With _threaded=False stages run inline in put(), which reproduces a serial 
+# loop. An exception raised in a stage stops the pipeline: items are then 
+# discarded, ok() returns False and close() raises the exception.
+class QKeithleyPipeline:
+
+	_sentinel = object()
+
+	def __init__(self, _stages, _size=256, _threaded=True):
+
+		self._stages, self._threaded = list(_stages), _threaded
+		self.error = None
+
+		if self._threaded:
+
+			self._queues  = [ queue.Queue(maxsize=_size) for _ in self._stages ]
+			self._threads = []
+
+			for _n, __func__ in enumerate(self._stages):
+
+				_next = self._queues[_n + 1] if _n + 1 < len(self._stages) else None
+				_thread = threading.Thread(target=self._exec_stage, args=(__func__, self._queues[_n], _next))
+				_thread.daemon = True
+				_thread.start()
+				self._threads.append(_thread)
+
+	# Stage thread loop
+	def _exec_stage(self, __func__, _in, _out):
+
+		while True:
+
+			_item = _in.get()
+
+			if _item is not self._sentinel and self.error is None:
+				
+				try:
+					_item = self._exec_item(__func__, _item, _out is None)
+
+				except Exception as e:
+					self.error = e
+					_item = None
+
+			elif _item is not self._sentinel:
+				_item = None
+
+			if _out is not None and _item is not None:
+				_out.put(_item)
+
+			if _item is self._sentinel:
+				return
+
+	# Apply stage to item. Calls pass through and run in the last stage
+	def _exec_item(self, __func__, _item, _last):
+
+		if isinstance(_item, QKeithleyPipelineCall):
+
+			if _last: 
+				_item()
+			
+			return _item
+
+		return __func__(_item)
+
+	# Pipeline is running without error
+	def ok(self):
+		return self.error is None
+
+	# Put item into first stage
+	def put(self, _item):
+
+		if not self._threaded:
+
+			for _n, __func__ in enumerate(self._stages):
+
+				_item = self._exec_item(__func__, _item, _n + 1 == len(self._stages))
+				if _item is None:
+					return
+
+			return
+
+		self._queues[0].put(_item)
+
+	# Put deferred call 
+	def call(self, __func__, *args):
+		self.put( QKeithleyPipelineCall(__func__, *args) )
+
+	# Drain all items and stop stage threads. Raises stage exception
+	def close(self):
+
+		if self._threaded:
+
+			self._queues[0].put(self._sentinel)
+
+			for _thread in self._threads:
+				_thread.join()
+
+		if self.error is not None:
+			raise self.error
@@ -0,0 +1,119 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyRing
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+from multiprocessing import shared_memory
+
+# Single writer ring buffer of float64 rows in shared memory. The reader 
+# (GUI) creates the segment and maps it read-only (numpy views are not 
+# writeable). The writer (acquisition process) attaches by name with _write.
+#
+# Layout: int64 header [rows written, columns, capacity] followed by a 
+# (capacity, columns) float64 array. The writer stores rows before it 
+# advances the row counter, so a reader never sees a partially written row. 
+# A reader that falls more than capacity rows behind loses the oldest rows, 
+# and read() reports how many were lost.
+class QKeithleyRing:
+
+	_header = 3
+
+	def __init__(self, _name=None, _columns=4, _capacity=65536, _write=False):
+
+		# Create new segment 
+		if _name is None:
+
+			_size = 8 * ( self._header + _columns * _capacity )
+			self._shm = shared_memory.SharedMemory(create=True, size=_size)
+			self._owner = True
+
+			self._head = np.ndarray((self._header,), dtype=np.int64, buffer=self._shm.buf)
+			self._head[:] = [0, _columns, _capacity]
+
+		# Attach to existing segment
+		else:
+
+			self._shm = shared_memory.SharedMemory(name=_name)
+			self._owner = False
+
+			self._head = np.ndarray((self._header,), dtype=np.int64, buffer=self._shm.buf)
+
+		self.columns, self.capacity = int(self._head[1]), int(self._head[2])
+		self._data = np.ndarray((self.capacity, self.columns), dtype=np.float64, buffer=self._shm.buf, offset=8 * self._header)
+
+		# Read-only mapping
+		if not _write:
+			self._head.setflags(write=False)
+			self._data.setflags(write=False)
+
+	# Segment name (pass to writer)
+	def name(self):
+		return self._shm.name
+
+	# Total rows written
+	def count(self):
+		return int(self._head[0])
+
+	# Push one row
+	def push(self, _row):
+		self.push_block( np.asarray(_row, dtype=np.float64).reshape(1, self.columns) )
+
+	# Push block of rows (writer only)
+	def push_block(self, _rows):
+
+		_rows = np.asarray(_rows, dtype=np.float64).reshape(-1, self.columns)
+		_n, _count = len(_rows), int(self._head[0])
+
+		# Write rows with wrap around, then publish. Rows exceeding capacity 
+		# in a single block are counted but never stored
+		_keep = min(_n, self.capacity)
+		_idx = np.arange(_count + _n - _keep, _count + _n) % self.capacity
+		self._data[_idx] = _rows[_n - _keep:]
+		self._head[0] = _count + _n
+
+	# Read rows written since row index _since. Returns (rows, next, lost)
+	def read(self, _since):
+
+		_count = int(self._head[0])
+		_lost  = max(0, _count - _since - self.capacity)
+		_since = _since + _lost
+
+		_rows = self._data[ np.arange(_since, _count) % self.capacity ].copy()
+
+		# Discard rows overwritten while copying
+		_over = max(0, int(self._head[0]) - _since - self.capacity)
+		if _over > 0:
+			_rows, _lost = _rows[_over:], _lost + _over
+
+		return _rows, _count, _lost
+
+	# Detach from segment. The owner also removes it
+	def close(self):
+
+		del self._head, self._data
+		self._shm.close()
+
+		if self._owner:
+			self._shm.unlink()
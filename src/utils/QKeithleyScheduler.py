@@ -0,0 +1,103 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyScheduler
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+
+#!/usr/bin/env python
+import time
+
+# Import thread pool
+from concurrent.futures import ThreadPoolExecutor
+
+# Scheduler class to drive several sourcemeters from a single acquisition loop.
+# All devices share one time base. Each tick is split into a trigger phase in
+# which levels are applied and measurements are initiated on every device, and
+# a gather phase in which readings are fetched concurrently. Integration thus
+# runs in parallel on the insturments and the bus is only held for transfers.
+class QKeithleyScheduler:
+
+	def __init__(self, _workers, _rate=5.0):
+
+		# Thread pool for concurrent bus transactions
+		self._pool = ThreadPoolExecutor( max_workers = max( 1, int(_workers) ) )
+
+		# Canvas frame interval (s)
+		self._frame = 1.0 / float(_rate) if float(_rate) > 0.0 else 0.0
+
+		# Initialize time base
+		self.start()
+
+	# Reset shared time base
+	def start(self):
+		self._start = float( time.time() )
+		self._draw  = 0.0
+		self._ticks = 0
+
+	# Elapsed time on shared time base
+	def now(self):
+		return float( time.time() - self._start )
+
+	# Number of ticks executed since start
+	def ticks(self):
+		return self._ticks
+
+	# Run a callable on each argument concurrently. Results are returned
+	# in argument order.
+	def map(self, __func__, _args):
+		return list( self._pool.map(__func__, _args) )
+
+	# Execute one acquisition tick over a list of devices. If levels are
+	# passed they are applied via __func__ (e.g. "set_voltage") prior to
+	# triggering. Returns the list of split buffers.
+	def measure(self, _devices, _levels=None, __func__="set_voltage"):
+
+		# Trigger phase: apply levels and initiate measurement
+		for _n, _device in enumerate(_devices):
+
+			if _levels is not None:
+				getattr(_device, __func__)( _levels[_n] )
+
+			_device.write(":INIT")
+			_device.wai()
+
+		# Gather phase: fetch readings concurrently
+		_buffers = self.map(lambda _device: _device.query(":FETC?").split(","), _devices)
+		self._ticks += 1
+
+		return _buffers
+
+	# Frame limiter. Returns True if the canvas should be redrawn. This
+	# keeps the render rate fixed independent of the number of devices.
+	def draw_due(self):
+
+		_now = self.now()
+		if ( _now - self._draw ) >= self._frame:
+			self._draw = _now
+			return True
+
+		return False
+
+	# Release worker threads
+	def shutdown(self):
+		self._pool.shutdown(wait=True)
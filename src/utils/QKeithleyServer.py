@@ -0,0 +1,368 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyServer
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import sys
+import json
+import time
+import struct
+import socket
+import threading
+import collections
+import numpy as np
+
+# Frame format (all server to client messages)
+#
+#	header 	: <4sBI 	magic b"QKC1", frame type, payload length
+#	type 0 	: reply 	JSON (utf-8)
+#	type 1 	: data 		<I JSON length, JSON {"source", "key", "type", "columns", 
+#						"index", "rows", "rewrite", "dropped"}, rows x columns float64 
+#						(little endian, row major)
+#
+# Keys whose columns are replaced rather than appended to (e.g. repeated 
+# sweep statistics or spectra) are sent again from index 0 with rewrite set. 
+# Clients should then discard the rows received earlier for that key.
+#
+# Commands are JSON objects, one per line (client to server).
+_magic  = b"QKC1"
+_header = struct.Struct("<4sBI")
+
+# Generate frame from type and payload
+def gen_frame(_type, _payload):
+	return _header.pack(_magic, _type, len(_payload)) + _payload
+
+# Generate data frame
+def gen_data_frame(_meta, _rows):
+
+	_json = json.dumps(_meta).encode()
+	return gen_frame(1, struct.pack("<I", len(_json)) + _json + np.ascontiguousarray(_rows, dtype="<f8").tobytes())
+
+# Parse data frame payload. Returns (meta, rows)
+def parse_data_frame(_payload):
+
+	_n = struct.unpack("<I", _payload[:4])[0]
+	_meta = json.loads(_payload[4:4 + _n].decode())
+	_rows = np.frombuffer(_payload[4 + _n:], dtype="<f8").reshape(-1, len(_meta["columns"]))
+	return _meta, _rows
+
+# Connected client. Frames are queued in a bounded deque; when the client 
+# falls behind the oldest frames are dropped, so publishing never blocks. 
+# A sender thread writes frames to the socket.
+class QKeithleyServerClient:
+
+	def __init__(self, _socket, _queue):
+
+		self._socket = _socket
+		self._lock   = threading.Lock()
+		self._frames = collections.deque(maxlen=_queue)
+		self._ready  = threading.Condition()
+		self._open   = True
+
+		# Subscription state and dropped row count
+		self.subscribed, self.dropped = False, 0
+
+		self._sender = threading.Thread(target=self._exec_sender, name="QKeithleyServer-sender")
+		self._sender.daemon = True
+		self._sender.start()
+
+	# Queue data frame (never blocks)
+	def push(self, _meta, _rows):
+
+		with self._ready:
+
+			if len(self._frames) == self._frames.maxlen:
+				self.dropped += int( self._frames[0][0]["rows"] )
+
+			self._frames.append( (_meta, _rows) )
+			self._ready.notify()
+
+	# Sender thread loop
+	def _exec_sender(self):
+
+		while True:
+
+			with self._ready:
+
+				while self._open and len(self._frames) == 0:
+					self._ready.wait()
+
+				if not self._open:
+					return
+
+				_meta, _rows = self._frames.popleft()
+				_meta = dict(_meta, dropped=self.dropped)
+
+			self.send( gen_data_frame(_meta, _rows) )
+
+	# Send frame (replies and data)
+	def send(self, _frame):
+
+		try:
+			with self._lock:
+				self._socket.sendall(_frame)
+
+		except OSError:
+			self.close()
+
+	def close(self):
+
+		with self._ready:
+			self._open = False
+			self._ready.notify()
+
+		try:
+			self._socket.close()
+		except OSError:
+			pass
+
+	def is_open(self):
+		return self._open
+
+# Local remote-control and data-streaming server. Listens on _host:_port 
+# (localhost by default). Commands are passed to _handler(command) which 
+# returns a reply dict. Except for subscribe and unsubscribe, which are 
+# handled by the server. 
+#
+# Data is published by polling the data objects returned by _sources() 
+# (dict of name : QVisaDataObject) every _period seconds. New complete rows 
+# of each data key are sent to subscribers as one batched frame, so the 
+# acquisition loops do not interact with the server or its clients.
+class QKeithleyServer:
+
+	def __init__(self, _handler, _sources, _host="127.0.0.1", _port=50500, _period=0.05, _queue=256):
+
+		self._handler, self._sources = _handler, _sources
+		self._period, self._queue = _period, _queue
+
+		# Clients and published rows and columns for each (source, key)
+		self._clients, self._sent, self._columns = [], {}, {}
+		self._errors = set()
+		self._clients_lock = threading.Lock()
+		self._running = True
+
+		# Listening socket
+		self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		self._socket.bind((_host, _port))
+		self._socket.listen()
+		self.address = self._socket.getsockname()
+
+		# Server threads are named so the application can tell them from 
+		# measurement threads 
+		for __func__ in [self._exec_accept, self._exec_publish]:
+			_thread = threading.Thread(target=__func__, name="QKeithleyServer")
+			_thread.daemon = True
+			_thread.start()
+
+	#####################################
+	#  CONNECTIONS AND COMMANDS
+	#
+
+	def _exec_accept(self):
+
+		while self._running:
+
+			try:
+				_socket, _ = self._socket.accept()
+
+			except OSError:
+				return
+
+			_client = QKeithleyServerClient(_socket, self._queue)
+			with self._clients_lock:
+				self._clients.append(_client)
+
+			_thread = threading.Thread(target=self._exec_client, args=(_client, _socket), name="QKeithleyServer-client")
+			_thread.daemon = True
+			_thread.start()
+
+	# Read command lines and send replies
+	def _exec_client(self, _client, _socket):
+
+		for _line in _socket.makefile("rb"):
+
+			if _line.strip() == b"":
+				continue
+
+			try:
+				_reply = self.exec_command( json.loads(_line.decode()), _client )
+
+			except Exception as e:
+				_reply = {"ok" : False, "error" : "%s: %s"%(type(e).__name__, str(e))}
+
+			_client.send( gen_frame(0, json.dumps(_reply).encode()) )
+
+		_client.close()
+		with self._clients_lock:
+			self._clients.remove(_client)
+
+	def exec_command(self, _command, _client):
+
+		if _command.get("cmd") == "subscribe":
+			_client.subscribed = True
+			return {"ok" : True}
+
+		if _command.get("cmd") == "unsubscribe":
+			_client.subscribed = False
+			return {"ok" : True}
+
+		return self._handler(_command)
+
+	#####################################
+	#  DATA PUBLISHING
+	#
+
+	def _exec_publish(self):
+
+		while self._running:
+
+			time.sleep(self._period)
+
+			with self._clients_lock:
+				_subscribers = [ _ for _ in self._clients if _.subscribed and _.is_open() ]
+
+			# Keep track of rows also without subscribers, so that 
+			# subscribers receive new rows only. A failing key does not 
+			# stop streaming of the others (each error is logged once)
+			try:
+				_sources = self._sources().items()
+
+			except Exception as e:
+				self._log_error("sources", e)
+				continue
+
+			for _source, _data in _sources:
+				for _key in list( _data.keys() ):
+
+					try:
+						self.publish(_subscribers, _source, _data, _key)
+
+					except Exception as e:
+						self._log_error("%s %s"%(_source, _key), e)
+
+	# Log publishing error (once per source and error)
+	def _log_error(self, _where, _error):
+
+		_msg = "QKeithleyServer: publish failed for %s (%s: %s)"%(_where, type(_error).__name__, str(_error))
+		if _msg not in self._errors:
+			self._errors.add(_msg)
+			print(_msg, file=sys.stderr)
+
+	# Publish new complete rows of data key
+	def publish(self, _subscribers, _source, _data, _key):
+
+		_dict = _data.data.get(_key)
+		if not _dict:
+			return
+
+		# Rows are complete when all columns have been appended. Columns 
+		# are held by reference: a replaced column list, an added column or 
+		# fewer rows than sent means the key was rewritten
+		_columns = list( _dict.keys() )
+		_lists = [ _dict[_c] for _c in _columns ]
+		_n = min( [ len(_l) for _l in _lists ] )
+
+		_last = self._columns.get((_source, _key))
+		_rewrite = _last is not None and ( len(_last) != len(_lists) or 
+			any( [ _a is not _b for _a, _b in zip(_last, _lists) ] ) or _n < self._sent.get((_source, _key), 0) )
+
+		_sent = 0 if _rewrite else self._sent.get((_source, _key), 0)
+		self._sent[(_source, _key)], self._columns[(_source, _key)] = _n, _lists
+
+		if ( _n == _sent and not _rewrite ) or len(_subscribers) == 0:
+			return
+
+		_rows = np.column_stack( [ np.asarray(_dict[_c][_sent:_n], dtype=np.float64) for _c in _columns ] )
+		_meta = {
+			"source" 	: _source,
+			"key" 		: _key,
+			"type" 		: _data.get_metadata(_key, "__type__"),
+			"columns" 	: _columns,
+			"index" 	: _sent,
+			"rows" 		: _n - _sent,
+			"rewrite" 	: _rewrite
+		}
+
+		for _client in _subscribers:
+			_client.push(_meta, _rows)
+
+	def close(self):
+
+		self._running = False
+		self._socket.close()
+
+		with self._clients_lock:
+			for _client in self._clients:
+				_client.close()
+
+# Client for QKeithleyServer (for scripts and other lab software)
+class QKeithleyClient:
+
+	def __init__(self, _host="127.0.0.1", _port=50500):
+
+		self._socket = socket.create_connection((_host, _port))
+		self._file = self._socket.makefile("rb")
+		self._data = collections.deque()
+
+	# Read one frame. Returns (type, payload)
+	def read_frame(self):
+
+		_head = self._file.read(_header.size)
+		if len(_head) < _header.size:
+			raise EOFError("connection closed")
+
+		_mark, _type, _length = _header.unpack(_head)
+		if _mark != _magic:
+			raise ValueError("invalid frame")
+
+		return _type, self._file.read(_length)
+
+	# Send command and wait for reply. Data frames received meanwhile are kept
+	def command(self, _command):
+
+		self._socket.sendall( (json.dumps(_command) + "\n").encode() )
+
+		while True:
+
+			_type, _payload = self.read_frame()
+			if _type == 0:
+				return json.loads(_payload.decode())
+
+			self._data.append( parse_data_frame(_payload) )
+
+	# Next data frame. Returns (meta, rows)
+	def read(self):
+
+		if len(self._data) != 0:
+			return self._data.popleft()
+
+		while True:
+
+			_type, _payload = self.read_frame()
+			if _type == 1:
+				return parse_data_frame(_payload)
+
+	def close(self):
+		self._socket.close()
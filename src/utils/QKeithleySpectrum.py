@@ -0,0 +1,151 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleySpectrum
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import collections
+import numpy as np
+
+# Incremental Welch power spectral density of a sampled time series. Samples 
+# are pushed in blocks and each complete segment (Hann window, constant 
+# detrend, _overlap between segments) is transformed exactly once. The PSD 
+# is the mean periodogram over a sliding window of the last _segments 
+# segments, kept as a running sum, so the cost of an update only depends on 
+# the number of new samples. A time gap larger than _gap sample intervals 
+# (e.g. between buffered blocks) drops the unconsumed samples so segments 
+# never span a discontinuity.
+class QKeithleySpectrum:
+
+	def __init__(self, _nperseg=256, _segments=32, _overlap=0.5, _gap=1.5):
+
+		# Segment length, step between segments and window length
+		self.nperseg  = max( int(_nperseg), 4 )
+		self._step    = max( int( self.nperseg * ( 1.0 - float(_overlap) ) ), 1 )
+		self._segments = max( int(_segments), 1 )
+		self._gap = float(_gap)
+
+		# Periodic Hann window and its power
+		self._window = 0.5 - 0.5 * np.cos( 2.0 * np.pi * np.arange(self.nperseg) / self.nperseg )
+		self._power  = np.sum( self._window ** 2 )
+
+		# Unconsumed samples
+		self._t, self._x = np.empty(0), np.empty(0)
+
+		# Sliding window of (periodogram, sample interval) and running sums
+		self._psd = collections.deque()
+		self._sum, self._dt = None, 0.0
+
+		# Segment and discontinuity counters
+		self.count, self.resets = 0, 0
+
+	# Mean sample interval of segments in window (None if empty)
+	def dt(self):
+		return self._dt / len(self._psd) if len(self._psd) != 0 else None
+
+	# Push block of samples. Returns the number of new segments
+	def push(self, _t, _x):
+
+		_t, _x = np.asarray(_t, dtype=float), np.asarray(_x, dtype=float)
+		if len(_t) == 0:
+			return 0
+
+		# Drop unconsumed samples on discontinuity
+		if len(self._t) != 0:
+
+			_dt = self.dt()
+			if _dt is None and len(_t) > 1:
+				_dt = float( np.median( np.diff(_t) ) )
+
+			if _dt is not None and ( _t[0] - self._t[-1] ) > self._gap * _dt:
+				self._t, self._x = np.empty(0), np.empty(0)
+				self.resets += 1
+
+		self._t = np.concatenate( ( self._t, _t ) )
+		self._x = np.concatenate( ( self._x, _x ) )
+
+		# Transform complete segments
+		_n = 0
+		while len(self._t) >= self.nperseg:
+
+			_n += self._add( self._t[ :self.nperseg ], self._x[ :self.nperseg ] )
+			self._t, self._x = self._t[ self._step: ], self._x[ self._step: ]
+
+		return _n
+
+	# Add periodogram of one segment to the window
+	def _add(self, _t, _x):
+
+		# Segments without time base (no hardware timestamps) are skipped
+		_dt = ( _t[-1] - _t[0] ) / ( len(_t) - 1 )
+		if _dt <= 0.0:
+			return 0
+
+		# One sided density (unit^2/Hz)
+		_p = np.abs( np.fft.rfft( ( _x - np.mean(_x) ) * self._window ) ) ** 2 * _dt / self._power
+		_p[1:] *= 2.0
+		if self.nperseg % 2 == 0:
+			_p[-1] /= 2.0
+
+		self._psd.append( ( _p, _dt ) )
+		self._sum = _p.copy() if self._sum is None else self._sum + _p
+		self._dt += _dt
+
+		# Slide window
+		if len(self._psd) > self._segments:
+
+			_p, _dt = self._psd.popleft()
+			self._sum -= _p
+			self._dt  -= _dt
+
+		self.count += 1
+		return 1
+
+	# Current estimate. Returns (f, psd) or None if no segment is complete
+	def psd(self):
+
+		if len(self._psd) == 0:
+			return None
+
+		return np.fft.rfftfreq( self.nperseg, self.dt() ), self._sum / len(self._psd)
+
+	# RMS noise in the measured band (integral of the PSD)
+	def rms(self):
+
+		_psd = self.psd()
+		if _psd is None:
+			return 0.0
+
+		return float( np.sqrt( np.sum( _psd[1][1:] ) * _psd[0][1] ) )
+
+	def metadata(self):
+
+		return {
+			"__window__"	: "hann",
+			"__nperseg__"	: self.nperseg,
+			"__overlap__"	: 1.0 - self._step / self.nperseg,
+			"__segments__"	: len(self._psd),
+			"__total__"		: self.count,
+			"__resets__"	: self.resets,
+			"__rms__"		: self.rms()
+		}
@@ -0,0 +1,119 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyWaveform
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Helper class to compile bias profiles into a timed point list. Each point 
+# is a (t, level) pair and the level is held from t until the next point. The 
+# profile ends at t[-1] + dwell of the last point (self.duration). 
+class QKeithleyWaveform:
+
+	# Maximum number of points in 2400 source list
+	max_list = 100
+
+	# Maximum duration of source list playback (s). The list is read back in 
+	# one transaction, so it must complete within the VISA timeout.
+	max_list_time = 2.0
+
+	def __init__(self, _t, _levels, _duration):
+
+		self.t = np.asarray(_t, dtype=float)
+		self.levels = np.asarray(_levels, dtype=float)
+		self.duration = float(_duration)
+
+		# Hold time of each point 
+		self.dwell = np.diff( np.append(self.t, self.duration) )
+
+	#####################################
+	#  PROFILE GENERATORS
+	#
+
+	# Staircase from start to stop in _steps levels 
+	@classmethod
+	def staircase(cls, _start, _stop, _steps, _dwell, _cycles=1):
+
+		_levels = np.linspace(_start, _stop, max(int(_steps), 2))
+		return cls.repeat(_levels, _dwell, _cycles)
+
+	# Linear ramp from start to stop and back. Each leg has _steps levels 
+	@classmethod
+	def ramp(cls, _start, _stop, _steps, _dwell, _cycles=1):
+
+		_leg = np.linspace(_start, _stop, max(int(_steps), 2))
+		_levels = np.concatenate( ( _leg, _leg[-2:0:-1] ) )
+		return cls.repeat(_levels, _dwell, _cycles)
+
+	# Square wave between low and high level. _dwell is the half period 
+	@classmethod
+	def square(cls, _low, _high, _dwell, _cycles=1):
+		return cls.repeat([_low, _high], _dwell, _cycles)
+
+	# Repeat a list of levels with equal dwell time 
+	@classmethod
+	def repeat(cls, _levels, _dwell, _cycles=1):
+
+		_levels = np.tile( np.asarray(_levels, dtype=float), max(int(_cycles), 1) )
+		_t = np.arange( len(_levels) ) * float(_dwell)
+		return cls(_t, _levels, len(_levels) * float(_dwell))
+
+	# Arbitrary profile from CSV file with columns (t, level). The last row 
+	# marks the end of the profile. Lines starting with "#" are ignored.
+	@classmethod
+	def from_csv(cls, _filename, _cycles=1):
+
+		_data = np.atleast_2d( np.loadtxt(_filename, delimiter=",", comments="#", usecols=(0, 1)) )
+		_t, _levels = _data[:, 0] - _data[0, 0], _data[:, 1]
+
+		if len(_t) < 2 or np.any( np.diff(_t) <= 0.0 ):
+			raise ValueError("Profile times must be increasing")
+
+		# Last row is the end of the profile
+		_t, _levels, _period = _t[:-1], _levels[:-1], _t[-1]
+
+		_n = max(int(_cycles), 1)
+		_t = np.concatenate( [ _t + _k * _period for _k in range(_n) ] )
+		return cls(_t, np.tile(_levels, _n), _n * _period)
+
+	#####################################
+	#  PLAYBACK HELPERS
+	#
+
+	# Number of points
+	def points(self):
+		return len(self.t)
+
+	# Short profiles with equal dwell that fit in the source list are played 
+	# from the insturment. The source list applies a fixed delay per point.
+	def is_list(self):
+		return self.points() <= self.max_list and self.duration <= self.max_list_time and np.allclose(self.dwell, self.dwell[0])
+
+	# Index of the point active at time _t
+	def index(self, _t):
+		return int( np.clip( np.searchsorted(self.t, _t, side="right") - 1, 0, self.points() - 1 ) )
+
+	# Applied level at times _t (array)
+	def level(self, _t):
+		return self.levels[ np.clip( np.searchsorted(self.t, _t, side="right") - 1, 0, self.points() - 1 ) ]
@@ -0,0 +1,62 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyWelford
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Streaming mean and variance (Welford's method) of repeated measurements. 
+# Each push folds one array (e.g. one sweep) into running per-point mean and 
+# sum of squared deviations, so memory is constant in the number of repeats 
+# and the result is numerically stable for long runs.
+class QKeithleyWelford:
+
+	def __init__(self):
+
+		self.count = 0
+		self.mean, self._m2 = None, None
+
+	# Fold array into running statistics
+	def push(self, _x):
+
+		_x = np.asarray(_x, dtype=float)
+
+		if self.mean is None:
+			self.mean, self._m2 = np.zeros_like(_x), np.zeros_like(_x)
+
+		self.count += 1
+		_delta = _x - self.mean
+		self.mean += _delta / self.count
+		self._m2 += _delta * ( _x - self.mean )
+
+	# Sample variance (zero until two arrays are folded)
+	def var(self):
+
+		if self.count < 2:
+			return np.zeros_like(self.mean)
+
+		return self._m2 / ( self.count - 1 )
+
+	def std(self):
+		return np.sqrt( self.var() )
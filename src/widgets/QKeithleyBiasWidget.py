@@ -30,8 +30,8 @@ import threading
 import time
 
 # Import QT backends
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox, QPushButton, QLabel, QStackedWidget
-from PyQt5.QtCore import Qt, QStateMachine, QState, QObject
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QMessageBox, QComboBox, QPushButton, QLabel, QStackedWidget, QFileDialog
+from PyQt5.QtCore import Qt, QStateMachine, QState, QObject, QMetaObject, Q_ARG
 from PyQt5.QtGui import QIcon
 
 
@@ -39,6 +39,17 @@ from PyQt5.QtGui import QIcon
 from PyQtVisa.widgets import QVisaUnitSelector
 from PyQtVisa.widgets import QVisaDynamicPlot 
 
+# Import buffered acquisition helper
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyProcess import QKeithleyProcess
+from src.utils.QKeithleyBuffer import QKeithleyBuffer
+from src.utils.QKeithleyDeadband import QKeithleyDeadband
+from src.utils.QKeithleyDecay import QKeithleyDecay
+from src.utils.QKeithleyHeader import QKeithleyHeader
+from src.utils.QKeithleyPipeline import QKeithleyPipeline
+from src.utils.QKeithleySpectrum import QKeithleySpectrum
+from src.utils.QKeithleyWaveform import QKeithleyWaveform
+
 # Container class for Keithley to render keithley controls in the bias appicaton. 
 # QKeithleyBiasWidget is not itself a widget, but it contains several widgets. Note 
 # that _app must be QVisaApplication widget
@@ -54,6 +65,12 @@ class QKeithleyBiasWidget:
 		# Set thread variables 
 		self.thread, self.thread_running = None, False
 
+		# Compiled waveform for waveform output mode
+		self.wave = None
+
+		# Noise spectrum estimator and data key (spectrum worker)
+		self.spectrum, self.spectrum_key = None, None
+
 		# Generate widgets
 		self.gen_ctrl_widget()
 		self.gen_plot_widget()
@@ -80,7 +97,7 @@ class QKeithleyBiasWidget:
 		return 	self.ctl_widget
 
 	def get_plot_widget(self):
-		return 	self.plot_stack
+		return 	self.plot_view
 
 	# Create a QStateMachine and output button for each connected insturment
 	def gen_output_widget(self):
@@ -143,11 +160,81 @@ class QKeithleyBiasWidget:
 		self.src_pages.addWidget(self.current_src)
 		self.src_pages.setCurrentIndex(0)
 
+		# Output mode selector. Waveform mode plays a bias profile. Transient 
+		# mode steps from the bias level and captures the response in a burst 
+		self.output_select_label = QLabel("Output Mode")
+		self.output_select = QComboBox()
+		self.output_select.setFixedWidth(200)
+		self.output_select.addItems(["Constant", "Waveform", "Transient"])
+		self.output_select.currentTextChanged.connect(self.update_output_ctrl)
+
+		# Generate waveform and transient controls
+		self.gen_waveform_ctrl()	# self.wave_ctrl
+		self.gen_transient_ctrl()	# self.trans_ctrl
+
+		# Sampling mode selector. Buffered mode acquires blocks of readings 
+		# in a single bus transaction using the insturment trigger count
+		self.sample_select_label = QLabel("Sampling Mode")
+		self.sample_select = QComboBox()
+		self.sample_select.setFixedWidth(200)
+		self.sample_select.addItems(["Single", "Buffered"])
+
+		# Buffer size
+		self.sample_count_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Buffer Size (readings)",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [100]
+		}
+		self.sample_count = QVisaUnitSelector.QVisaUnitSelector(self.sample_count_config)
+
+		# Recording mode selector. Deadband mode stores a sample only when V or I 
+		# leaves the deadband around the last stored sample or on heartbeat
+		self.record_select_label = QLabel("Recording Mode")
+		self.record_select = QComboBox()
+		self.record_select.setFixedWidth(200)
+		self.record_select.addItems(["All Samples", "Deadband"])
+		self.record_select.currentTextChanged.connect(self.update_record_ctrl)
+
+		# Generate deadband controls
+		self.gen_deadband_ctrl()	# self.deadband_ctrl
+
+		# Noise spectrum selector. Welch mode computes the power spectral density 
+		# of the plotted quantity while buffered sampling is running
+		self.spectrum_select_label = QLabel("Noise Spectrum")
+		self.spectrum_select = QComboBox()
+		self.spectrum_select.setFixedWidth(200)
+		self.spectrum_select.addItems(["Off", "Welch PSD"])
+		self.spectrum_select.currentTextChanged.connect(self.update_spectrum_ctrl)
+
+		# Generate spectrum controls
+		self.gen_spectrum_ctrl()	# self.spectrum_ctrl
+
+		# Acquisition selector. Process mode runs the instrument loop in a child 
+		# process which hands samples over in shared memory (constant output 
+		# with single sampling only)
+		self.acq_select_label = QLabel("Acquisition")
+		self.acq_select = QComboBox()
+		self.acq_select.setFixedWidth(200)
+		self.acq_select.addItems(["Thread", "Process"])
+
 		# Disable controls if "__none__ passed as name"
 		if self._name == "__none__":
 			self.src_select_label.setEnabled(False)
 			self.src_select.setEnabled(False)
 			self.src_pages.setEnabled(False)
+			self.output_select_label.setEnabled(False)
+			self.output_select.setEnabled(False)
+			self.sample_select_label.setEnabled(False)
+			self.sample_select.setEnabled(False)
+			self.sample_count.unit_value.setEnabled(False)
+			self.record_select_label.setEnabled(False)
+			self.record_select.setEnabled(False)
+			self.spectrum_select_label.setEnabled(False)
+			self.spectrum_select.setEnabled(False)
+			self.acq_select_label.setEnabled(False)
+			self.acq_select.setEnabled(False)
 
 		#####################################
 		#  ADD CONTROLS
@@ -156,11 +243,403 @@ class QKeithleyBiasWidget:
 		# Main output and controls
 		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.src_select, self.src_select_label]))
 		self.ctl_layout.addWidget(self.src_pages)
+		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.output_select, self.output_select_label]))
+		self.ctl_layout.addWidget(self.wave_ctrl)
+		self.ctl_layout.addWidget(self.trans_ctrl)
+		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.sample_select, self.sample_select_label]))
+		self.ctl_layout.addWidget(self.sample_count)
+		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.record_select, self.record_select_label]))
+		self.ctl_layout.addWidget(self.deadband_ctrl)
+		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.spectrum_select, self.spectrum_select_label]))
+		self.ctl_layout.addWidget(self.spectrum_ctrl)
+		self.ctl_layout.addWidget(self._app._gen_hbox_widget([self.acq_select, self.acq_select_label]))
 		self.ctl_layout.setContentsMargins(0,0,0,0)
 				
 		# Set layouth
 		self.ctl_widget.setLayout(self.ctl_layout)
 
+	# Generate waveform controls
+	def gen_waveform_ctrl(self):
+
+		self.wave_ctrl = QWidget()
+		self.wave_layout = QVBoxLayout()
+
+		# Profile selector
+		self.wave_select_label = QLabel("Profile")
+		self.wave_select = QComboBox()
+		self.wave_select.setFixedWidth(200)
+		self.wave_select.addItems(["Staircase", "Ramp", "Square", "CSV"])
+
+		# Start(low) and stop(high) levels for voltage and current bias 
+		self.wave_v_start = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "V", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Start (Low) Level",
+			"limit"		: 20.0, 
+			"signed"	: True,
+			"default"	: [0.0, ""]
+		})
+		self.wave_v_stop = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "V", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Stop (High) Level",
+			"limit"		: 20.0, 
+			"signed"	: True,
+			"default"	: [1.0, ""]
+		})
+		self.wave_i_start = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "A", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Start (Low) Level",
+			"limit"		: 1.0, 
+			"signed"	: True,
+			"default"	: [0.0, "m"]
+		})
+		self.wave_i_stop = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "A", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Stop (High) Level",
+			"limit"		: 1.0, 
+			"signed"	: True,
+			"default"	: [1.0, "m"]
+		})
+
+		# Pages for voltage and current levels
+		self.wave_v_page = QWidget()
+		self.wave_v_layout = QVBoxLayout()
+		self.wave_v_layout.addWidget(self.wave_v_start)
+		self.wave_v_layout.addWidget(self.wave_v_stop)
+		self.wave_v_layout.setContentsMargins(0,0,0,0)
+		self.wave_v_page.setLayout(self.wave_v_layout)
+
+		self.wave_i_page = QWidget()
+		self.wave_i_layout = QVBoxLayout()
+		self.wave_i_layout.addWidget(self.wave_i_start)
+		self.wave_i_layout.addWidget(self.wave_i_stop)
+		self.wave_i_layout.setContentsMargins(0,0,0,0)
+		self.wave_i_page.setLayout(self.wave_i_layout)
+
+		self.wave_pages = QStackedWidget()
+		self.wave_pages.addWidget(self.wave_v_page)
+		self.wave_pages.addWidget(self.wave_i_page)
+		self.wave_pages.setCurrentIndex(0)
+
+		# Number of steps
+		self.wave_steps_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Number of Steps",
+			"limit"		: 1000.0, 
+			"signed"	: False,
+			"default"	: [5]
+		}
+		self.wave_steps = QVisaUnitSelector.QVisaUnitSelector(self.wave_steps_config)
+
+		# Dwell time per step (half period for square profile)
+		self.wave_dwell_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Dwell Time (s)",
+			"limit"		: 3600.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.wave_dwell = QVisaUnitSelector.QVisaUnitSelector(self.wave_dwell_config)
+
+		# Number of cycles
+		self.wave_cycles_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Number of Cycles",
+			"limit"		: 10000.0, 
+			"signed"	: False,
+			"default"	: [1]
+		}
+		self.wave_cycles = QVisaUnitSelector.QVisaUnitSelector(self.wave_cycles_config)
+
+		# CSV profile file
+		self.wave_file = None
+		self.wave_file_button = QPushButton("Load Profile")
+		self.wave_file_button.clicked.connect(self.update_wave_file)
+		self.wave_file_label = QLabel("No profile loaded")
+
+		# Add widgets
+		self.wave_layout.addWidget(self._app._gen_hbox_widget([self.wave_select, self.wave_select_label]))
+		self.wave_layout.addWidget(self.wave_pages)
+		self.wave_layout.addWidget(self.wave_steps)
+		self.wave_layout.addWidget(self.wave_dwell)
+		self.wave_layout.addWidget(self.wave_cycles)
+		self.wave_layout.addWidget(self._app._gen_hbox_widget([self.wave_file_button, self.wave_file_label]))
+		self.wave_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout (hidden until waveform mode is selected)
+		self.wave_ctrl.setLayout(self.wave_layout)
+		self.wave_ctrl.setVisible(False)
+
+	# Show waveform or transient controls in corresponding output mode
+	def update_output_ctrl(self):
+		self.wave_ctrl.setVisible( self.output_select.currentText() == "Waveform" )
+		self.trans_ctrl.setVisible( self.output_select.currentText() == "Transient" )
+
+	# Select CSV profile
+	def update_wave_file(self):
+
+		_filename, _ = QFileDialog.getOpenFileName(self.wave_ctrl, "Load Profile", "", "CSV files (*.csv);;All files (*)")
+
+		if _filename:
+			self.wave_file = _filename
+			self.wave_file_label.setText(_filename.split("/")[-1])
+
+	# Compile waveform from controls. Raises ValueError for invalid profiles
+	def get_waveform(self):
+
+		if self.src_select.currentText() == "Voltage":
+			_start, _stop = self.wave_v_start.value(), self.wave_v_stop.value()
+
+		if self.src_select.currentText() == "Current":
+			_start, _stop = self.wave_i_start.value(), self.wave_i_stop.value()
+
+		_dwell, _cycles = self.wave_dwell.value(), self.wave_cycles.value() 
+
+		if self.wave_select.currentText() == "CSV":
+
+			if self.wave_file is None:
+				raise ValueError("No profile loaded")
+
+			return QKeithleyWaveform.from_csv(self.wave_file, _cycles)
+
+		if _dwell <= 0.0:
+			raise ValueError("Dwell time must be positive")
+
+		if self.wave_select.currentText() == "Staircase":
+			return QKeithleyWaveform.staircase(_start, _stop, self.wave_steps.value(), _dwell, _cycles)
+
+		if self.wave_select.currentText() == "Ramp":
+			return QKeithleyWaveform.ramp(_start, _stop, self.wave_steps.value(), _dwell, _cycles)
+
+		if self.wave_select.currentText() == "Square":
+			return QKeithleyWaveform.square(_start, _stop, _dwell, _cycles)
+
+	# Generate transient controls
+	def gen_transient_ctrl(self):
+
+		self.trans_ctrl = QWidget()
+		self.trans_layout = QVBoxLayout()
+
+		# Step levels for voltage and current bias (output steps from the 
+		# bias level to the step level)
+		self.trans_v_level = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "V", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Step Level",
+			"limit"		: 20.0, 
+			"signed"	: True,
+			"default"	: [1.0, ""]
+		})
+		self.trans_i_level = QVisaUnitSelector.QVisaUnitSelector({
+			"unit" 		: "A", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Step Level",
+			"limit"		: 1.0, 
+			"signed"	: True,
+			"default"	: [1.0, "m"]
+		})
+
+		self.trans_pages = QStackedWidget()
+		self.trans_pages.addWidget(self.trans_v_level)
+		self.trans_pages.addWidget(self.trans_i_level)
+		self.trans_pages.setCurrentIndex(0)
+
+		# Number of readings in capture burst
+		self.trans_count_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Readings",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [500]
+		}
+		self.trans_count = QVisaUnitSelector.QVisaUnitSelector(self.trans_count_config)
+
+		# Integer selectors apply the limit after the default (spinbox maximum 
+		# is 99 when the default is set)
+		self.trans_count.unit_value.setValue(self.trans_count_config["default"][0])
+
+		# Integration time during capture
+		self.trans_nplc_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Integration Time (nPLC)",
+			"limit"		: 10.0, 
+			"signed"	: False,
+			"default"	: [0.01]
+		}
+		self.trans_nplc = QVisaUnitSelector.QVisaUnitSelector(self.trans_nplc_config)
+
+		# Time at bias level before step
+		self.trans_settle_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Settle Time (s)",
+			"limit"		: 3600.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.trans_settle = QVisaUnitSelector.QVisaUnitSelector(self.trans_settle_config)
+
+		# Fit result (set from fit thread)
+		self.trans_fit_label = QLabel("No transient fitted")
+		self.trans_fit_label.setTextFormat(Qt.PlainText)
+
+		# Add widgets
+		self.trans_layout.addWidget(self.trans_pages)
+		self.trans_layout.addWidget(self.trans_count)
+		self.trans_layout.addWidget(self.trans_nplc)
+		self.trans_layout.addWidget(self.trans_settle)
+		self.trans_layout.addWidget(self.trans_fit_label)
+		self.trans_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout (hidden until transient mode is selected)
+		self.trans_ctrl.setLayout(self.trans_layout)
+		self.trans_ctrl.setVisible(False)
+
+	# Generate deadband recording controls
+	def gen_deadband_ctrl(self):
+
+		self.deadband_ctrl = QWidget()
+		self.deadband_layout = QVBoxLayout()
+
+		# Voltage deadband
+		self.deadband_v_config={
+			"unit" 		: "V", 
+			"min"		: "u",
+			"max"		: "",
+			"label"		: "Voltage Deadband",
+			"limit"		: 20.0, 
+			"signed"	: False,
+			"default"	: [1.0, "m"]
+		}
+		self.deadband_v = QVisaUnitSelector.QVisaUnitSelector(self.deadband_v_config)
+
+		# Current deadband
+		self.deadband_i_config={
+			"unit" 		: "A", 
+			"min"		: "n",
+			"max"		: "m",
+			"label"		: "Current Deadband",
+			"limit"		: 1.0, 
+			"signed"	: False,
+			"default"	: [10.0, "n"]
+		}
+		self.deadband_i = QVisaUnitSelector.QVisaUnitSelector(self.deadband_i_config)
+
+		# Relative deadband
+		self.deadband_rel_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Relative Deadband (%)",
+			"limit"		: 100.0, 
+			"signed"	: False,
+			"default"	: [1.0]
+		}
+		self.deadband_rel = QVisaUnitSelector.QVisaUnitSelector(self.deadband_rel_config)
+
+		# Heartbeat interval
+		self.deadband_heartbeat_config={
+			"unit" 		: "__DOUBLE__", 
+			"label"		: "Heartbeat Interval (s)",
+			"limit"		: 3600.0, 
+			"signed"	: False,
+			"default"	: [60.0]
+		}
+		self.deadband_heartbeat = QVisaUnitSelector.QVisaUnitSelector(self.deadband_heartbeat_config)
+
+		# Add widgets
+		self.deadband_layout.addWidget(self.deadband_v)
+		self.deadband_layout.addWidget(self.deadband_i)
+		self.deadband_layout.addWidget(self.deadband_rel)
+		self.deadband_layout.addWidget(self.deadband_heartbeat)
+		self.deadband_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout (hidden until deadband mode is selected)
+		self.deadband_ctrl.setLayout(self.deadband_layout)
+		self.deadband_ctrl.setVisible(False)
+
+	# Show deadband controls in deadband recording mode
+	def update_record_ctrl(self):
+		self.deadband_ctrl.setVisible( self.record_select.currentText() == "Deadband" )
+
+	# Generate deadband filter for recording mode (None stores all samples)
+	def get_deadband(self):
+
+		if self.record_select.currentText() == "Deadband":
+			return QKeithleyDeadband(
+				self.deadband_v.value(), 
+				self.deadband_i.value(), 
+				self.deadband_rel.value() / 100.0, 
+				self.deadband_heartbeat.value()
+			)
+
+		return None
+
+	# Generate noise spectrum controls
+	def gen_spectrum_ctrl(self):
+
+		self.spectrum_ctrl = QWidget()
+		self.spectrum_layout = QVBoxLayout()
+
+		# Segment length (limited to the buffer size)
+		self.spectrum_nperseg_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Segment Length (samples)",
+			"limit"		: 2500.0, 
+			"signed"	: False,
+			"default"	: [256]
+		}
+		self.spectrum_nperseg = QVisaUnitSelector.QVisaUnitSelector(self.spectrum_nperseg_config)
+
+		# Integer selectors apply the limit after the default (spinbox maximum 
+		# is 99 when the default is set)
+		self.spectrum_nperseg.unit_value.setValue(self.spectrum_nperseg_config["default"][0])
+
+		# Number of segments in the sliding window
+		self.spectrum_segments_config={
+			"unit" 		: "__INT__", 
+			"label"		: "Averaged Segments",
+			"limit"		: 10000.0, 
+			"signed"	: False,
+			"default"	: [32]
+		}
+		self.spectrum_segments = QVisaUnitSelector.QVisaUnitSelector(self.spectrum_segments_config)
+
+		# Plot view selector (may be changed while running)
+		self.spectrum_view_label = QLabel("Plot View")
+		self.spectrum_view = QComboBox()
+		self.spectrum_view.setFixedWidth(200)
+		self.spectrum_view.addItems(["Time Series", "Spectrum"])
+		self.spectrum_view.currentTextChanged.connect(self.update_plot_view)
+
+		# Add widgets
+		self.spectrum_layout.addWidget(self.spectrum_nperseg)
+		self.spectrum_layout.addWidget(self.spectrum_segments)
+		self.spectrum_layout.addWidget(self._app._gen_hbox_widget([self.spectrum_view, self.spectrum_view_label]))
+		self.spectrum_layout.setContentsMargins(0,0,0,0)
+
+		# Set layout (hidden until spectrum is enabled)
+		self.spectrum_ctrl.setLayout(self.spectrum_layout)
+		self.spectrum_ctrl.setVisible(False)
+
+	# Show spectrum controls in Welch mode. Return to time series when disabled
+	def update_spectrum_ctrl(self):
+
+		self.spectrum_ctrl.setVisible( self.spectrum_select.currentText() == "Welch PSD" )
+
+		if self.spectrum_select.currentText() == "Off":
+			self.spectrum_view.setCurrentIndex(0)
+
+	# Switch between time series and spectrum plots
+	def update_plot_view(self):
+		self.plot_view.setCurrentIndex( self.spectrum_view.currentIndex() )
+
 	# Generate voltage and current sources
 	def gen_voltage_src(self):
 
@@ -284,19 +763,36 @@ class QKeithleyBiasWidget:
 		self.current_plot.set_axes_labels("111", "Time (s)", "Voltage (V)")
 		self.current_plot.refresh_canvas(supress_warning=True)	
 
+		# Create QVisaDynamicPlot Object for noise spectrum. Frequency axis is 
+		# logarithmic. The density is plotted as log10 (the canvas update 
+		# formats the y-axis in scientific notation)
+		self.spectrum_plot = QVisaDynamicPlot.QVisaDynamicPlot(self._app)
+		self.spectrum_plot.add_subplot("111")
+		self.spectrum_plot.set_axes_labels("111", "Frequency (Hz)", "log10 PSD (A^2/Hz)")
+		self.spectrum_plot.mpl_figure.axes[0].set_xscale("log")
+		self.spectrum_plot.refresh_canvas(supress_warning=True)
+
 		# Add to plot stack
 		self.plot_stack = QStackedWidget()
 		self.plot_stack.addWidget(self.voltage_plot)
 		self.plot_stack.addWidget(self.current_plot)
 		self.plot_stack.setCurrentIndex(0)
 
+		# Time series and spectrum views
+		self.plot_view = QStackedWidget()
+		self.plot_view.addWidget(self.plot_stack)
+		self.plot_view.addWidget(self.spectrum_plot)
+		self.plot_view.setCurrentIndex(0)
+
 		# Sync plot clear data button with application data
 		self.voltage_plot.sync_application_data(True)
 		self.current_plot.sync_application_data(True)
+		self.spectrum_plot.sync_application_data(True)
 
 		# Sync meta widget when clearing data from plots
 		self.voltage_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
 		self.current_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
+		self.spectrum_plot.set_mpl_refresh_callback("_sync_meta_widget_to_data_object")
 
 
 	#####################################
@@ -329,7 +825,10 @@ class QKeithleyBiasWidget:
 
 			# Update src_pages and plot
 			self.src_pages.setCurrentIndex(0)
+			self.wave_pages.setCurrentIndex(0)
+			self.trans_pages.setCurrentIndex(0)
 			self.plot_stack.setCurrentIndex(0)
+			self.spectrum_plot.set_axes_ylabel("111", "log10 PSD (A^2/Hz)")
 
 			# Keithley to voltage source
 			if self.keithley() is not None:
@@ -343,7 +842,10 @@ class QKeithleyBiasWidget:
 
 			# Update src_pages and plot
 			self.src_pages.setCurrentIndex(1)
+			self.wave_pages.setCurrentIndex(1)
+			self.trans_pages.setCurrentIndex(1)
 			self.plot_stack.setCurrentIndex(1)
+			self.spectrum_plot.set_axes_ylabel("111", "log10 PSD (V^2/Hz)")
 
 			# Keithley to current source
 			if self.keithley() is not None:
@@ -357,9 +859,58 @@ class QKeithleyBiasWidget:
 	#  MEASUREMENT EXECUTION THREADS
 	#			
 
+	# Measurement interval for voltage/current mode
+	def get_bias_delay(self):
+
+		if self.src_select.currentText() == "Voltage":
+			return self.voltage_delay.value()
+
+		if self.src_select.currentText() == "Current":
+			return self.current_delay.value()
+
+	# Engine callback: add data key to meta widget and plot
+	def gen_bias_handle(self, key):
+
+		self._app.meta_widget.add_meta_key(key)
+		self.plot_stack.currentWidget().add_axes_handle("111", key)
+
+	# Engine callback: append sample to plot. If in current mode 
+	# plot voltage, otherwise plot current
+	def update_bias_plot(self, key, _row):
+
+		_plot = self.plot_stack.currentWidget()
+		_plot.append_handle_data("111", key, _row["t"], _row["V"] if self.src_select.currentText() == "Current" else _row["I"])
+		_plot.update_canvas()
+
 	# Measurement thread
 	def exec_output_thread(self):	
 
+		# Transient capture runs on the measurement engine
+		if self.output_select.currentText() == "Transient":
+			self.exec_transient()
+			return
+
+		# Constant output with single sampling runs on the measurement engine. 
+		# Measurement interval is read on each iteration.
+		if self.output_select.currentText() == "Constant" and self.sample_select.currentText() == "Single":
+
+			# Engine runs in acquisition process
+			if self.acq_select.currentText() == "Process":
+				self.exec_process_loop()
+				return
+
+			QKeithleyEngine( self._app._get_data_object() ).bias(
+				self.keithley(), 
+				self.src_select.currentText(), 
+				self.get_bias_delay, 
+				lambda: self.thread_running, 
+				self.gen_bias_handle, 
+				self.update_bias_plot, 
+				None, 
+				self.get_deadband()
+			)
+			return
+
 		# Check mesurement type for datafile
 		if self.src_select.currentText() == "Voltage":
 			_type = "v-bias"
@@ -375,8 +926,15 @@ class QKeithleyBiasWidget:
 		# Add key to meta widget
 		self._app.meta_widget.add_meta_key(key)
 
+		# Waveform mode logs the applied level
+		if self.output_select.currentText() == "Waveform":
+			_set = "%sset"%_type[0].upper()
+			data.set_subkeys(key, ["t", _set, "V", "I", "P"])
+		
 		# Add data fields to key
-		data.set_subkeys(key, ["t", "V", "I", "P"])
+		else:
+			data.set_subkeys(key, ["t", "V", "I", "P"])
+		
 		data.set_metadata(key, "__type__", _type)
 	
 		# Voltage and current arrays	
@@ -384,40 +942,420 @@ class QKeithleyBiasWidget:
 		handle = _plot.add_axes_handle("111", key)
 		start  = time.time()
 
-		# Thread loop
-		while self.thread_running:
+		# Waveform playback
+		if self.output_select.currentText() == "Waveform":
+			self.exec_waveform_loop(data, key, _plot, start, _set)
+			return
+
+		# Buffered sampling mode
+		self.exec_buffer_loop(data, key, _plot, start, self.get_deadband())
+
+	# Transient capture. The output settles at the bias level, steps to the 
+	# step level and a burst of readings is captured in one bus transaction. 
+	# Time is relative to the step. The output returns to the bias level and 
+	# is turned off. The decay is fitted in the background.
+	def exec_transient(self):
+
+		# Settle at bias level
+		_settle = time.time() + self.trans_settle.value()
+
+		while self.thread_running and time.time() < _settle:
+			time.sleep(0.01)
+
+		if not self.thread_running:
+			return
+
+		# Measurement integration time is restored after capture
+		_page = self._app._config.get_config_widget(self._name)
+		_restore = 1.0 if _page is None else _page.nplc
+
+		if self.src_select.currentText() == "Voltage":
+			_bias, _level, _col = self.voltage_bias.value(), self.trans_v_level.value(), "I"
+
+		if self.src_select.currentText() == "Current":
+			_bias, _level, _col = self.current_bias.value(), self.trans_i_level.value(), "V"
+
+		data   = self._app._get_data_object()
+		engine = QKeithleyEngine(data)
+
+		try:
+			key = engine.transient(
+				self.keithley(), 
+				self.src_select.currentText(), 
+				_level, 
+				int(self.trans_count.value()), 
+				self.trans_nplc.value(), 
+				_restore, 
+				self.gen_bias_handle
+			)
+
+		# Return to bias level
+		finally:
+			self.update_bias()
+
+		data.set_metadata(key, "__bias__", float(_bias))
+
+		# Plot capture
+		_plot = self.plot_stack.currentWidget()
+		_plot.set_handle_data("111", key, data.get_subkey_data(key, "t"), data.get_subkey_data(key, _col))
+		_plot.update_canvas()
+
+		# Fit decay in background
+		self.trans_fit_label.setText("Fitting transient ...")
+		_fit = threading.Thread(target=self.exec_transient_fit, args=(engine, key, _plot))
+		_fit.daemon = True
+		_fit.start()
+
+		# Post a button click event to the QStateMachine to trigger 
+		# a state transition if thread is still running (not aborted)
+		if self.thread_running:
+			self.output_widget[0].click()
+
+	# Fit transient decay and draw fitted curve (dashed) on the capture trace
+	def exec_transient_fit(self, engine, key, _plot):
+
+		try:
+			_fit = engine.transient_fit(key)
+
+		except (ValueError, np.linalg.LinAlgError) as e:
+			self.set_transient_label("Fit failed: %s"%str(e))
+			return
+
+		# Fitted curve is a handle of the trace key (hidden and cleared with trace)
+		_t = np.asarray( engine.data.get_subkey_data(key, "t") )
+		_handles = _plot.get_axes_handles().get_subkey_data("111", key)
+		_line = _handles[0]
+		_curve, = _line.axes.plot(_t, QKeithleyDecay.model(_t, _fit), "--", color=_line.get_color())
+		_curve.set_visible( _line.get_visible() )
+		_handles.append(_curve)
+		_plot.update_canvas()
+
+		self.set_transient_label("tau = %.4g s  r2 = %.4f%s"%(
+			_fit["tau"], _fit["r2"], "" if _fit["converged"] else "  (not resolved)" ) )
+
+	# Fit runs in a worker thread. Queue label text to the Qt thread
+	def set_transient_label(self, _text):
+		QMetaObject.invokeMethod(self.trans_fit_label, "setText", Qt.QueuedConnection, Q_ARG(str, _text))
+
+	# Process acquisition loop. The engine runs in a child process and this 
+	# thread only moves samples from shared memory to storage and plot. Plot 
+	# load therefore does not affect acquisition timing.
+	def exec_process_loop(self):
+
+		_type = "v-bias" if self.src_select.currentText() == "Voltage" else "i-bias"
+
+		# Get QVisaDataObject and generate key
+		data = self._app._get_data_object()
+		key  = data.add_hash_key(_type)
+		data.set_subkeys(key, ["t", "V", "I", "P"])
+		data.set_metadata(key, "__type__", _type)
+		data.set_metadata(key, "__acquisition__", "process")
+		self.gen_bias_handle(key)
+
+		# If in current mode plot voltage, otherwise plot current
+		_plot = self.plot_stack.currentWidget()
+		_col  = "V" if self.src_select.currentText() == "Current" else "I"
+
+		# Start acquisition process on instrument resource
+		_proc = QKeithleyProcess(
+			self.keithley().get_property("resource"), 
+			self.src_select.currentText(), 
+			self.get_bias_delay(), 
+			self.get_deadband()
+		)
+		_proc.start()
+
+		# Thread loop (runs until output off or acquisition process exits)
+		while self.thread_running and _proc.is_alive():
+			
+			time.sleep(0.05)
+			_proc.set_delay( self.get_bias_delay() )
+			self.exec_process_read(data, key, _plot, _col, _proc)
+
+		# Stop process and read remaining samples
+		_result = _proc.stop()
+		self.exec_process_read(data, key, _plot, _col, _proc)
+		_proc.close()
+
+		# Deadband metadata, lost samples and errors
+		for _key, _value in _result["meta"].items():
+			data.set_metadata(key, _key, _value)
+
+		if _proc.lost != 0:
+			data.set_metadata(key, "__lost__", _proc.lost)
+
+		# Errors are reported when the output is turned off (GUI thread). 
+		# Post a button click to reset the output if still running
+		if _result["error"] is not None:
+			data.set_metadata(key, "__error__", QKeithleyHeader.dumps(_result["error"]))
+			self.process_error = _result["error"]
+
+			if self.thread_running:
+				self.output_widget[0].click()
+
+	# Append samples from acquisition process to data and plot
+	def exec_process_read(self, data, key, _plot, _col, _proc):
+
+		_rows = _proc.read()
+		if len(_rows["t"]) == 0:
+			return
+
+		for _key, _values in _rows.items():
+			data.get_subkey_data(key, _key).extend( _values.tolist() )
+
+		_plot.append_handle_data("111", key, _rows["t"], _rows[_col])
+		_plot.update_canvas()
+
+	# Store the last dropped sample and reconstruction metadata
+	def exec_deadband_flush(self, data, key, _plot, _deadband):
+
+		if _deadband is None:
+			return
+
+		# If in current mode plot voltage, otherwise plot current
+		_col = 0 if self.src_select.currentText() == "Current" else 1
+
+		for _t, _v, _i in _deadband.flush():
+
+			data.append_subkey_data(key, "t", _t )
+			data.append_subkey_data(key, "V", _v )
+			data.append_subkey_data(key, "I", _i )
+			data.append_subkey_data(key, "P", _v * _i ) 
+
+			_plot.append_handle_data("111", key, _t, [_v, _i][_col])
+			_plot.update_canvas()
+
+		for _key, _value in _deadband.metadata().items():
+			data.set_metadata(key, _key, _value)
+
+	# Waveform playback. Short profiles are played from the source list and 
+	# timed by the insturment. Long profiles are played by a deadline scheduler 
+	# which samples continuously between level changes.
+	def exec_waveform_loop(self, data, key, _plot, start, _set):
+
+		_wave = self.wave
+
+		data.set_metadata(key, "__waveform__", self.wave_select.currentText())
+		data.set_metadata(key, "__points__", _wave.points())
+		data.set_metadata(key, "__duration__", _wave.duration)
+
+		# If in current mode plot voltage, otherwise plot current
+		if self.src_select.currentText() == "Current":
+			_src, _col, _delay = "CURR", 0, self.current_delay.value()
+
+		if self.src_select.currentText() == "Voltage":
+			_src, _col, _delay = "VOLT", 1, self.voltage_delay.value()
+
+		# Source list playback
+		if _wave.is_list():
+
+			data.set_metadata(key, "__playback__", "list")
+
+			_buffer = QKeithleyBuffer( self.keithley() )
+			_buffer.configure( _wave.points(), _fast=False )
+
+			try:
+
+				self.keithley().write(":SOUR:%s:MODE LIST"%_src)
+				self.keithley().write(":SOUR:LIST:%s %s"%( _src, ",".join( ["%s"%_l for _l in _wave.levels] ) ) )
+				_buffer.source_delay(_wave.dwell[0])
+
+				# One reading per list point
+				_now   = float(time.time() - start)
+				_block = _buffer.read()
+				_t = _buffer.stitch(_block[:, 3], _now)
+
+				# Append measured values to data arrays
+				data.get_subkey_data(key, "t").extend( _t.tolist() )
+				data.get_subkey_data(key, _set).extend( _wave.levels[ :len(_t) ].tolist() )
+				data.get_subkey_data(key, "V").extend( _block[:, 0].tolist() )
+				data.get_subkey_data(key, "I").extend( _block[:, 1].tolist() )
+				data.get_subkey_data(key, "P").extend( np.multiply(_block[:, 0], _block[:, 1]).tolist() )
+
+				_plot.append_handle_data("111", key, _t, _block[:, _col])
+				_plot.update_canvas()
+
+			# Restore fixed source mode and source delay
+			finally:
+				self.keithley().write(":SOUR:%s:MODE FIX"%_src)
+				_buffer.reset()
+
+		# Deadline scheduler playback 	
+		else:
+
+			data.set_metadata(key, "__playback__", "timed")
+
+			# Deadlines are relative to playback start (no drift accumulation)
+			_t0, _late, _meas = time.time(), 0.0, 0.0
+
+			for _n in range( _wave.points() ):
+
+				# Wait for deadline
+				_deadline = _t0 + _wave.t[_n]
+				while self.thread_running and time.time() < _deadline:
+					time.sleep( min( _deadline - time.time(), 0.05 ) )
+
+				if not self.thread_running:
+					break
+
+				# Apply level
+				if _src == "VOLT":
+					self.keithley().set_voltage( _wave.levels[_n] )
+
+				if _src == "CURR":
+					self.keithley().set_current( _wave.levels[_n] )
+
+				_late = max( _late, float(time.time() - _deadline) )
+				_end  = _t0 + _wave.t[_n] + _wave.dwell[_n]
+
+				# Sample until the next deadline
+				while self.thread_running:
+
+					_tm = time.time()
+					_buffer = self.keithley().meas().split(",")
+					_meas = time.time() - _tm
+
+					_now = float(time.time() - start)
+
+					data.append_subkey_data(key, "t", _now )
+					data.append_subkey_data(key, _set, float(_wave.levels[_n]) )
+					data.append_subkey_data(key, "V", float(_buffer[0]) )
+					data.append_subkey_data(key, "I", float(_buffer[1]) )
+					data.append_subkey_data(key, "P", float(_buffer[0]) * float(_buffer[1]) ) 
+
+					_plot.append_handle_data("111", key, _now, float(_buffer[_col]))
+					_plot.update_canvas()
+
+					# Stop sampling if the next reading would miss the deadline
+					if time.time() + _delay + _meas >= _end:
+						break
+
+					if _delay != 0: 
+						time.sleep(_delay)
 
-			# Get data from buffer
-			_buffer = self.keithley().meas().split(",")
+			# Maximum lateness of level changes
+			data.set_metadata(key, "__late__", _late)
 
-			# If in current mode, plot voltage
-			if self.src_select.currentText() == "Current":
-				_p = _buffer[0]
+		# Return to constant bias level
+		self.update_bias()
 
-				# Measurement delay 
-				if self.current_delay.value() != 0: 
-					time.sleep(self.current_delay.value())
+	# Generate noise spectrum key and worker for time series key. The spectrum 
+	# is updated in a pipeline stage, so transforms and redraws do not delay 
+	# the acquisition loop. Segments are limited to one block of readings.
+	def gen_spectrum_worker(self, data, key, _count):
 
-			# It in voltage mode plot current		
-			if self.src_select.currentText() == "Voltage":
-				_p = _buffer[1]
+		_type = data.get_metadata(key, "__type__")
+		_col  = "V" if self.src_select.currentText() == "Current" else "I"
 
-				# Measurement delay 
-				if self.voltage_delay.value() != 0: 
-					time.sleep(self.voltage_delay.value())
+		self.spectrum_key = data.add_hash_key("%s-psd"%_type)
+		data.set_subkeys(self.spectrum_key, ["f", "S"])
+		data.set_metadata(self.spectrum_key, "__type__", "%s-psd"%_type)
+		data.set_metadata(self.spectrum_key, "__source__", key)
+		data.set_metadata(self.spectrum_key, "__quantity__", _col)
 
-			# Extract data from buffer
-			_now = float(time.time() - start)
+		self._app.meta_widget.add_meta_key(self.spectrum_key)
+		self.spectrum_plot.add_axes_handle("111", self.spectrum_key)
+
+		self.spectrum = QKeithleySpectrum( 
+			min( self.spectrum_nperseg.value(), _count ), 
+			self.spectrum_segments.value() 
+		)
+		self.spectrum_draw = 0.0
+
+		return QKeithleyPipeline([self.exec_spectrum_stage])
+
+	# Spectrum worker stage: push block of (t, x) and redraw at most twice 
+	# per second
+	def exec_spectrum_stage(self, _item):
+
+		if self.spectrum.push(*_item) != 0 and time.time() - self.spectrum_draw > 0.5:
+			self.update_spectrum()
+
+	# Store current spectrum estimate and update plot (DC bin is not plotted)
+	def update_spectrum(self):
+
+		_psd = self.spectrum.psd()
+		if _psd is None:
+			return
+
+		data = self._app._get_data_object()
+		data.set_subkey_data(self.spectrum_key, "f", _psd[0].tolist())
+		data.set_subkey_data(self.spectrum_key, "S", _psd[1].tolist())
+
+		for _key, _value in self.spectrum.metadata().items():
+			data.set_metadata(self.spectrum_key, _key, _value)
+
+		self.spectrum_plot.set_handle_data("111", self.spectrum_key, 
+			_psd[0][1:], np.log10( np.maximum( _psd[1][1:], np.finfo(float).tiny ) ) )
+		self.spectrum_plot.update_canvas()
+		self.spectrum_draw = time.time()
+
+	# Buffered measurement loop. Readings are acquired in blocks while the 
+	# output stays on, and are placed on the measurement time base via the 
+	# hardware timestamps. Data is passed to storage and plot as arrays.
+	def exec_buffer_loop(self, data, key, _plot, start, _deadband=None):
+
+		# Configure insturment for block acquisition
+		_buffer = QKeithleyBuffer( self.keithley() )
+		_buffer.configure( self.sample_count.value() )
+
+		data.set_metadata(key, "__sampling__", "buffered")
+		data.set_metadata(key, "__count__", _buffer.count())
+
+		# If in current mode plot voltage, otherwise plot current
+		if self.src_select.currentText() == "Current":
+			_col, _delay = 0, self.current_delay.value()
+
+		if self.src_select.currentText() == "Voltage":
+			_col, _delay = 1, self.voltage_delay.value()
+
+		# Noise spectrum worker
+		_pipe = None
+		if self.spectrum_select.currentText() == "Welch PSD":
+			_pipe = self.gen_spectrum_worker(data, key, _buffer.count())
+
+		# Thread loop
+		while self.thread_running:
+
+			# Get block of readings
+			_now   = float(time.time() - start)
+			_block = _buffer.read()
+			_t = _buffer.stitch(_block[:, 3], _now)
+			_v, _i = _block[:, 0], _block[:, 1]
+
+			# Spectrum is computed from the uncompressed block
+			if _pipe is not None:
+				_pipe.put( ( _t, [_v, _i][_col] ) )
+
+			# Compress block in deadband recording mode
+			if _deadband is not None:
+				_t, _v, _i = _deadband.push_block(_t, _v, _i)
 
 			# Append measured values to data arrays
-			data.append_subkey_data(key, "t", _now )
-			data.append_subkey_data(key, "V", float(_buffer[0]) )
-			data.append_subkey_data(key, "I", float(_buffer[1]) )
-			data.append_subkey_data(key, "P", float(_buffer[0]) * float(_buffer[1]) ) 
+			data.get_subkey_data(key, "t").extend( _t.tolist() )
+			data.get_subkey_data(key, "V").extend( _v.tolist() )
+			data.get_subkey_data(key, "I").extend( _i.tolist() )
+			data.get_subkey_data(key, "P").extend( np.multiply(_v, _i).tolist() )
 
 			# Append data to handle
-			_plot.append_handle_data("111", key, _now, float(_p))
-			_plot.update_canvas()
+			if len(_t) != 0:
+				_plot.append_handle_data("111", key, _t, [_v, _i][_col])
+				_plot.update_canvas()
+
+			# Delay between blocks
+			if _delay != 0: 
+				time.sleep(_delay)
+
+		# Restore single reading trigger model
+		_buffer.reset()
+
+		# Final spectrum update and stop worker
+		if _pipe is not None:
+			_pipe.call(self.update_spectrum)
+			_pipe.close()
+
+		# Flush deadband filter
+		self.exec_deadband_flush(data, key, _plot, _deadband)
 
 
 	# UI output on state (measurement)
@@ -425,16 +1363,88 @@ class QKeithleyBiasWidget:
 
 		if self.keithley() is not None:
 
+			# Compile waveform 
+			if self.output_select.currentText() == "Waveform":
+
+				try:
+					self.wave = self.get_waveform()
+
+				except (ValueError, OSError) as e:
+
+					# Message box to warn the user
+					msg = QMessageBox()
+					msg.setIcon(QMessageBox.Warning)
+					msg.setText("Invalid waveform profile: %s"%str(e))
+					msg.setWindowTitle("QKeithleyBias")
+					msg.setStandardButtons(QMessageBox.Ok)
+					msg.exec_()
+
+					# Revert state
+					self.output_widget[0].click()
+					return
+
+			# Noise spectrum is computed from buffered constant output
+			if self.spectrum_select.currentText() == "Welch PSD":
+
+				if self.output_select.currentText() != "Constant" or self.sample_select.currentText() != "Buffered":
+
+					# Message box to warn the user
+					msg = QMessageBox()
+					msg.setIcon(QMessageBox.Warning)
+					msg.setText("Noise spectrum requires constant output and buffered sampling")
+					msg.setWindowTitle("QKeithleyBias")
+					msg.setStandardButtons(QMessageBox.Ok)
+					msg.exec_()
+
+					# Revert state
+					self.output_widget[0].click()
+					return
+
+			# Process acquisition runs the constant single sampling loop
+			if self.acq_select.currentText() == "Process":
+
+				if self.output_select.currentText() != "Constant" or self.sample_select.currentText() != "Single":
+
+					# Message box to warn the user
+					msg = QMessageBox()
+					msg.setIcon(QMessageBox.Warning)
+					msg.setText("Process acquisition requires constant output and single sampling")
+					msg.setWindowTitle("QKeithleyBias")
+					msg.setStandardButtons(QMessageBox.Ok)
+					msg.exec_()
+
+					# Revert state
+					self.output_widget[0].click()
+					return
+
 			# Update UI for ON state
 			self.output_widget[0].setStyleSheet(
 				"background-color: #cce6ff; border-style: solid; border-width: 1px; border-color: #1a75ff; padding: 7px;")
 			
 			# Disable controls
 			self.src_select.setEnabled(False)
+			self.sample_select.setEnabled(False)
+			self.sample_count.unit_value.setEnabled(False)
+			self.record_select.setEnabled(False)
+			self.deadband_ctrl.setEnabled(False)
+			self.spectrum_select.setEnabled(False)
+			self.spectrum_nperseg.unit_value.setEnabled(False)
+			self.spectrum_segments.unit_value.setEnabled(False)
+			self.acq_select.setEnabled(False)
+			self.output_select.setEnabled(False)
+			self.wave_ctrl.setEnabled(False)
+			self.trans_ctrl.setEnabled(False)
+
+			# Bias level is set by the waveform. In process acquisition the 
+			# child process holds the instrument, so the level is fixed
+			if self.output_select.currentText() == "Waveform" or self.acq_select.currentText() == "Process":
+				self.voltage_bias.setEnabled(False)
+				self.current_bias.setEnabled(False)
 			self.voltage_cmpl.setEnabled(False)
 			self.current_cmpl.setEnabled(False)
 			_plot = self.plot_stack.currentWidget()
 			_plot.mpl_refresh_setEnabled(False)
+			self.spectrum_plot.mpl_refresh_setEnabled(False)
 
 			# Disable save widget if it exists
 			if hasattr(self._app, 'save_widget'):
@@ -447,8 +1457,8 @@ class QKeithleyBiasWidget:
 			# Create execution thread for measurement
 			self.thread = threading.Thread(target=self.exec_output_thread, args=())
 			self.thread.daemon = True		# Daemonize thread
-			self.thread.start()			# Start the execution
 			self.thread_running = True
+			self.thread.start()			# Start the execution
 
 	# UI output on state
 	def exec_output_off(self):
@@ -468,10 +1478,24 @@ class QKeithleyBiasWidget:
 	
 			# Enable controls
 			self.src_select.setEnabled(True)
+			self.sample_select.setEnabled(True)
+			self.sample_count.unit_value.setEnabled(True)
+			self.record_select.setEnabled(True)
+			self.deadband_ctrl.setEnabled(True)
+			self.spectrum_select.setEnabled(True)
+			self.spectrum_nperseg.unit_value.setEnabled(True)
+			self.spectrum_segments.unit_value.setEnabled(True)
+			self.acq_select.setEnabled(True)
+			self.output_select.setEnabled(True)
+			self.wave_ctrl.setEnabled(True)
+			self.trans_ctrl.setEnabled(True)
+			self.voltage_bias.setEnabled(True)
+			self.current_bias.setEnabled(True)
 			self.voltage_cmpl.setEnabled(True)
 			self.current_cmpl.setEnabled(True)
 			_plot = self.plot_stack.currentWidget()
 			_plot.mpl_refresh_setEnabled(True)
+			self.spectrum_plot.mpl_refresh_setEnabled(True)
 
 			# Enable save widget if it exists
 			if hasattr(self._app, 'save_widget'):
@@ -480,3 +1504,16 @@ class QKeithleyBiasWidget:
 
 			# Turn output OFF
 			self.keithley().output_off()
+
+			# Acquisition process failure
+			if getattr(self, "process_error", None) is not None:
+
+				# Message box to warn the user
+				msg = QMessageBox()
+				msg.setIcon(QMessageBox.Warning)
+				msg.setText("Acquisition process failed (%s)"%self.process_error)
+				msg.setWindowTitle("QKeithleyBias")
+				msg.setStandardButtons(QMessageBox.Ok)
+				msg.exec_()
+
+				self.process_error = None
@@ -26,8 +26,11 @@
 
 #!/usr/bin/env python 
 
+# Import speed profiles
+from src.engine.QKeithleyProfile import QKeithleyProfile
+
 # Import QT backends
-from PyQt5.QtWidgets import QWidget, QMessageBox, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel, QStackedWidget, QDoubleSpinBox
+from PyQt5.QtWidgets import QApplication, QWidget, QMessageBox, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel, QStackedWidget, QDoubleSpinBox
 from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QIcon
 
@@ -45,6 +48,12 @@ class QKeithleyConfigWidget(QWidget):
 		self._app  = _app
 		self.name = _name
 
+		# Applied speed profile, integration time and measured time per 
+		# reading {profile : (s)}
+		self.profile = "normal"
+		self.nplc = 1.0
+		self.profile_cost = {}
+
 		# Generate main layout
 		self.gen_main_layout()
 
@@ -72,6 +81,18 @@ class QKeithleyConfigWidget(QWidget):
 		self.config_nplc.setSingleStep(0.01)
 		self.config_nplc.setValue(1.00)
 
+		# Speed profile. Sets autozero, autorange, source delay, filter and 
+		# display together. Fixed ranges are derived in sweep mode
+		self.config_profile_label = QLabel("<b>Speed Profile</b>")
+		self.config_profile = QComboBox()
+		self.config_profile.addItems(QKeithleyProfile.get_profiles())
+		self.config_profile.setCurrentText(self.profile)
+
+		# Time per reading of each profile
+		self.config_profile_cost = QLabel("<i>Time per reading not measured</i>")
+		self.config_profile_measure = QPushButton("Measure Profiles")
+		self.config_profile_measure.clicked.connect(self.update_profile_cost)
+
 		# Update button
 		self.inst_update = QPushButton("Update Configuration")
 		self.inst_update.clicked.connect(self.update_config)
@@ -85,6 +106,10 @@ class QKeithleyConfigWidget(QWidget):
 		self.layout.addWidget(self.config_nplc_label)
 		self.layout.addWidget(self.config_nplc_note)
 		self.layout.addWidget(self.config_nplc)
+		self.layout.addWidget(self.config_profile_label)
+		self.layout.addWidget(self.config_profile)
+		self.layout.addWidget(self.config_profile_cost)
+		self.layout.addWidget(self.config_profile_measure)
 		self.layout.addWidget(self.inst_update)
 
 		# Set layout
@@ -112,6 +137,11 @@ class QKeithleyConfigWidget(QWidget):
 
 			# Update integration time
 			self._app.get_device_by_name(self.name).update_nplc(self.config_nplc.value())
+			self.nplc = self.config_nplc.value()
+
+			# Update speed profile
+			QKeithleyProfile.set_profile(self._app.get_device_by_name(self.name), self.config_profile.currentText())
+			self.profile = self.config_profile.currentText()
 
 		# Message box to indicate successful update
 		msg = QMessageBox()
@@ -121,3 +151,40 @@ class QKeithleyConfigWidget(QWidget):
 		msg.setWindowIcon(self._app._icon)
 		msg.setStandardButtons(QMessageBox.Ok)
 		msg.exec_()	
+
+	# Measure time per reading of each profile at the configured integration 
+	# time. The output is turned on at zero level during the measurement
+	def update_profile_cost(self):
+
+		_device = self._app.get_device_by_name(self.name)
+		if _device is None:
+			return
+
+		# Device is in use by a measurement page
+		if self.name in self._app.get_busy_devices():
+
+			msg = QMessageBox()
+			msg.setIcon(QMessageBox.Warning)
+			msg.setText("Measurement is running on %s"%self.name)
+			msg.setWindowTitle("QKeithleyControl")
+			msg.setWindowIcon(self._app._icon)
+			msg.setStandardButtons(QMessageBox.Ok)
+			msg.exec_()
+			return
+
+		QApplication.setOverrideCursor(Qt.WaitCursor)
+
+		try:
+			_device.update_nplc(self.nplc)
+
+			for _profile in QKeithleyProfile.get_profiles():
+				QKeithleyProfile.set_profile(_device, _profile)
+				self.profile_cost[_profile] = QKeithleyProfile.get_reading_cost(_device)
+
+		# Restore applied profile
+		finally:
+			QKeithleyProfile.set_profile(_device, self.profile)
+			QApplication.restoreOverrideCursor()
+
+		self.config_profile_cost.setText( "<i>%s</i>"%( " | ".join( 
+			[ "%s %.1fms"%( _profile, 1e3 * _cost ) for _profile, _cost in self.profile_cost.items() ] ) ) )
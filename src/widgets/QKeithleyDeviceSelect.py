@@ -0,0 +1,45 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyDeviceSelect
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+
+# Import PyQtVisa widgets
+from PyQtVisa.widgets.QVisaDeviceSelect import QVisaDeviceSelect
+
+# Device selector for application pages. Pages are constructed on first 
+# selection, when devices may already be initialized. QVisaDeviceSelect then 
+# adds device names before its callback is defined (which raises in the 
+# textChanged slot), and refresh() would register the same names again. 
+# QKeithleyDeviceSelect always starts empty; devices are registered by the 
+# refresh() method of the application.
+class QKeithleyDeviceSelect(QVisaDeviceSelect):
+
+	# Callback is undefined until set_callback()
+	_callback = None
+
+	def __init__(self, _app):
+
+		QVisaDeviceSelect.__init__(self, _app)
+		self._select.clear()
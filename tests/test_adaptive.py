@@ -0,0 +1,79 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyAdaptive
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import json
+import numpy as np
+import pytest
+
+# Import engine, adaptive integration and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyAdaptive import QKeithleyAdaptive
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Quick readings with current alternating around 1mA by relative noise _rel
+def gen_readings(_rel, _count=4):
+	return [ "0.5,%e,9.91e37,0.0,0"%( 1e-3 * ( 1.0 + _rel * ( -1.0 ) ** _n ) ) for _n in range(_count) ]
+
+# Lowest NPLC meeting the target (noise scales as 1/sqrt(NPLC))
+@pytest.mark.parametrize("_rel, _nplc", [(1e-4, 0.01), (1.5e-3, 0.1), (5e-3, 1.0), (2e-2, 10.0), (1.0, 10.0)])
+def test_select(_rel, _nplc):
+
+	_adaptive = QKeithleyAdaptive(_target=1e-3)
+	assert _adaptive.select( gen_readings(_rel), "Voltage" ) == _nplc
+
+# Range is the decade of the measured quantity
+def test_get_range():
+
+	_adaptive = QKeithleyAdaptive()
+	assert _adaptive.get_range("0.5,2.0e-6,0,0,0", "Voltage") == -6
+	assert _adaptive.get_range("0.5,2.0e-6,0,0,0", "Current") == -1
+	assert _adaptive.get_range("0.5,0.0,0,0,0", "Voltage") is None
+
+# Simulator sweep selects longer integration on low current ranges and 
+# restores the configured NPLC
+def test_sweep_adaptive():
+
+	np.random.seed(0)
+	_device = QKeithleySimulator()
+	_device.noise = 1e-8
+
+	engine = QKeithleyEngine()
+	engine.configure(_device, "Voltage", 0.1)
+
+	_adaptive = QKeithleyAdaptive(_target=1e-2, _restore=1.0)
+	key = engine.sweep(_device, "Voltage", engine.sweep_plan(0.05, 0.6, 56), _adaptive=_adaptive)
+
+	_ranges = sorted( _adaptive.ranges.items() )
+	_nplc = [ _v for _, _v in _ranges ]
+
+	assert len(_ranges) > 2 and _nplc == sorted(_nplc, reverse=True)
+	assert _nplc[0] > _nplc[-1] == 0.01
+	assert engine.data.get_subkey_data(key, "NPLC")[-1] == 0.01
+	assert _device.nplc == 1.0
+
+	_meta = json.loads( engine.data.get_metadata(key, "__nplc__") )
+	assert _meta["points"] == 56 and _meta["readings"] == _adaptive.readings
+	assert _meta["saved"] == pytest.approx( ( 56 * 1.0 - _adaptive.plc ) / 50.0 )
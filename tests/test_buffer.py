@@ -0,0 +1,93 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyBuffer
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Import reading buffer and simulated sourcemeter
+from src.utils.QKeithleyBuffer import QKeithleyBuffer
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Continuous timestamps pass through with offset to host time
+def test_stitch_offset():
+
+	_buffer = QKeithleyBuffer( QKeithleySimulator() )
+
+	assert np.allclose( _buffer.stitch([2.0, 3.0], 10.0), [10.0, 11.0] )
+	assert np.allclose( _buffer.stitch([4.0, 5.0], 99.0), [12.0, 13.0] )
+
+# Rollover within a block adds the last timestamp before the wrap
+def test_stitch_rollover_block():
+
+	_buffer = QKeithleyBuffer( QKeithleySimulator() )
+	_t = _buffer.stitch([8.0, 9.0, 0.5, 1.5, 0.25, 1.25], 0.0)
+
+	assert np.allclose( _t, [0.0, 1.0, 1.5, 2.5, 2.75, 3.75] )
+	assert np.all( np.diff(_t) > 0.0 )
+
+# Rollover between blocks is carried over to the following blocks
+def test_stitch_rollover_blocks():
+
+	_buffer = QKeithleyBuffer( QKeithleySimulator() )
+	_blocks = [ [7.0, 8.0, 9.0], [0.5, 1.5], [2.5, 0.5], [1.5] ]
+	_t = np.concatenate( [ _buffer.stitch(_b, 100.0) for _b in _blocks ] )
+
+	assert np.allclose( _t, [100.0, 101.0, 102.0, 102.5, 103.5, 104.5, 105.0, 106.0] )
+
+# Fast configure changes autozero, source delay and display and reset 
+# restores the previous settings
+def test_configure_reset():
+
+	_device = QKeithleySimulator()
+	_device.write(":SOUR:DEL 1e-3")
+
+	_buffer = QKeithleyBuffer(_device)
+	_buffer.configure(50)
+	_buffer.source_delay(2e-3)
+
+	assert ( _device.count, _device.azero, _device.display, _device.delay ) == ( 50, False, False, 2e-3 )
+
+	_buffer.reset()
+
+	assert ( _device.count, _device.azero, _device.display ) == ( 1, True, True )
+	assert ( _device.auto_delay, _device.delay ) == ( False, 1e-3 )
+	assert _buffer.count() == 1
+
+# Blocks are triggered once by a single bus transaction
+def test_read():
+
+	_device = QKeithleySimulator()
+	_device.output_on()
+	_device.set_voltage(0.1)
+
+	_buffer = QKeithleyBuffer(_device)
+	_buffer.configure(2 * QKeithleyBuffer.max_count)
+	_queries = _device.queries
+
+	_data = _buffer.read()
+
+	assert _data.shape == ( QKeithleyBuffer.max_count, len(QKeithleyBuffer.elements) )
+	assert np.allclose( _data[:, 0], 0.1 )
+	assert ( _device.readings, _device.discarded, _device.queries - _queries ) == ( QKeithleyBuffer.max_count, 0, 1 )
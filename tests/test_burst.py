@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------------
+# 	test_burst
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Import engine and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Configured simulator and engine
+def gen_engine(_noise=0.0):
+
+	_device = QKeithleySimulator()
+	_device.noise = _noise
+
+	engine = QKeithleyEngine()
+	engine.configure(_device, "Voltage", 0.1)
+	return engine, _device
+
+# Each point of a burst sweep triggers the burst once (:READ? only)
+def test_sweep_burst_triggers_once():
+
+	engine, _device = gen_engine()
+	key = engine.sweep(_device, "Voltage", engine.sweep_plan(0.0, 0.5, 6), _burst=8)
+
+	assert len( engine.data.get_subkey_data(key, "V") ) == 6
+	assert _device.readings == 6 * 8
+	assert _device.discarded == 0
+	assert engine.data.get_metadata(key, "__burst__") == 8
+
+# Burst statistics columns match the mean and spread of the readings
+def test_sweep_burst_statistics():
+
+	engine, _device = gen_engine(_noise=1e-6)
+	key = engine.sweep(_device, "Voltage", [0.2] * 4, _burst=16)
+
+	_i, _std = np.asarray( engine.data.get_subkey_data(key, "I") ), np.asarray( engine.data.get_subkey_data(key, "Istd") )
+	_min, _max = np.asarray( engine.data.get_subkey_data(key, "Imin") ), np.asarray( engine.data.get_subkey_data(key, "Imax") )
+
+	assert np.allclose( _i, _device.current(0.2), atol=1e-6 )
+	assert np.all( _std > 0.0 ) and np.all( _min <= _i ) and np.all( _i <= _max )
+
+# PV sweep bursts trigger once per point and restore single readings
+def test_iv_burst_triggers_once():
+
+	engine, _device = gen_engine()
+	_device.iph = 0.01
+	key = engine.iv(_device, engine.sweep_plan(0.0, 0.5, 5), 0.1, _burst=4)
+
+	assert len( engine.data.get_subkey_data(key, "I") ) == 5
+	assert _device.readings == 5 * 4
+	assert _device.discarded == 0
+	assert _device.count == 1
@@ -0,0 +1,126 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyCompliance
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+import pytest
+
+# Import engine, compliance policy and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyCompliance import QKeithleyCompliance
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Raw reading (V, I, R, T, STAT)
+def gen_reading(_stat):
+	return "1.0,1e-3,9.91e37,0.0,%d"%_stat
+
+# Diode simulator which hits 1mA compliance at about 0.5V
+def gen_engine():
+
+	_device = QKeithleySimulator()
+	_device.current_cmp(1e-3)
+
+	engine = QKeithleyEngine()
+	engine.configure(_device, "Voltage", 1e-3)
+	return engine, _device
+
+# Compliance flag is bit 3 of the status element of any reading in a block
+def test_flag():
+
+	assert QKeithleyCompliance.flag( gen_reading(0) ) == 0
+	assert QKeithleyCompliance.flag( gen_reading(8) ) == 1
+	assert QKeithleyCompliance.flag( gen_reading(8 | 1) ) == 1
+	assert QKeithleyCompliance.flag( gen_reading(4 | 2) ) == 0
+	assert QKeithleyCompliance.flag( ",".join( [gen_reading(0), gen_reading(8)] ) ) == 1
+	assert QKeithleyCompliance.flag( "1.0,1e-3" ) == 0
+
+# Unknown policies are rejected
+def test_policy():
+
+	with pytest.raises(ValueError):
+		QKeithleyCompliance("abort")
+
+# Continue policy flags points and never cuts
+def test_push_continue():
+
+	_policy = QKeithleyCompliance("continue")
+	assert not any( [ _policy.push(1, _n) for _n in range(4) ] )
+	assert ( _policy.points, _policy.flagged, _policy.cuts ) == ( 4, 4, [] )
+
+# Stop policy cuts after consecutive points in compliance
+def test_push_stop():
+
+	_policy = QKeithleyCompliance("stop", 2)
+	assert [ _policy.push(_f, _n) for _n, _f in enumerate([1, 0, 1, 1]) ] == [False, False, False, True]
+	assert _policy.cuts == [3.0]
+
+	_policy.skip(6)
+	assert _policy.saved(4.0) == pytest.approx(6.0)
+
+# Sweep stops at compliance and counts the points not measured
+def test_sweep_stop():
+
+	engine, _device = gen_engine()
+	_levels = engine.sweep_plan(0.0, 1.0, 21)
+	_policy = QKeithleyCompliance("stop", 2)
+	key = engine.sweep(_device, "Voltage", _levels, _compliance=_policy)
+
+	_cmpl = engine.data.get_subkey_data(key, "CMPL")
+	assert _cmpl[-2:] == [1, 1] and not any( _cmpl[:-2] )
+	assert len(_cmpl) + _policy.skipped == len(_levels)
+	assert _policy.cuts == [ _levels[ len(_cmpl) - 1 ] ]
+	assert _device.output is False
+
+# Continue policy measures the full sweep and flags clamped points
+def test_sweep_continue():
+
+	engine, _device = gen_engine()
+	_levels = engine.sweep_plan(0.0, 1.0, 21)
+	key = engine.sweep(_device, "Voltage", _levels, _compliance=QKeithleyCompliance())
+
+	_i, _cmpl = np.asarray( engine.data.get_subkey_data(key, "I") ), np.asarray( engine.data.get_subkey_data(key, "CMPL") )
+	assert len(_cmpl) == len(_levels)
+	assert np.all( ( _cmpl == 1 ) == ( np.abs(_i) >= 1e-3 ) )
+
+# Skip policy cuts each sweep of a sweep-step measurement but measures every step
+def test_sweep_step_skip():
+
+	engine, _device = gen_engine()
+	_step = QKeithleySimulator("Keithley SIM::25")
+	_levels, _steps = engine.sweep_plan(0.0, 1.0, 11), [0.0, 0.1, 0.2]
+
+	_policy = QKeithleyCompliance("skip", 1)
+	key = engine.sweep_step(_device, _step, "Voltage", _levels, _steps, _compliance=_policy)
+
+	assert len(_policy.cuts) == len(_steps)
+	assert len( engine.data.get_subkey_data(key, "CMPL0") ) + _policy.skipped == len(_levels) * len(_steps)
+
+	# Stop policy ends the measurement at the first cut
+	engine, _device = gen_engine()
+	_policy = QKeithleyCompliance("stop", 1)
+	key = engine.sweep_step(_device, _step, "Voltage", _levels, _steps, _compliance=_policy)
+
+	assert len(_policy.cuts) == 1
+	assert len( engine.data.get_subkey_data(key, "CMPL0") ) + _policy.skipped == len(_levels) * len(_steps)
@@ -0,0 +1,110 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyDeadband
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Import engine, deadband filter and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleySimulator import QKeithleySimulator
+from src.utils.QKeithleyDeadband import QKeithleyDeadband
+
+# Synthetic bias log: noisy plateaus, a step and a slow ramp
+def gen_log(_npts=2000):
+
+	_rng = np.random.default_rng(1)
+	_t = np.arange(_npts) * 1e-2
+	_v = np.where( _t < 5.0, 0.5, 0.6 ) + 1e-4 * _rng.standard_normal(_npts)
+	_i = 1e-3 + 1e-5 * np.clip( _t - 10.0, 0.0, None ) + 1e-7 * _rng.standard_normal(_npts)
+	return _t, _v, _i
+
+# Reconstruct series by holding stored samples until the next stored sample
+def gen_hold(_ts, _xs, _t):
+	return np.asarray(_xs)[ np.searchsorted(_ts, _t, side="right") - 1 ]
+
+# Push the log and flush. Returns stored (t, v, i) arrays
+def gen_stored(_deadband, _t, _v, _i):
+
+	_ts, _vs, _is = _deadband.push_block(_t, _v, _i)
+	_flush = np.array( _deadband.flush() ).reshape(-1, 3)
+	return np.concatenate( (_ts, _flush[:, 0]) ), np.concatenate( (_vs, _flush[:, 1]) ), np.concatenate( (_is, _flush[:, 2]) )
+
+# Every raw sample lies within the deadband of the reconstructed value
+def test_reconstruction():
+
+	_t, _v, _i = gen_log()
+	_dv, _di = 1e-3, 1e-6
+	_deadband = QKeithleyDeadband(_dv, _di)
+	_ts, _vs, _is = gen_stored(_deadband, _t, _v, _i)
+
+	assert np.all( np.diff(_ts) > 0.0 )
+	assert ( _ts[0], _ts[-1] ) == ( _t[0], _t[-1] )
+	assert len(_ts) < len(_t) / 4
+
+	assert np.all( np.abs( _v - gen_hold(_ts, _vs, _t) ) <= _dv )
+	assert np.all( np.abs( _i - gen_hold(_ts, _is, _t) ) <= _di )
+
+	# Stored samples are raw samples
+	_n = np.searchsorted(_t, _ts)
+	assert np.all( _vs == _v[_n] ) and np.all( _is == _i[_n] )
+
+	_meta = _deadband.metadata()
+	assert ( _meta["__raw__"], _meta["__stored__"] ) == ( len(_t), len(_ts) )
+
+# Relative deadband bounds the reconstruction error relative to the held value
+def test_reconstruction_relative():
+
+	_t, _v, _i = gen_log()
+	_deadband = QKeithleyDeadband(0.0, 0.0, _rel=1e-2)
+	_ts, _vs, _is = gen_stored(_deadband, _t, _v, _i)
+
+	_vh, _ih = gen_hold(_ts, _vs, _t), gen_hold(_ts, _is, _t)
+	assert np.all( np.abs( _v - _vh ) <= 1e-2 * np.abs(_vh) )
+	assert np.all( np.abs( _i - _ih ) <= 1e-2 * np.abs(_ih) )
+
+# Heartbeat bounds the time between stored samples on a flat log
+def test_heartbeat():
+
+	_t = np.arange(1000) * 1e-2
+	_deadband = QKeithleyDeadband(1.0, 1.0, _heartbeat=1.0)
+	_ts, _vs, _is = gen_stored(_deadband, _t, np.zeros(1000), np.zeros(1000))
+
+	assert np.all( np.diff(_ts) <= 1.0 + 1e-9 )
+	assert len(_ts) == 11
+
+# Bias mode stores the deadband samples and reconstruction metadata
+def test_bias_deadband():
+
+	_device = QKeithleySimulator.biased("Voltage", 0.1)
+	_device.noise = 1e-9
+
+	engine = QKeithleyEngine()
+	_deadband = QKeithleyDeadband(1e-3, 1e-6)
+	key = engine.bias(_device, "Voltage", _duration=0.05, _deadband=_deadband)
+
+	_stored = len( engine.data.get_subkey_data(key, "t") )
+	assert engine.data.get_metadata(key, "__compress__") == "deadband-hold"
+	assert engine.data.get_metadata(key, "__stored__") == _stored
+	assert 1 <= _stored <= 2 < engine.data.get_metadata(key, "__raw__")
@@ -0,0 +1,106 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyHysteresis
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import json
+import numpy as np
+import pytest
+
+# Import engine, hysteresis analysis and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleySimulator import QKeithleySimulator
+from src.utils.QKeithleyHysteresis import QKeithleyHysteresis
+
+# Synthetic reverse-sweep loop with forward branch _fwd(x) and reverse branch _rev(x)
+def gen_loop(_fwd, _rev, _npts=11):
+
+	_x = QKeithleyEngine.sweep_plan(0.0, 1.0, _npts, "Reverse-sweep")
+	_seg = QKeithleyEngine.sweep_segments(_x)
+	_y = np.where( _seg == 0, _fwd(_x), _rev(_x) )
+	return _x, _y, _seg
+
+# Linear opening between branches gives known area and index. Branches 
+# share the turning point, so the loop closes at x = 1
+def test_index_linear():
+
+	_x, _y, _seg = gen_loop(lambda _x : _x, lambda _x : _x + 0.1 * ( 1.0 - _x ))
+	_summary = QKeithleyHysteresis.analyse(_x, _y, _seg)
+
+	assert _summary["range"] == [0.0, 1.0]
+	assert _summary["area"] == pytest.approx(0.05)
+	assert _summary["index"] == pytest.approx( 0.05 / 0.55 )
+	assert ( _summary["dmax"], _summary["xdmax"] ) == ( pytest.approx(0.1), pytest.approx(0.0) )
+
+# Identical branches have zero index
+def test_index_none():
+
+	_x, _y, _seg = gen_loop(np.square, np.square)
+	_summary = QKeithleyHysteresis.analyse(_x, _y, _seg)
+
+	assert _summary["area"] == pytest.approx(0.0, abs=1e-15)
+	assert _summary["index"] == pytest.approx(0.0, abs=1e-15)
+
+# Figures of merit and power index of a generating loop
+def test_index_power():
+
+	_x, _y, _seg = gen_loop(lambda _x : _x - 1.0, lambda _x : 1.2 * ( _x - 1.0 ))
+	_summary = QKeithleyHysteresis.analyse(_x, _y, _seg)
+	_fwd, _rev = _summary["forward"], _summary["reverse"]
+
+	assert ( _fwd["x0"], _fwd["y0"], _rev["y0"] ) == ( pytest.approx(1.0), pytest.approx(-1.0), pytest.approx(-1.2) )
+	assert ( _fwd["pmax"], _fwd["xmpp"], _rev["pmax"] ) == ( pytest.approx(0.25), pytest.approx(0.5), pytest.approx(0.3) )
+	assert _fwd["ff"] == pytest.approx(0.25) and _rev["ff"] == pytest.approx(0.25)
+	assert _summary["pindex"] == pytest.approx( 0.05 / 0.3 )
+
+# Zero-centered plans split into branches by direction
+def test_branches_zero_centered():
+
+	_x = QKeithleyEngine.sweep_plan(-1.0, 1.0, 11, "Zero-centered")
+	_seg = QKeithleyEngine.sweep_segments(_x)
+	( _xf, _yf ), ( _xr, _yr ) = QKeithleyHysteresis.branches(_x, 2.0 * _x, _seg)
+
+	assert np.allclose( _xf, np.linspace(-1.0, 1.0, 11) ) and np.allclose( _yf, 2.0 * _xf )
+	assert np.allclose( _xr, np.linspace(-1.0, 1.0, 11) ) and np.allclose( _yr, 2.0 * _xr )
+
+# Single branch traces are rejected
+def test_single_branch():
+
+	_x = np.linspace(0.0, 1.0, 11)
+	with pytest.raises(ValueError):
+		QKeithleyHysteresis.analyse(_x, _x, np.zeros(11, dtype=int))
+
+# Hysteresis sweeps on the simulator are tagged and analysed
+def test_sweep_hysteresis():
+
+	_device = QKeithleySimulator()
+	engine = QKeithleyEngine()
+	engine.configure(_device, "Voltage", 0.1)
+
+	_levels = engine.sweep_plan(0.0, 0.5, 6, "Reverse-sweep")
+	key = engine.sweep(_device, "Voltage", _levels)
+	_summary = json.loads( engine.data.get_metadata(key, "__hysteresis__") )
+
+	assert engine.data.get_subkey_data(key, "SEG") == [0] * 6 + [1] * 5
+	assert _summary["index"] == pytest.approx(0.0, abs=1e-12)
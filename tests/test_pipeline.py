@@ -0,0 +1,124 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyPipeline
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import threading
+import pytest
+
+# Import pipeline, engine and simulated sourcemeter
+from src.utils.QKeithleyPipeline import QKeithleyPipeline
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Three stage pipeline recording the items reaching the last stage
+def gen_pipeline(_out, _threaded=True, _size=256):
+
+	_stages = [
+		lambda _n : None if _n % 3 == 0 else _n,
+		lambda _n : 2 * _n,
+		lambda _n : _out.append(_n) or _n
+	]
+	return QKeithleyPipeline(_stages, _size, _threaded)
+
+# Items pass all stages in order and dropped items do not reach later stages
+@pytest.mark.parametrize("_threaded", [True, False])
+def test_order(_threaded):
+
+	_out = []
+	_pipe = gen_pipeline(_out, _threaded)
+
+	for _n in range(1000):
+		_pipe.put(_n)
+
+	_pipe.close()
+	assert _out == [ 2 * _n for _n in range(1000) if _n % 3 != 0 ]
+
+# Deferred calls run in the last stage in order with the items
+def test_call():
+
+	_out = []
+	_pipe = gen_pipeline(_out)
+
+	for _n in range(1, 6):
+		_pipe.put(_n)
+		_pipe.call(_out.append, "call-%d"%_n)
+
+	_pipe.close()
+	assert _out == [2, "call-1", 4, "call-2", "call-3", 8, "call-4", 10, "call-5"]
+
+# A stage exception stops the pipeline and is raised by close. Items 
+# queued behind the failed item are discarded
+def test_error():
+
+	def _fail(_n):
+		if _n == 10:
+			raise RuntimeError("stage failed")
+		return _n
+
+	_out = []
+	_pipe = QKeithleyPipeline([_fail, _out.append])
+
+	for _n in range(20):
+		_pipe.put(_n)
+
+	with pytest.raises(RuntimeError):
+		_pipe.close()
+
+	assert not _pipe.ok() and _out == list( range( len(_out) ) ) and len(_out) <= 10
+
+# Full queues block the producer (backpressure)
+def test_backpressure():
+
+	_release = threading.Event()
+	_pipe = QKeithleyPipeline([lambda _n : _release.wait() and _n], _size=1)
+
+	_put = threading.Thread(target=lambda : [ _pipe.put(_n) for _n in range(4) ])
+	_put.start()
+	_put.join(0.2)
+
+	assert _put.is_alive()
+
+	_release.set()
+	_put.join(1.0)
+	_pipe.close()
+
+	assert not _put.is_alive()
+
+# Pipelined and serial sweeps store the same points
+def test_sweep_pipeline():
+
+	_levels = QKeithleyEngine.sweep_plan(0.0, 0.5, 51)
+	_data = []
+
+	for _pipeline in [True, False]:
+
+		_points = []
+		engine = QKeithleyEngine(None, _pipeline)
+		key = engine.sweep(QKeithleySimulator(), "Voltage", _levels, _on_point=lambda key, _row : _points.append(_row["V"]))
+
+		assert _points == engine.data.get_subkey_data(key, "V")
+		_data.append( engine.data.get_subkey_data(key, "V") )
+
+	assert _data[0] == _data[1] == pytest.approx( list(_levels) )
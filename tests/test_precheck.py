@@ -0,0 +1,79 @@
+# ---------------------------------------------------------------------------------
+# 	test_precheck
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+
+# Import pre-check and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleyPrecheck import QKeithleyPrecheck
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Simulator in source mode with device resistance _r (Ohm)
+def gen_device(_mode, _r=1e4, _cmpl=None):
+
+	_device = QKeithleySimulator()
+	_device.i0, _device.rs, _device.rsh = 0.0, 1e-3, _r
+
+	_levels = []
+	_write = _device.write
+	def write(_cmd):
+		if ":LEV " in _cmd:
+			_levels.append( float( _cmd.split(" ")[-1] ) )
+		_write(_cmd)
+
+	_device.write = write
+	QKeithleyEngine().configure(_device, _mode, _cmpl or ( 0.1 if _mode == "Voltage" else 2.0 ))
+	return _device, _levels
+
+# Default level follows the source mode
+def test_default_level():
+
+	for _mode, _level in [("Voltage", 0.1), ("Current", 1e-6)]:
+
+		_device, _levels = gen_device(_mode)
+		_result = QKeithleyPrecheck().check(_device, _mode)
+
+		assert max(_levels) == _level
+		assert _result["state"] == "ok"
+		assert not _device.output and _device.nplc == 1.0
+
+# Open and short devices
+def test_classification():
+
+	_device, _ = gen_device("Voltage", _r=1.0)
+	assert QKeithleyPrecheck().check(_device, "Voltage")["state"] == "short"
+
+	_device, _ = gen_device("Voltage", _r=1e12)
+	assert QKeithleyPrecheck().check(_device, "Voltage")["state"] == "open"
+
+	# Current source into open device reaches voltage compliance
+	_device, _ = gen_device("Current", _r=1e12)
+	_result = QKeithleyPrecheck().check(_device, "Current")
+	assert _result["state"] == "open" and _result["R"] < 1e9
+
+	# Explicit level is used as given
+	_device, _levels = gen_device("Current", _r=10.0)
+	QKeithleyPrecheck(_level=1e-3).check(_device, "Current")
+	assert max(_levels) == 1e-3
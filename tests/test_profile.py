@@ -0,0 +1,58 @@
+# ---------------------------------------------------------------------------------
+# 	test_profile
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+
+# Import speed profiles and simulated sourcemeter
+from src.engine.QKeithleyProfile import QKeithleyProfile
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Fixed range profile turns autorange off, also after an autorange profile
+def test_fast_profile_turns_autorange_off():
+
+	_device = QKeithleySimulator()
+
+	QKeithleyProfile.set_profile(_device, "accurate")
+	assert _device.autorange and _device.filter == 10
+
+	QKeithleyProfile.set_profile(_device, "fast")
+	assert not _device.autorange and not _device.azero
+	assert _device.filter == 0 and not _device.display and _device.delay == 0.0
+
+	QKeithleyProfile.set_profile(_device, "normal")
+	assert _device.autorange and _device.azero and _device.auto_delay
+
+# Time per reading increases from fast to accurate
+def test_reading_cost_order():
+
+	_device = QKeithleySimulator(_integration=1e-3)
+
+	_cost = {}
+	for _profile in QKeithleyProfile.get_profiles():
+		QKeithleyProfile.set_profile(_device, _profile)
+		_cost[_profile] = QKeithleyProfile.get_reading_cost(_device)
+
+	assert _cost["fast"] < _cost["normal"] < _cost["accurate"]
+	assert not _device.output
@@ -0,0 +1,102 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyScheduler
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import time
+import pytest
+
+# Import scheduler and simulated sourcemeter
+from src.utils.QKeithleyScheduler import QKeithleyScheduler
+from src.engine.QKeithleySimulator import QKeithleySimulator
+
+# Simulated cells with output on
+def gen_devices(_count):
+
+	_devices = [ QKeithleySimulator("Keithley SIM::%d"%( 24 + _n )) for _n in range(_count) ]
+	for _device in _devices:
+		_device.output_on()
+
+	return _devices
+
+# Levels are applied per device and readings are returned in device order
+def test_measure():
+
+	_devices = gen_devices(4)
+	_levels = [0.1, 0.2, 0.3, 0.4]
+	_sched = QKeithleyScheduler( len(_devices) )
+
+	try:
+		for _ in range(3):
+			_buffers = _sched.measure(_devices, _levels)
+
+		assert [ float(_b[0]) for _b in _buffers ] == _levels
+		assert [ float(_b[1]) for _b in _buffers ] == pytest.approx([ _d.current(_l) for _d, _l in zip(_devices, _levels) ], rel=1e-6)
+		assert _sched.ticks() == 3
+
+	finally:
+		_sched.shutdown()
+
+# Current mode applies levels through the passed source function
+def test_measure_current():
+
+	_devices = gen_devices(2)
+	for _device in _devices:
+		_device.current_src()
+
+	_sched = QKeithleyScheduler( len(_devices) )
+
+	try:
+		_buffers = _sched.measure(_devices, [1e-6, 2e-6], "set_current")
+		assert [ float(_b[1]) for _b in _buffers ] == [1e-6, 2e-6]
+
+	finally:
+		_sched.shutdown()
+
+# Gather phase runs bus transactions concurrently
+def test_map_concurrent():
+
+	_sched = QKeithleyScheduler(4)
+
+	try:
+		_start = time.time()
+		assert _sched.map(lambda _n : time.sleep(0.1) or _n, range(4)) == [0, 1, 2, 3]
+		assert time.time() - _start < 0.3
+
+	finally:
+		_sched.shutdown()
+
+# Frame limiter redraws once per frame interval
+def test_draw_due():
+
+	_sched = QKeithleyScheduler(1, _rate=0.5)
+
+	try:
+		assert not _sched.draw_due()
+
+		_sched._draw -= 2.0
+		assert _sched.draw_due() and not _sched.draw_due()
+
+	finally:
+		_sched.shutdown()
@@ -0,0 +1,76 @@
+# ---------------------------------------------------------------------------------
+# 	QKeithleyWelford
+#	Copyright (C) 2019 Michael Winters
+#	github: https://github.com/mesoic
+#	email:  mesoic@protonmail.com
+# ---------------------------------------------------------------------------------
+# 
+# 	Permission is hereby granted, free of charge, to any person obtaining a copy
+# 	of this software and associated documentation files (the "Software"), to deal
+# 	in the Software without restriction, including without limitation the rights
+# 	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# 	copies of the Software, and to permit persons to whom the Software is
+# 	furnished to do so, subject to the following conditions:
+# 	
+# 	The above copyright notice and this permission notice shall be included in all
+# 	copies or substantial portions of the Software.
+# 	
+# 	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# 	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# 	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# 	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# 	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# 	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# 	SOFTWARE.
+#
+#!/usr/bin/env python
+import numpy as np
+
+# Import engine, streaming statistics and simulated sourcemeter
+from src.engine.QKeithleyEngine import QKeithleyEngine
+from src.engine.QKeithleySimulator import QKeithleySimulator
+from src.utils.QKeithleyWelford import QKeithleyWelford
+
+# Running mean and sample variance match numpy over the folded arrays
+def test_welford_numpy():
+
+	_rng = np.random.default_rng(0)
+	_data = 1e-3 + 1e-6 * _rng.standard_normal( (50, 8) )
+
+	_stats = QKeithleyWelford()
+	for _n, _x in enumerate(_data):
+
+		_stats.push(_x)
+		assert _stats.count == _n + 1
+		assert np.allclose( _stats.mean, np.mean(_data[:_n + 1], axis=0), rtol=0.0, atol=1e-15 )
+
+	assert np.allclose( _stats.var(), np.var(_data, axis=0, ddof=1), rtol=1e-9 )
+	assert np.allclose( _stats.std(), np.std(_data, axis=0, ddof=1), rtol=1e-9 )
+
+# Variance is zero until two arrays are folded
+def test_welford_single():
+
+	_stats = QKeithleyWelford()
+	_stats.push([1.0, 2.0, 3.0])
+
+	assert np.all( _stats.var() == 0.0 )
+	assert np.all( _stats.mean == [1.0, 2.0, 3.0] )
+
+# Repeated sweep aggregates match the statistics of the kept raw sweeps
+def test_sweep_repeat():
+
+	_device = QKeithleySimulator()
+	_device.noise = 1e-6
+
+	engine = QKeithleyEngine()
+	engine.configure(_device, "Voltage", 0.1)
+
+	_levels, _repeats = engine.sweep_plan(0.0, 0.4, 9), 6
+	key = engine.sweep_repeat(_device, "Voltage", _levels, _repeats, _keep=1)
+
+	_raw = np.array([ engine.data.get_subkey_data(key, "I_%d"%_n) for _n in range(_repeats) ])
+
+	assert engine.data.get_metadata(key, "__repeats__") == _repeats
+	assert np.allclose( engine.data.get_subkey_data(key, "I"), np.mean(_raw, axis=0), rtol=1e-12 )
+	assert np.allclose( engine.data.get_subkey_data(key, "Istd"), np.std(_raw, axis=0, ddof=1), rtol=1e-9 )
+	assert np.all( np.asarray( engine.data.get_subkey_data(key, "Istd") ) > 0.0 )